@@ -1,13 +1,21 @@
 from core.serializers import (
     ComponentSerializer,
+    HarvestBatchSerializer,
     HarvestJobCreateSerializer,
     HarvestJobSerializer,
+    HarvestPageSerializer,
+    HarvestResultListSerializer,
     HarvestResultSerializer,
+    HarvestSnapshotSerializer,
 )
 
 __all__ = [
     'ComponentSerializer',
+    'HarvestBatchSerializer',
     'HarvestJobCreateSerializer',
     'HarvestJobSerializer',
+    'HarvestPageSerializer',
+    'HarvestResultListSerializer',
     'HarvestResultSerializer',
+    'HarvestSnapshotSerializer',
 ]
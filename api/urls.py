@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .auth import MeView, RegisterView
 from .viewsets import (
     ComponentViewSet,
+    HarvestBatchViewSet,
     HarvestJobViewSet,
     HarvestResultViewSet,
     TechnologyDetectionViewSet,
@@ -12,6 +13,7 @@ from .viewsets import (
 
 router = DefaultRouter()
 router.register(r'jobs', HarvestJobViewSet, basename='jobs')
+router.register(r'batches', HarvestBatchViewSet, basename='batches')
 router.register(r'results', HarvestResultViewSet, basename='results')
 router.register(r'tech-detect', TechnologyDetectionViewSet, basename='tech-detect')
 router.register(r'components', ComponentViewSet, basename='components')
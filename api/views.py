@@ -2,7 +2,7 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.tasks import harvest_website
+from core.tasks import enqueue_harvest
 from core.utils.robots_parser import RobotsParser
 from core.utils.tech_detector import detect_technologies
 
@@ -16,7 +16,7 @@ class HarvestCreateView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         job = serializer.save()
-        harvest_website.delay(str(job.id))
+        enqueue_harvest(job)
         return Response(HarvestJobSerializer(job).data, status=status.HTTP_201_CREATED)
 
 
@@ -1,20 +1,42 @@
+import json
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-from core.models import Component, HarvestJob, HarvestResult
-from core.tasks import harvest_website, schedule_recurring_harvest
+from core.models import Component, HarvestBatch, HarvestJob, HarvestResult, HarvestSnapshot
+from core.serializers import validate_harvest_options
+from core.tasks import (
+    batch_counters,
+    create_batch_jobs,
+    enqueue_harvest,
+    set_recurring_schedule,
+    snapshot_html,
+    staged_batch_urls,
+)
 from core.utils.compare import compare_results
 from core.utils.reporting import generate_markdown_report
 from core.utils.tech_detector import quick_tech_scan
+from core.utils.url_batch import URLBatch
+from core.utils.zip_export import iter_result_zip
 
 from .serializers import (
     ComponentSerializer,
+    HarvestBatchSerializer,
     HarvestJobCreateSerializer,
     HarvestJobSerializer,
+    HarvestPageSerializer,
+    HarvestResultListSerializer,
     HarvestResultSerializer,
+    HarvestSnapshotSerializer,
 )
 
 
@@ -33,7 +55,9 @@ class HarvestJobViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         job = serializer.save(user=self.request.user)
-        harvest_website.delay(str(job.id))
+        if job.is_recurring and job.cron_schedule:
+            set_recurring_schedule(job, job.cron_schedule)
+        enqueue_harvest(job)
 
     @action(detail=True, methods=['get'])
     def result(self, request, pk=None):
@@ -48,6 +72,13 @@ class HarvestJobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+    @action(detail=True, methods=['get'])
+    def pages(self, request, pk=None):
+        job = self.get_object()
+        pages = self.paginate_queryset(job.pages.defer('html'))
+        serializer = HarvestPageSerializer(pages, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def retry(self, request, pk=None):
         job = self.get_object()
@@ -62,7 +93,7 @@ class HarvestJobViewSet(viewsets.ModelViewSet):
         job.error_message = ''
         job.save(update_fields=['status', 'retry_count', 'error_message'])
 
-        harvest_website.delay(str(job.id))
+        enqueue_harvest(job)
         return Response({'detail': 'Job requeued for retry.'})
 
     @action(detail=True, methods=['post'])
@@ -83,9 +114,14 @@ class HarvestJobViewSet(viewsets.ModelViewSet):
         job = self.get_object()
         try:
             result = job.result
+            if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+                # Built while it is sent, so large harvests need no archive on disk or in memory.
+                response = StreamingHttpResponse(iter_result_zip(result), content_type='application/zip')
+                response['Content-Disposition'] = f'attachment; filename="{job.id}.zip"'
+                return response
             if not result.zip_file:
                 return Response(
-                    {'detail': 'ZIP file not available.'},
+                    {'detail': 'ZIP file not available; request ?stream=true to build it on the fly.'},
                     status=status.HTTP_404_NOT_FOUND,
                 )
             return Response({'download_url': result.zip_file.url})
@@ -106,36 +142,76 @@ class HarvestJobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        job.is_recurring = True
-        job.cron_schedule = cron_schedule
-        job.save(update_fields=['is_recurring', 'cron_schedule'])
-
-        schedule_recurring_harvest.delay(str(job.id), cron_schedule)
-        return Response({'detail': 'Recurring harvest scheduled.'})
+        try:
+            next_run_at = set_recurring_schedule(job, cron_schedule)
+        except ValueError as e:
+            return Response(
+                {'detail': f'Invalid cron_schedule: {e}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'detail': 'Recurring harvest scheduled.', 'next_run_at': next_run_at})
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, MultiPartParser])
     def batch(self, request):
-        urls = request.data.get('urls', [])
+        # URLs come as a JSON "urls" list or as an uploaded text/CSV "file", one URL per line.
+        # Uploads are read line by line from Django's spooled temp file and jobs are created by
+        # a worker, so the response carries only the batch id and validation summary.
+        upload = request.FILES.get('file')
+        lines = upload if upload is not None else request.data.get('urls', [])
         options = request.data.get('options', {})
+        priority = request.data.get('priority', 5)
 
-        if not urls:
+        if not lines or (upload is None and not isinstance(lines, list)):
             return Response(
-                {'detail': 'urls list is required.'},
+                {'detail': 'urls list or file is required.'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        jobs = []
-        for url in urls:
-            job = HarvestJob.objects.create(
-                url=url,
-                user=request.user,
-                options=options,
+        if isinstance(options, str):
+            try:
+                options = json.loads(options)
+            except ValueError:
+                options = None
+        if not isinstance(options, dict):
+            return Response(
+                {'detail': 'options must be a JSON object.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            validate_harvest_options(options)
+        except ValidationError as e:
+            return Response({'options': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            priority = None
+        if priority not in dict(HarvestJob.PRIORITY_CHOICES):
+            return Response(
+                {'detail': 'priority must be 1, 5 or 10.'},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            jobs.append(job)
-            harvest_website.delay(str(job.id))
 
-        serializer = self.get_serializer(jobs, many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        batch_id = uuid.uuid4()
+        urls = URLBatch(max_length=HarvestJob._meta.get_field('url').max_length)
+        staged = staged_batch_urls(batch_id)
+        staged.extend(urls.iter_urls(lines), settings.HARVEST_BATCH_CHUNK_SIZE)
+
+        summary = urls.summary()
+        if not urls.accepted:
+            # A rejected batch leaves nothing staged, since no worker would ever read it.
+            staged.clear()
+            return Response(
+                {'detail': 'No valid URLs submitted.', **summary},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        HarvestBatch.objects.create(
+            id=batch_id,
+            user=request.user,
+            options=options,
+            priority=priority,
+            total=urls.accepted,
+        )
+        create_batch_jobs.delay(str(batch_id))
+        return Response({'batch_id': str(batch_id), **summary}, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=False, methods=['get'])
     def statistics(self, request):
@@ -154,13 +230,44 @@ class HarvestJobViewSet(viewsets.ModelViewSet):
         })
 
 
+class HarvestBatchViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = HarvestBatch.objects.all().order_by('-created_at')
+    serializer_class = HarvestBatchSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        # Reads the live Redis counters when present, else the last flushed row; never
+        # counts the batch's jobs.
+        batch = self.get_object()
+        counters = batch_counters(batch.id).load()
+        if counters is not None:
+            for field, value in counters.items():
+                setattr(batch, field, value)
+        return Response(self.get_serializer(batch).data)
+
+
 class HarvestResultViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = HarvestResult.objects.select_related('job').order_by('-created_at')
+    # Snapshot listings never need the stored page versions.
+    queryset = HarvestResult.objects.select_related('job').prefetch_related(
+        Prefetch('snapshots', queryset=HarvestSnapshot.objects.defer('html_data'))
+    ).order_by('-created_at')
     serializer_class = HarvestResultSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return self.queryset.filter(job__user=self.request.user)
+        queryset = self.queryset.filter(job__user=self.request.user)
+        if self.action in ('list', 'search'):
+            queryset = queryset.defer('content_inline', 'html_inline')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'search'):
+            return HarvestResultListSerializer
+        return super().get_serializer_class()
 
     @action(detail=True, methods=['get'])
     def export(self, request, pk=None):
@@ -179,6 +286,26 @@ class HarvestResultViewSet(viewsets.ReadOnlyModelViewSet):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @action(detail=True, methods=['get'])
+    def snapshots(self, request, pk=None):
+        result = self.get_object()
+        snapshots = result.snapshots.defer('html_data').order_by('-sequence')
+        return Response(HarvestSnapshotSerializer(snapshots, many=True).data)
+
+    @action(detail=True, methods=['get'], url_path=r'snapshots/(?P<sequence>\d+)')
+    def snapshot(self, request, pk=None, sequence=None):
+        result = self.get_object()
+        snapshot = get_object_or_404(HarvestSnapshot, original_result=result, sequence=sequence)
+        html = snapshot_html(snapshot)
+        if html is None:
+            return Response(
+                {'detail': 'No stored HTML for this snapshot.'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        data = HarvestSnapshotSerializer(snapshot).data
+        data['html'] = html
+        return Response(data)
+
     @action(detail=False, methods=['get'])
     def search(self, request):
         tech = request.query_params.get('tech')
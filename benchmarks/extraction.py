@@ -0,0 +1,97 @@
+"""Per-page CPU time of the BeautifulSoup and lxml extraction engines.
+
+Usage:
+    python benchmarks/extraction.py [--corpus DIR] [--pages N] [--repeat N]
+
+Without --corpus a synthetic corpus of large pages is generated.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.utils.scraper import WebScraper  # noqa: E402
+
+WORDS = (
+    'harvest frontend asset render content crawl static page layout grid '
+    'module cache token browser request network script style header footer'
+).split()
+
+
+def _sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def synthetic_page(rng, sections=400):
+    head = [
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">',
+        '<title>Synthetic benchmark page</title>',
+        '<meta name="description" content="Synthetic page for extraction benchmarks">',
+        '<meta property="og:title" content="Benchmark">',
+        '<link rel="stylesheet" href="/static/site.css">',
+        '<script src="/static/vendor.js"></script>',
+        '<style>body { margin: 0 } .card { padding: 1rem }</style>',
+        '</head><body><nav><ul>',
+    ]
+    head.extend(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(30))
+    body = ['</ul></nav><main>']
+    for index in range(sections):
+        body.append(f'<section id="s{index}"><h2>{_sentence(rng, 4)}</h2>')
+        body.append(f'<p>{_sentence(rng)} <a href="https://external{index % 7}.example.org/p">ref</a> {_sentence(rng)}</p>')
+        body.append(f'<img src="/media/img{index}.jpg" alt="{_sentence(rng, 3)}">')
+        if index % 5 == 0:
+            body.append('<table><tr><th>Key</th><th>Value</th></tr>')
+            body.extend(f'<tr><td>k{i}</td><td>{_sentence(rng, 3)}</td></tr>' for i in range(8))
+            body.append('</table>')
+        if index % 3 == 0:
+            body.append('<ol>' + ''.join(f'<li>{_sentence(rng, 5)}</li>' for _ in range(5)) + '</ol>')
+        body.append(f'<!-- section {index} --><script>window.__s{index} = {index};</script></section>')
+    body.append('</main><footer><h6>Footer</h6></footer></body></html>')
+    return ''.join(head + body)
+
+
+def load_corpus(directory, pages):
+    if directory:
+        return [path.read_text(encoding='utf-8', errors='replace') for path in sorted(Path(directory).glob('*.html'))]
+    rng = random.Random(42)
+    return [synthetic_page(rng) for _ in range(pages)]
+
+
+def measure(engine, corpus, repeat):
+    scraper = WebScraper('https://example.com/', {'engine': engine, 'fetch': 'http'})
+    timings = []
+    for _ in range(repeat):
+        for html in corpus:
+            started = time.process_time()
+            scraper.extract(html)
+            timings.append(time.process_time() - started)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='Directory of .html files')
+    parser.add_argument('--pages', type=int, default=20, help='Synthetic pages to generate')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus, args.pages)
+    average_kb = sum(len(html) for html in corpus) / len(corpus) / 1024
+    print(f'{len(corpus)} pages, {average_kb:.0f} KiB average')
+
+    results = {engine: measure(engine, corpus, args.repeat) for engine in ('bs4', 'lxml')}
+    for engine, timings in results.items():
+        print(
+            f'{engine:>5}: median {statistics.median(timings) * 1000:.1f} ms/page, '
+            f'p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:.1f} ms/page'
+        )
+    speedup = statistics.median(results['bs4']) / statistics.median(results['lxml'])
+    print(f'lxml speedup: {speedup:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
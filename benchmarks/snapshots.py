@@ -0,0 +1,95 @@
+"""Storage and reconstruction cost of delta-compressed page snapshots.
+
+Usage:
+    python benchmarks/snapshots.py [--versions N] [--interval K] [--rows R]
+
+Simulates a page re-checked hourly where each check edits a few table rows,
+then reports bytes stored per snapshot for raw HTML, a zlib keyframe per
+snapshot and keyframe + delta chains, and the latency of rebuilding the
+newest and the worst-placed version of a chain.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.utils.snapshot_delta import compress_keyframe, make_delta, reconstruct  # noqa: E402
+
+
+def hourly_versions(count, rows, edits_per_hour=3, seed=7):
+    rng = random.Random(seed)
+    prices = [rng.randint(5, 500) for _ in range(rows)]
+    for hour in range(count):
+        for _ in range(edits_per_hour):
+            prices[rng.randrange(rows)] = rng.randint(5, 500)
+        body = ''.join(
+            f'<tr class="product"><td><a href="/p/{index}">Product {index}</a></td>'
+            f'<td class="price">${price}.00</td><td>In stock</td></tr>\n'
+            for index, price in enumerate(prices)
+        )
+        yield (
+            '<html><head><title>Catalog</title></head><body><header><h1>Catalog</h1>'
+            f'<p>Checked at hour {hour}</p></header><table>\n{body}</table></body></html>'
+        )
+
+
+def store(versions, interval):
+    # Same policy as core.tasks.record_snapshot: deltas until the chain reaches the interval.
+    stored = []
+    previous = None
+    chain_length = 0
+    for html in versions:
+        keyframe = compress_keyframe(html)
+        data, length = keyframe, 0
+        if previous is not None and chain_length + 1 < interval:
+            delta = make_delta(previous, html)
+            if delta is not None and len(delta) * 2 < len(keyframe):
+                data, length = delta, chain_length + 1
+        chain_length = length
+        stored.append((chain_length, data))
+        previous = html
+    return stored
+
+
+def rebuild_seconds(stored, index, repeat=20):
+    chain_length = stored[index][0]
+    chain = [data for _, data in stored[index - chain_length:index + 1]]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        reconstruct(chain[0], chain[1:])
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--versions', type=int, default=24 * 14)
+    parser.add_argument('--interval', type=int, default=24)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    versions = list(hourly_versions(args.versions, args.rows))
+    raw = sum(len(html.encode('utf-8')) for html in versions)
+    keyframes = sum(len(compress_keyframe(html)) for html in versions)
+
+    started = time.perf_counter()
+    stored = store(versions, args.interval)
+    write_seconds = time.perf_counter() - started
+    chained = sum(len(data) for _, data in stored)
+    deepest = max(range(len(stored)), key=lambda index: stored[index][0])
+
+    print(f'{args.versions} hourly versions of a {raw / len(versions) / 1024:.0f} KiB page, keyframe every {args.interval}')
+    for label, total in (('raw HTML', raw), ('zlib per snapshot', keyframes), ('keyframe + deltas', chained)):
+        print(f'{label:<20} {total / len(versions) / 1024:9.1f} KiB/snapshot  {raw / total:7.1f}x vs raw')
+    print(f'{"write":<20} {write_seconds / len(versions) * 1000:9.2f} ms/snapshot')
+    print(f'{"rebuild newest":<20} {rebuild_seconds(stored, len(stored) - 1) * 1000:9.2f} ms')
+    print(f'{"rebuild deepest":<20} {rebuild_seconds(stored, deepest) * 1000:9.2f} ms  ({stored[deepest][0]} deltas)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Memory and throughput of the crawler's visited-URL structures.
+
+Usage:
+    python benchmarks/url_seen.py [--urls N]
+
+Reports bytes per URL (scaled to one million URLs), insert throughput and
+the observed false-positive rate for a Python set of strings, the exact
+64-bit FingerprintSet and ScalableBloomFilter at two error rates.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.utils.url_seen import FingerprintSet, ScalableBloomFilter  # noqa: E402
+
+
+def faceted_urls(count, prefix='https://shop.example.com'):
+    for index in range(count):
+        yield f'{prefix}/catalog/shoes?color={index % 17}&size={index % 23}&page={index // 391}&sort=price&item={index}'
+
+
+def measure(label, factory, count, probes):
+    tracemalloc.start()
+    started = time.perf_counter()
+    seen = factory()
+    for url in faceted_urls(count):
+        seen.add(url)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    false_positives = sum(1 for url in faceted_urls(probes, prefix='https://other.example.org') if url in seen)
+    per_url = current / count
+    print(
+        f'{label:<28} {per_url:8.1f} B/URL  {per_url * 1_000_000 / 2 ** 20:8.1f} MiB/1M  '
+        f'peak {peak / 2 ** 20:7.1f} MiB  {count / elapsed / 1000:7.1f}k inserts/s  '
+        f'false positives {false_positives / probes:.4%}'
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=1_000_000)
+    parser.add_argument('--probes', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(f'{args.urls} URLs, {args.probes} negative probes')
+    measure('set[str]', set, args.urls, args.probes)
+    measure('FingerprintSet', FingerprintSet, args.urls, args.probes)
+    measure('ScalableBloomFilter 0.1%', lambda: ScalableBloomFilter(args.urls // 4, 0.001), args.urls, args.probes)
+    measure('ScalableBloomFilter 1%', lambda: ScalableBloomFilter(args.urls // 4, 0.01), args.urls, args.probes)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ import shutil
 import sys
 from pathlib import Path
 
+from core.utils.crawler import Crawler
 from core.utils.robots_parser import RobotsParser
 from core.utils.scraper import WebScraper
 from core.utils.tech_detector import detect_technologies
@@ -19,7 +20,8 @@ def build_parser():
         choices=['content', 'media', 'full', 'tech', 'tech-detect'],
         help='Harvest mode',
     )
-    parser.add_argument('--depth', type=int, default=1, help='Crawl depth (reserved)')
+    parser.add_argument('--depth', type=int, default=1, help='Crawl depth (1 harvests only the given URL)')
+    parser.add_argument('--max-pages', type=int, default=100, help='Maximum pages to crawl when depth > 1')
     parser.add_argument('--output', default='goharvest-output', help='Output directory')
     return parser
 
@@ -46,8 +48,19 @@ def main(argv=None):
         print(f"Saved technologies to {output_dir / 'technologies.json'}")
         return 0
 
-    options = {'mode': args.mode, 'depth': args.depth}
-    result = asyncio.run(WebScraper().scrape(args.url, options))
+    options = {'mode': args.mode, 'depth': args.depth, 'max_pages': args.max_pages}
+    if args.depth > 1:
+        pages = asyncio.run(Crawler(args.url, options).crawl())
+        if not pages or pages[0]['status'] != 'success':
+            print('Failed to harvest the start page', file=sys.stderr)
+            return 1
+        result = pages[0]
+        _write_json(output_dir / 'pages.json', [
+            {key: page.get(key) for key in ('url', 'depth', 'status', 'metadata', 'links', 'error')}
+            for page in pages
+        ])
+    else:
+        result = asyncio.run(WebScraper(args.url, options).scrape())
 
     (output_dir / 'index.html').write_text(result.get('html', ''), encoding='utf-8')
     (output_dir / 'content.txt').write_text(result.get('content', ''), encoding='utf-8')
@@ -2,9 +2,13 @@ from django.contrib import admin
 from .models import (
     AIAnalysis,
     Asset,
+    AssetBlob,
+    AssetURL,
     Component,
     HarvestAuditLog,
+    HarvestBatch,
     HarvestJob,
+    HarvestPage,
     HarvestResult,
     HarvestSnapshot,
     PerformanceMetrics,
@@ -19,10 +23,24 @@ class HarvestJobAdmin(admin.ModelAdmin):
     search_fields = ('url',)
 
 
+@admin.register(HarvestBatch)
+class HarvestBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'total', 'pending', 'running', 'completed', 'failed', 'created_at')
+    readonly_fields = ('pending', 'running', 'completed', 'failed', 'cancelled', 'bytes_harvested')
+
+
 @admin.register(HarvestResult)
 class HarvestResultAdmin(admin.ModelAdmin):
     list_display = ('job', 'created_at')
     search_fields = ('job__url',)
+    readonly_fields = ('content_key', 'html_key')
+
+
+@admin.register(HarvestPage)
+class HarvestPageAdmin(admin.ModelAdmin):
+    list_display = ('url', 'job', 'depth', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('url', 'job__url')
 
 
 @admin.register(Asset)
@@ -32,6 +50,19 @@ class AssetAdmin(admin.ModelAdmin):
     search_fields = ('url',)
 
 
+@admin.register(AssetBlob)
+class AssetBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'content_type', 'ref_count', 'created_at')
+    search_fields = ('sha256',)
+
+
+@admin.register(AssetURL)
+class AssetURLAdmin(admin.ModelAdmin):
+    list_display = ('url', 'blob', 'is_immutable', 'last_seen')
+    list_filter = ('is_immutable',)
+    search_fields = ('url',)
+
+
 @admin.register(AIAnalysis)
 class AIAnalysisAdmin(admin.ModelAdmin):
     list_display = ('result', 'created_at')
@@ -46,8 +77,9 @@ class PerformanceMetricsAdmin(admin.ModelAdmin):
 
 @admin.register(HarvestSnapshot)
 class HarvestSnapshotAdmin(admin.ModelAdmin):
-    list_display = ('original_result', 'changes_detected', 'snapshot_date')
+    list_display = ('original_result', 'sequence', 'changes_detected', 'chain_length', 'html_size', 'snapshot_date')
     search_fields = ('original_result__job__url',)
+    exclude = ('html_data',)
 
 
 @admin.register(RobotsCompliance)
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from core.models import HarvestResult
+from core.utils.blob_store import get_blob_store
+
+
+def _inline_bytes(result):
+    return sum(len(getattr(result, f'{name}_inline').encode('utf-8')) for name in HarvestResult.BLOB_FIELDS)
+
+
+class Command(BaseCommand):
+    help = 'Move large inline result HTML/content into the blob store, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--min-size', type=int, default=None, help='Bytes; defaults to HARVEST_BLOB_MIN_SIZE.')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many results.')
+
+    def handle(self, *args, batch_size, min_size, limit, **options):
+        min_size = settings.HARVEST_BLOB_MIN_SIZE if min_size is None else min_size
+        store = get_blob_store()
+        # Length counts characters; a UTF-8 character takes at most four bytes.
+        min_chars = max(min_size // 4, 1)
+        candidates = (
+            HarvestResult.objects.alias(content_length=Length('content_inline'), html_length=Length('html_inline'))
+            .filter(Q(content_length__gte=min_chars) | Q(html_length__gte=min_chars))
+            .only('id', *(f'{name}_{part}' for name in HarvestResult.BLOB_FIELDS for part in ('inline', 'key')))
+            .order_by('pk')
+        )
+
+        last_pk = 0
+        scanned = moved = moved_bytes = 0
+        while limit is None or scanned < limit:
+            size = batch_size if limit is None else min(batch_size, limit - scanned)
+            batch = list(candidates.filter(pk__gt=last_pk)[:size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            scanned += len(batch)
+
+            updated, fields = [], set()
+            for result in batch:
+                inline_bytes = _inline_bytes(result)
+                changed = result.offload_blobs(store, min_size)
+                if changed:
+                    updated.append(result)
+                    fields.update(changed)
+                    moved_bytes += inline_bytes - _inline_bytes(result)
+            # Blobs are written before the rows point at them, so a crash leaves only unused blobs.
+            with transaction.atomic():
+                HarvestResult.objects.bulk_update(updated, sorted(fields))
+            moved += len(updated)
+            self.stdout.write(f'{scanned} results scanned, {moved} offloaded, {moved_bytes / 2 ** 20:.1f} MiB moved')
+
+        self.stdout.write(self.style.SUCCESS(f'Offloaded {moved} of {scanned} results ({moved_bytes / 2 ** 20:.1f} MiB).'))
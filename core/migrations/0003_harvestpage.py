@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_harvestjob_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=2048)),
+                ('depth', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed')], default='success', max_length=20)),
+                ('content', models.TextField(blank=True)),
+                ('html', models.TextField(blank=True)),
+                ('structured_data', models.JSONField(default=dict)),
+                ('metadata', models.JSONField(default=dict)),
+                ('links', models.JSONField(default=dict)),
+                ('assets', models.JSONField(default=list)),
+                ('fetch', models.JSONField(default=dict)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='core.harvestjob')),
+            ],
+            options={
+                'ordering': ['depth', 'created_at'],
+                'indexes': [models.Index(fields=['job', 'depth'], name='core_harves_job_id_54d6e3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_harvestpage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file_path', models.FileField(upload_to='harvests/assets/')),
+                ('size', models.BigIntegerField()),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count'], name='core_assetb_ref_cou_ac6ca2_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='assets', to='core.assetblob'),
+        ),
+        migrations.CreateModel(
+            name='AssetURL',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('url', models.URLField(max_length=2048)),
+                ('is_immutable', models.BooleanField(default=False)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='urls', to='core.assetblob')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_assetblob_asseturl'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asseturl',
+            name='cache_control',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='asseturl',
+            name='etag',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='asseturl',
+            name='last_modified',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='harvestresult',
+            name='validators',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
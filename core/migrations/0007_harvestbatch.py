@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+STATUS_COUNTERS = {
+    'pending': 'pending',
+    'scheduled': 'pending',
+    'running': 'running',
+    'completed': 'completed',
+    'failed': 'failed',
+    'cancelled': 'cancelled',
+}
+
+
+def create_batches_for_jobs(apps, schema_editor):
+    HarvestBatch = apps.get_model('core', 'HarvestBatch')
+    HarvestJob = apps.get_model('core', 'HarvestJob')
+    batch_ids = HarvestJob.objects.exclude(batch_id=None).values_list('batch_id', flat=True).order_by().distinct()
+    for batch_id in batch_ids:
+        jobs = HarvestJob.objects.filter(batch_id=batch_id)
+        first = jobs.order_by('created_at').first()
+        counters = {field: 0 for field in set(STATUS_COUNTERS.values())}
+        for row in jobs.order_by().values('status').annotate(count=models.Count('id')):
+            counters[STATUS_COUNTERS[row['status']]] += row['count']
+        HarvestBatch.objects.create(
+            id=batch_id,
+            user_id=first.user_id,
+            options=first.options,
+            priority=first.priority,
+            total=sum(counters.values()),
+            **counters,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_harvestjob_batch_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('options', models.JSONField(default=dict)),
+                ('priority', models.IntegerField(default=5)),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('running', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('bytes_harvested', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='harvestbatch',
+            index=models.Index(fields=['user', '-created_at'], name='core_harves_user_id_d30631_idx'),
+        ),
+        migrations.RunPython(create_batches_for_jobs, migrations.RunPython.noop),
+        # Turn the plain batch_id column into the batch foreign key without touching its data.
+        migrations.AlterField(
+            model_name='harvestjob',
+            name='batch_id',
+            field=models.ForeignKey(blank=True, db_column='batch_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='core.harvestbatch'),
+        ),
+        migrations.RenameField(
+            model_name='harvestjob',
+            old_name='batch_id',
+            new_name='batch',
+        ),
+        migrations.AlterField(
+            model_name='harvestjob',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='core.harvestbatch'),
+        ),
+    ]
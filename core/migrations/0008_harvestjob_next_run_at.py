@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:21
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_existing_recurring_jobs(apps, schema_editor):
+    from core.utils.cron import next_fire_time, parse_cron, schedule_jitter
+
+    HarvestJob = apps.get_model('core', 'HarvestJob')
+    now = timezone.now()
+    for job in HarvestJob.objects.filter(is_recurring=True).exclude(cron_schedule=''):
+        try:
+            schedule = parse_cron(job.cron_schedule)
+        except ValueError:
+            continue
+        jitter = timedelta(seconds=schedule_jitter(str(job.id), settings.HARVEST_SCHEDULE_JITTER))
+        job.next_run_at = next_fire_time(schedule, now - jitter) + jitter
+        job.save(update_fields=['next_run_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_harvestbatch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestjob',
+            name='next_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='harvestjob',
+            index=models.Index(condition=models.Q(('is_recurring', True)), fields=['next_run_at'], name='harvestjob_next_run_idx'),
+        ),
+        migrations.RunPython(schedule_existing_recurring_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:25
+
+from django.db import migrations, models
+
+
+def number_snapshots(apps, schema_editor):
+    # Existing snapshots keep no HTML; they only need distinct sequences per result.
+    HarvestSnapshot = apps.get_model('core', 'HarvestSnapshot')
+    updates = []
+    last_result, sequence = None, 0
+    for snapshot in HarvestSnapshot.objects.order_by('original_result_id', 'snapshot_date', 'id').only(
+        'id', 'original_result_id'
+    ).iterator():
+        if snapshot.original_result_id != last_result:
+            last_result, sequence = snapshot.original_result_id, 0
+        sequence += 1
+        snapshot.sequence = sequence
+        updates.append(snapshot)
+        if len(updates) >= 1000:
+            HarvestSnapshot.objects.bulk_update(updates, ['sequence'])
+            updates = []
+    if updates:
+        HarvestSnapshot.objects.bulk_update(updates, ['sequence'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_harvestjob_next_run_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestsnapshot',
+            name='chain_length',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='harvestsnapshot',
+            name='html_data',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='harvestsnapshot',
+            name='html_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='harvestsnapshot',
+            name='sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(number_snapshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='harvestsnapshot',
+            constraint=models.UniqueConstraint(fields=('original_result', 'sequence'), name='unique_snapshot_sequence'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_snapshot_deltas'),
+    ]
+
+    operations = [
+        # The inline columns keep their names; only the model fields are renamed.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(model_name='harvestresult', old_name='content', new_name='content_inline'),
+                migrations.RenameField(model_name='harvestresult', old_name='html', new_name='html_inline'),
+                migrations.AlterField(
+                    model_name='harvestresult',
+                    name='content_inline',
+                    field=models.TextField(blank=True, db_column='content'),
+                ),
+                migrations.AlterField(
+                    model_name='harvestresult',
+                    name='html_inline',
+                    field=models.TextField(blank=True, db_column='html'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='harvestresult',
+            name='content_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='harvestresult',
+            name='html_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_batch_jobs_enqueued(apps, schema_editor):
+    # Batch jobs created so far were published as they were created.
+    HarvestJob = apps.get_model('core', 'HarvestJob')
+    HarvestJob.objects.filter(batch__isnull=False).update(enqueued_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_harvestresult_blob_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestjob',
+            name='enqueued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_batch_jobs_enqueued, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='harvestjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('batch__isnull', False)), fields=('batch', 'url'), name='unique_batch_url'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_harvestjob_enqueued_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='robotscompliance',
+            name='crawl_delay',
+            field=models.FloatField(default=0),
+        ),
+    ]
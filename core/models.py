@@ -1,7 +1,37 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 import uuid
 
+from .utils.blob_store import get_blob_store
+
+
+class HarvestBatch(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    options = models.JSONField(default=dict)
+    priority = models.IntegerField(default=5)
+    # Denormalized from Redis counters by flush_batch_counters; never recounted from jobs.
+    total = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    running = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    bytes_harvested = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Batch {self.id} ({self.completed + self.failed}/{self.total})"
+
 
 class HarvestJob(models.Model):
     STATUS_CHOICES = [
@@ -38,13 +68,24 @@ class HarvestJob(models.Model):
     estimated_duration = models.DurationField(null=True, blank=True)
     is_recurring = models.BooleanField(default=False)
     cron_schedule = models.CharField(max_length=100, blank=True)  # '0 0 * * *'
+    next_run_at = models.DateTimeField(null=True, blank=True)  # next firing of a recurring job, jitter included
     parent_job = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
+    batch = models.ForeignKey(HarvestBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    enqueued_at = models.DateTimeField(null=True, blank=True)  # batch jobs: when the harvest was published
+    metrics = models.JSONField(default=dict, blank=True)  # {'fetch': {'path': 'http', 'elapsed_ms': 120.4}}
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['next_run_at'], condition=models.Q(is_recurring=True), name='harvestjob_next_run_idx'),
+        ]
+        constraints = [
+            # A retried create_batch_jobs chunk cannot create a URL's job twice.
+            models.UniqueConstraint(
+                fields=['batch', 'url'], condition=models.Q(batch__isnull=False), name='unique_batch_url',
+            ),
         ]
 
     def __str__(self):
@@ -52,9 +93,15 @@ class HarvestJob(models.Model):
 
 
 class HarvestResult(models.Model):
+    BLOB_FIELDS = ('content', 'html')
+
     job = models.OneToOneField(HarvestJob, on_delete=models.CASCADE, related_name='result')
-    content = models.TextField(blank=True)
-    html = models.TextField(blank=True)
+    # Read and write through .content and .html. Values of HARVEST_BLOB_MIN_SIZE bytes or more
+    # are moved to the blob store on save, leaving the inline column empty and the key set.
+    content_inline = models.TextField(blank=True, db_column='content')
+    html_inline = models.TextField(blank=True, db_column='html')
+    content_key = models.CharField(max_length=64, blank=True)  # sha256 of the offloaded text
+    html_key = models.CharField(max_length=64, blank=True)
     structured_data = models.JSONField(default=dict)
     assets = models.JSONField(default=list)
     total_assets = models.IntegerField(default=0)
@@ -67,6 +114,7 @@ class HarvestResult(models.Model):
     zip_file = models.FileField(upload_to='harvests/zips/', null=True, blank=True)
     json_export = models.FileField(upload_to='harvests/json/', null=True, blank=True)
     content_hash = models.CharField(max_length=64, db_index=True)
+    validators = models.JSONField(default=dict, blank=True)  # {'etag': '"abc"', 'last_modified': '...'}
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -75,6 +123,122 @@ class HarvestResult(models.Model):
     def __str__(self):
         return f"Result for {self.job.url}"
 
+    @property
+    def content(self):
+        return self._blob_text('content')
+
+    @content.setter
+    def content(self, value):
+        self._set_blob_text('content', value)
+
+    @property
+    def html(self):
+        return self._blob_text('html')
+
+    @html.setter
+    def html(self, value):
+        self._set_blob_text('html', value)
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None:
+            self.offload_blobs()
+        super().save(*args, **kwargs)
+
+    def offload_blobs(self, store=None, min_size=None):
+        # Moves large inline values to the blob store; returns the fields that need saving.
+        min_size = settings.HARVEST_BLOB_MIN_SIZE if min_size is None else min_size
+        changed = []
+        for name in self.BLOB_FIELDS:
+            text = getattr(self, f'{name}_inline')
+            if not text or len(text.encode('utf-8')) < min_size:
+                continue
+            key = (store or get_blob_store()).put(text)
+            setattr(self, f'{name}_inline', '')
+            setattr(self, f'{name}_key', key)
+            self._blob_cache[name] = (key, text)
+            changed.extend((f'{name}_inline', f'{name}_key'))
+        return changed
+
+    @property
+    def _blob_cache(self):
+        return self.__dict__.setdefault('_loaded_blobs', {})
+
+    def _blob_text(self, name):
+        key = getattr(self, f'{name}_key')
+        if not key:
+            return getattr(self, f'{name}_inline')
+        cached = self._blob_cache.get(name)
+        if cached is None or cached[0] != key:
+            cached = self._blob_cache[name] = (key, get_blob_store().get(key))
+        return cached[1]
+
+    def _set_blob_text(self, name, value):
+        setattr(self, f'{name}_inline', value or '')
+        setattr(self, f'{name}_key', '')
+        self._blob_cache.pop(name, None)
+
+
+class HarvestPage(models.Model):
+    STATUS_CHOICES = [
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+    ]
+
+    job = models.ForeignKey(HarvestJob, on_delete=models.CASCADE, related_name='pages')
+    url = models.URLField(max_length=2048)
+    depth = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='success')
+    content = models.TextField(blank=True)
+    html = models.TextField(blank=True)
+    structured_data = models.JSONField(default=dict)
+    metadata = models.JSONField(default=dict)
+    links = models.JSONField(default=dict)
+    assets = models.JSONField(default=list)
+    fetch = models.JSONField(default=dict)
+    content_hash = models.CharField(max_length=64, blank=True)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['depth', 'created_at']
+        indexes = [
+            models.Index(fields=['job', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"Page {self.url} of job {self.job_id}"
+
+
+class AssetBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    file_path = models.FileField(upload_to='harvests/assets/')
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)  # Asset rows pointing at this blob
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count']),
+        ]
+
+    def __str__(self):
+        return f"Blob {self.sha256[:12]} ({self.ref_count} refs)"
+
+
+class AssetURL(models.Model):
+    url_hash = models.CharField(max_length=64, unique=True)  # sha256 of the URL
+    url = models.URLField(max_length=2048)
+    blob = models.ForeignKey(AssetBlob, on_delete=models.CASCADE, related_name='urls')
+    is_immutable = models.BooleanField(default=False)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    cache_control = models.CharField(max_length=255, blank=True)
+    last_seen = models.DateTimeField(auto_now=True)  # last download or revalidation
+
+    def __str__(self):
+        return f"{self.url} -> {self.blob.sha256[:12]}"
+
 
 class Asset(models.Model):
     ASSET_TYPES = [
@@ -88,6 +252,7 @@ class Asset(models.Model):
 
     result = models.ForeignKey(HarvestResult, on_delete=models.CASCADE, related_name='asset_details')
     url = models.URLField()
+    blob = models.ForeignKey(AssetBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='assets')
     asset_type = models.CharField(max_length=20, choices=ASSET_TYPES)
     file_path = models.FileField(upload_to='harvests/assets/')
     file_size = models.BigIntegerField()
@@ -157,9 +322,16 @@ class HarvestSnapshot(models.Model):
     removed_elements = models.JSONField(default=list)
     modified_elements = models.JSONField(default=list)
     tech_changes = models.JSONField(default=dict)
+    sequence = models.PositiveIntegerField(default=0)  # version number within the result's history
+    chain_length = models.PositiveIntegerField(default=0)  # deltas since the last keyframe; 0 is a keyframe
+    html_data = models.BinaryField(null=True, blank=True)  # zlib keyframe, or delta against sequence - 1
+    html_size = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-snapshot_date']
+        constraints = [
+            models.UniqueConstraint(fields=['original_result', 'sequence'], name='unique_snapshot_sequence'),
+        ]
 
 
 class RobotsCompliance(models.Model):
@@ -167,7 +339,7 @@ class RobotsCompliance(models.Model):
     robots_txt = models.TextField()
     last_checked = models.DateTimeField(auto_now=True)
     is_scrapable = models.BooleanField(default=True)
-    crawl_delay = models.IntegerField(default=0)
+    crawl_delay = models.FloatField(default=0)  # seconds; robots.txt allows fractions (Crawl-delay: 0.5)
     disallowed_paths = models.JSONField(default=list)
 
     def __str__(self):
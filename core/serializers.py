@@ -4,11 +4,16 @@ from .models import (
     AIAnalysis,
     Asset,
     Component,
+    HarvestBatch,
     HarvestJob,
+    HarvestPage,
     HarvestResult,
     HarvestSnapshot,
     PerformanceMetrics,
 )
+from .utils.cron import parse_cron
+from .utils.readiness import get_readiness_strategy
+from .utils.scraper import EXTRACTION_ENGINES, FETCH_MODES
 
 
 class AssetSerializer(serializers.ModelSerializer):
@@ -106,9 +111,64 @@ class HarvestSnapshotSerializer(serializers.ModelSerializer):
             'removed_elements',
             'modified_elements',
             'tech_changes',
+            'sequence',
+            'chain_length',
+            'html_size',
         ]
 
 
+class HarvestPageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HarvestPage
+        fields = [
+            'id',
+            'url',
+            'depth',
+            'status',
+            'content',
+            'structured_data',
+            'metadata',
+            'links',
+            'assets',
+            'fetch',
+            'content_hash',
+            'error_message',
+            'created_at',
+        ]
+
+
+class HarvestBatchSerializer(serializers.ModelSerializer):
+    done = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HarvestBatch
+        fields = [
+            'id',
+            'created_at',
+            'updated_at',
+            'finished_at',
+            'options',
+            'priority',
+            'total',
+            'pending',
+            'running',
+            'completed',
+            'failed',
+            'cancelled',
+            'bytes_harvested',
+            'done',
+            'progress',
+        ]
+        read_only_fields = fields
+
+    def get_done(self, obj):
+        return obj.completed + obj.failed + obj.cancelled
+
+    def get_progress(self, obj):
+        return round(self.get_done(obj) / obj.total * 100, 1) if obj.total else 0
+
+
 class HarvestJobSerializer(serializers.ModelSerializer):
     result = serializers.SerializerMethodField()
 
@@ -134,7 +194,10 @@ class HarvestJobSerializer(serializers.ModelSerializer):
             'estimated_duration',
             'is_recurring',
             'cron_schedule',
+            'next_run_at',
             'parent_job',
+            'batch',
+            'metrics',
             'result',
         ]
         read_only_fields = [
@@ -147,6 +210,9 @@ class HarvestJobSerializer(serializers.ModelSerializer):
             'completed_at',
             'retry_count',
             'error_message',
+            'next_run_at',
+            'batch',
+            'metrics',
             'result',
         ]
 
@@ -156,6 +222,25 @@ class HarvestJobSerializer(serializers.ModelSerializer):
         return None
 
 
+def validate_harvest_options(options):
+    # WebScraper rejects these when the job runs, where the error would be retried as if it were
+    # transient; a job is not created with them.
+    if not isinstance(options, dict):
+        raise serializers.ValidationError('options must be a JSON object.')
+    errors = {}
+    try:
+        get_readiness_strategy(options.get('wait'))
+    except (TypeError, ValueError) as e:
+        errors['wait'] = str(e)
+    if 'engine' in options and options['engine'] not in EXTRACTION_ENGINES:
+        errors['engine'] = f"Unknown extraction engine '{options['engine']}'"
+    if 'fetch' in options and options['fetch'] not in FETCH_MODES:
+        errors['fetch'] = f"Unknown fetch mode '{options['fetch']}'"
+    if errors:
+        raise serializers.ValidationError(errors)
+    return options
+
+
 class HarvestJobCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = HarvestJob
@@ -171,6 +256,17 @@ class HarvestJobCreateSerializer(serializers.ModelSerializer):
             'cron_schedule',
         ]
 
+    def validate_options(self, value):
+        return validate_harvest_options(value)
+
+    def validate_cron_schedule(self, value):
+        if value:
+            try:
+                parse_cron(value)
+            except ValueError as e:
+                raise serializers.ValidationError(f'Invalid cron expression: {e}')
+        return value
+
 
 class HarvestResultSummarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -232,3 +328,9 @@ class HarvestResultSerializer(serializers.ModelSerializer):
             'components',
             'snapshots',
         ]
+
+
+class HarvestResultListSerializer(HarvestResultSerializer):
+    # Lists leave out the page HTML and text, which may live in the blob store.
+    class Meta(HarvestResultSerializer.Meta):
+        fields = [field for field in HarvestResultSerializer.Meta.fields if field not in HarvestResult.BLOB_FIELDS]
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django_redis import get_redis_connection
+
+from .models import Asset, AssetBlob, HarvestJob
+from .utils.batch_progress import BatchCounters
+
+
+@receiver(post_delete, sender=Asset)
+def release_asset_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        AssetBlob.objects.filter(pk=instance.blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+@receiver(post_init, sender=HarvestJob)
+def remember_job_status(sender, instance, **kwargs):
+    # Read through __dict__ so jobs loaded with only()/defer() do not query for the status.
+    instance._saved_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=HarvestJob)
+def count_batch_transition(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    previous = None if created else instance._saved_status
+    status = instance.__dict__.get('status')
+    instance._saved_status = status
+    if not instance.__dict__.get('batch_id') or status == previous:
+        return
+    bytes_harvested = 0
+    if status == 'completed':
+        bytes_harvested = instance.metrics.get('pipeline', {}).get('bytes_harvested', 0)
+    counters = BatchCounters(get_redis_connection('default'), instance.batch_id)
+    transaction.on_commit(lambda: counters.transition(previous, status, bytes_harvested))
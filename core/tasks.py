@@ -1,109 +1,824 @@
 import asyncio
 import hashlib
 import logging
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlparse
 
-from celery import shared_task
+from asgiref.sync import sync_to_async
+from celery import chain, chord, shared_task
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
 from django.utils import timezone
+from django_redis import get_redis_connection
 
 from .models import (
     AIAnalysis,
     Asset,
+    AssetBlob,
+    AssetURL,
+    HarvestBatch,
     HarvestJob,
+    HarvestPage,
     HarvestResult,
+    HarvestSnapshot,
     PerformanceMetrics,
 )
 from .utils.ai_analyzer import AIAnalyzer
-from .utils.asset_downloader import AssetDownloader
+from .utils.asset_downloader import ASSET_JOB_BYTE_BUDGET, ASSET_MAX_BYTES, AssetDownloader
+from .utils.batch_progress import BatchCounters, mark_dirty, pop_dirty_batches
+from .utils.browser_pool import get_browser_pool, shutdown_browser_pool
+from .utils.change_detector import PageFingerprint, compare_fingerprints
+from .utils.checkpoint import HarvestCheckpoint
+from .utils.crawler import CrawlCheckpoint, Crawler
+from .utils.cron import next_fire_time, parse_cron, schedule_jitter
+from .utils.event_loop import run_sync
+from .utils.http_client import close_http_session
 from .utils.performance_analyzer import PerformanceAnalyzer
+from .utils.politeness import PolitenessScheduler
+from .utils.revalidation import is_fresh
+from .utils.robots_parser import RobotsParser
 from .utils.scraper import WebScraper
+from .utils.snapshot_delta import compress_keyframe, make_delta, reconstruct
 from .utils.tech_detector import TechnologyDetector
+from .utils.url_batch import StagedURLs
+from .utils.zip_export import iter_result_zip
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT when a result's assets are stored or cloned.
+ASSET_BULK_BATCH_SIZE = 500
+# Earlier results with the same content hash checked for matching options before giving up.
+DEDUP_CANDIDATES = 5
+# Pipeline work a duplicate page does not repeat.
+DEDUP_SKIPPED_STAGES = ('process', 'download', 'store', 'performance', 'ai_analysis')
+
+
+@worker_process_shutdown.connect
+def _close_worker_resources(**kwargs):
+    shutdown_browser_pool()
+    try:
+        run_sync(close_http_session(), timeout=10)
+    except Exception as e:
+        logger.warning(f"Failed to close HTTP session: {e}")
+
+
+HARVEST_PRIORITY_STEPS = {1: 0, 5: 5, 10: 9}
+MAX_PRIORITY_STEP = 9
+
+
+def harvest_priority(job, backlog=0):
+    # Broker priority step for a job: 0 is served first. Each HARVEST_FAIR_SHARE jobs the
+    # user already has queued sink this one a step, behind other users' jobs of equal priority.
+    step = HARVEST_PRIORITY_STEPS.get(job.priority, HARVEST_PRIORITY_STEPS[5])
+    return min(MAX_PRIORITY_STEP, step + backlog // max(settings.HARVEST_FAIR_SHARE, 1))
+
+
+def enqueue_harvest(job, backlog=None, producer=None):
+    now = timezone.now()
+    if job.scheduled_at and job.scheduled_at > now + timedelta(seconds=settings.HARVEST_ETA_HORIZON):
+        # Too far ahead for a broker ETA; enqueue_scheduled_harvests picks it up later.
+        if job.status != 'scheduled':
+            job.status = 'scheduled'
+            job.save(update_fields=['status'])
+        return None
+
+    if backlog is None:
+        backlog = _queued_backlog(job)
+    options = {'priority': harvest_priority(job, backlog)}
+    if job.scheduled_at and job.scheduled_at > now:
+        options['eta'] = job.scheduled_at
+    if producer is not None:
+        options['producer'] = producer
+    return harvest_website.apply_async(args=[str(job.id)], **options)
+
+
+def _queued_backlog(job):
+    if not job.user_id:
+        return 0
+    return HarvestJob.objects.filter(user_id=job.user_id, status='pending').exclude(pk=job.pk).count()
+
+
+def staged_batch_urls(batch_id):
+    return StagedURLs(get_redis_connection('default'), f'goharvest:batch:{batch_id}:urls')
+
+
+def batch_counters(batch_id):
+    return BatchCounters(get_redis_connection('default'), batch_id)
+
+
+@shared_task(bind=True, max_retries=3)
+def create_batch_jobs(self, batch_id):
+    # Turns the URLs staged by the batch endpoint into jobs chunk by chunk. A chunk's jobs are
+    # committed before the staged list is trimmed, and (batch, url) is unique, so a retried chunk
+    # creates nothing twice. Publishing then picks the batch's jobs not yet enqueued.
+    try:
+        batch = HarvestBatch.objects.get(id=batch_id)
+        staged = staged_batch_urls(batch_id)
+        counters = batch_counters(batch_id)
+        chunk_size = settings.HARVEST_BATCH_CHUNK_SIZE
+        backlog = HarvestJob.objects.filter(user_id=batch.user_id, status='pending').exclude(batch=batch).count()
+        # One producer (and broker connection) publishes the whole batch.
+        with harvest_website.app.producer_or_acquire() as producer:
+            while True:
+                urls = staged.peek(chunk_size)
+                if not urls:
+                    break
+                _create_batch_chunk(batch, urls, counters)
+                staged.discard(len(urls))
+                _publish_batch_jobs(batch, producer, backlog, chunk_size)
+            _publish_batch_jobs(batch, producer, backlog, chunk_size)
+        staged.clear()
+        return {'batch_id': str(batch_id), 'created': batch.jobs.count()}
+    except HarvestBatch.DoesNotExist:
+        logger.error(f"Batch {batch_id} not found")
+        return {'batch_id': str(batch_id), 'created': 0}
+    except Exception as e:
+        logger.error(f"Batch {batch_id} failed: {str(e)}")
+        raise self.retry(exc=e, countdown=30)
+
+
+def _create_batch_chunk(batch, urls, counters):
+    with transaction.atomic():
+        existing = set(batch.jobs.filter(url__in=urls).values_list('url', flat=True))
+        jobs = [
+            HarvestJob(
+                url=url,
+                user_id=batch.user_id,
+                options=dict(batch.options),
+                priority=batch.priority,
+                batch=batch,
+            )
+            for url in urls
+            if url not in existing
+        ]
+        HarvestJob.objects.bulk_create(jobs, ignore_conflicts=True)
+        # bulk_create sends no post_save, so the new jobs are counted here.
+        transaction.on_commit(lambda: counters.add({'pending': len(jobs)}))
+
+
+def _publish_batch_jobs(batch, producer, backlog, chunk_size):
+    # Each job is marked right after its message is sent, so a retry never republishes a chunk;
+    # at most the one message in flight is sent twice and harvest_website drops the second.
+    published = batch.jobs.exclude(enqueued_at=None).count()
+    while True:
+        jobs = list(batch.jobs.filter(enqueued_at=None, status='pending').order_by('id')[:chunk_size])
+        if not jobs:
+            return
+        for job in jobs:
+            enqueue_harvest(job, backlog=backlog + published, producer=producer)
+            HarvestJob.objects.filter(pk=job.pk).update(enqueued_at=timezone.now())
+            published += 1
+
+
+@shared_task
+def flush_batch_counters():
+    redis_client = get_redis_connection('default')
+    batch_ids = pop_dirty_batches(redis_client)
+    flushed = 0
+    for batch_id in batch_ids:
+        counters = BatchCounters(redis_client, batch_id).load()
+        if counters is None:
+            continue
+        try:
+            now = timezone.now()
+            HarvestBatch.objects.filter(id=batch_id).update(updated_at=now, **counters)
+            done = counters['completed'] + counters['failed'] + counters['cancelled']
+            if not counters['pending'] and not counters['running']:
+                HarvestBatch.objects.filter(id=batch_id, finished_at=None, total__lte=done).update(finished_at=now)
+            flushed += 1
+        except Exception as e:
+            logger.warning(f"Failed to flush batch counters for {batch_id}: {e}")
+            mark_dirty(redis_client, [batch_id])
+    return {'flushed': flushed}
+
+
+@shared_task
+def enqueue_scheduled_harvests():
+    horizon = timezone.now() + timedelta(seconds=settings.HARVEST_ETA_HORIZON)
+    due = HarvestJob.objects.filter(status='scheduled', scheduled_at__lte=horizon).order_by('scheduled_at')
+    enqueued = 0
+    for job in due.iterator():
+        # The conditional update keeps overlapping beat runs from enqueueing a job twice.
+        if HarvestJob.objects.filter(pk=job.pk, status='scheduled').update(status='pending'):
+            job.status = 'pending'
+            enqueue_harvest(job)
+            enqueued += 1
+    return {'enqueued': enqueued}
+
 
 @shared_task(bind=True, max_retries=3)
-def harvest_website(self, job_id):
+def harvest_website(self, job_id, politeness_reserved=False):
     try:
         job = HarvestJob.objects.get(id=job_id)
+        if job.status == 'cancelled':
+            return {'job_id': str(job_id), 'status': 'cancelled'}
+        if job.status in ('running', 'completed'):
+            # A message published twice (e.g. by a retried create_batch_jobs) runs once.
+            return {'job_id': str(job_id), 'status': 'duplicate'}
+        priority = harvest_priority(job)
+        if not politeness_reserved:
+            # Defer instead of sleeping so the worker slot goes to other domains meanwhile.
+            wait = _reserve_fetch_slot(job.url)
+            if wait > 0:
+                job.metrics['politeness'] = {'deferred_seconds': round(wait, 3)}
+                job.save(update_fields=['metrics'])
+                harvest_website.apply_async(
+                    args=[job_id],
+                    kwargs={'politeness_reserved': True},
+                    countdown=wait,
+                    priority=priority,
+                )
+                return {'job_id': str(job_id), 'status': 'deferred', 'countdown': wait}
+
         job.status = 'running'
         job.started_at = timezone.now()
         job.save(update_fields=['status', 'started_at'])
+        harvest_pipeline(str(job.id), priority).apply_async()
+        return {'job_id': str(job_id), 'status': 'running'}
 
-        scraper = WebScraper(url=job.url, options=job.options)
-        scraped_data = asyncio.run(scraper.scrape())
+    except HarvestJob.DoesNotExist:
+        logger.error(f"Harvest task failed: job {job_id} not found")
+        return {'status': 'failed', 'detail': 'job not found'}
+    except Exception as e:
+        _retry_stage(self, job_id, e, kwargs={'politeness_reserved': False})
 
-        tech_detector = TechnologyDetector(job.url, scraped_data.get('html', ''))
-        technologies = tech_detector.detect()
 
-        asset_downloader = AssetDownloader(job.url, scraped_data.get('assets', []))
-        downloaded_assets = asyncio.run(asset_downloader.download())
+def harvest_pipeline(job_id, priority=HARVEST_PRIORITY_STEPS[5]):
+    # Stages run on the queues in CELERY_TASK_ROUTES (browser, cpu, io) and pass only the
+    # job id and a few flags; page data travels through the job's HarvestCheckpoint.
+    return chain(
+        fetch_page.si(job_id).set(priority=priority),
+        dedup_page.s().set(priority=priority),
+        process_page.s().set(priority=priority),
+        download_assets.s().set(priority=priority),
+        store_result.s().set(priority=priority),
+        chord(
+            [
+                analyze_performance.s().set(priority=priority),
+                perform_ai_analysis.s().set(priority=priority),
+                create_zip_export.s().set(priority=priority),
+            ],
+            finish_pipeline.si(job_id).set(priority=priority),
+        ),
+    )
+
+
+@shared_task(bind=True, max_retries=3)
+def fetch_page(self, job_id):
+    try:
+        if _finished(job_id)[0]:
+            return {'job_id': job_id, 'done': True}
+        with _stage(job_id, 'fetch') as (job, checkpoint):
+            if checkpoint.load_stage('page') is not None:
+                return {'job_id': job_id}
 
-        html = scraped_data.get('html', '')
-        content_hash = hashlib.sha256(html.encode()).hexdigest()
+            previous = None
+            if int(job.options.get('depth', 1)) > 1:
+                page = _crawl_site(job)
+            else:
+                previous = _previous_result(job)
+                scraper = WebScraper(
+                    url=job.url,
+                    options=job.options,
+                    browser_pool=get_browser_pool(),
+                    validators=previous.validators if previous else None,
+                )
+                page = run_sync(scraper.fetch())
+            job.metrics['fetch'] = page.get('fetch', {})
+            job.metrics['revalidation'] = {
+                'page': {
+                    'conditional': bool(previous and previous.validators),
+                    'not_modified': bool(page.get('not_modified')),
+                },
+            }
 
-        frameworks = technologies.get('frameworks', [])
-        css_frameworks = technologies.get('css_frameworks', [])
+            if page.get('not_modified'):
+                # The page answered 304: reuse the previous result instead of extracting it again.
+                # One transaction, so the checkpoint is only cleared once the clone is committed.
+                with transaction.atomic():
+                    _clone_result(previous, job, validators=page['fetch'].get('validators', {}))
+                    _complete_job(job, checkpoint)
+                    _record_reuse(job, skipped=True)
+                return {'job_id': job_id, 'done': True}
 
+            checkpoint.save_stage('page', page)
+            return {'job_id': job_id}
+    except Exception as e:
+        _retry_stage(self, job_id, e)
+
+
+@shared_task(bind=True, max_retries=3)
+def dedup_page(self, state):
+    job_id = state['job_id']
+    if state.get('done'):
+        return state
+    try:
+        if _finished(job_id)[0]:
+            return {'job_id': job_id, 'done': True}
+        with _stage(job_id, 'dedup') as (job, checkpoint):
+            if checkpoint.load_stage('fingerprint') is not None:
+                return state
+            page = _require_stage(checkpoint, 'page')
+            content_hash = PageFingerprint.from_html(page.get('html', '')).content_hash
+            with transaction.atomic():
+                if _reuse_duplicate(job, page, content_hash) is not None:
+                    _complete_job(job, checkpoint)
+                    return {'job_id': job_id, 'done': True}
+            checkpoint.save_stage('fingerprint', {'content_hash': content_hash})
+            return state
+    except Exception as e:
+        _retry_stage(self, job_id, e)
+
+
+@shared_task(bind=True, max_retries=3)
+def process_page(self, state):
+    job_id = state['job_id']
+    if state.get('done'):
+        return state
+    try:
+        if _finished(job_id)[0]:
+            return {'job_id': job_id, 'done': True}
+        with _stage(job_id, 'process') as (job, checkpoint):
+            if checkpoint.load_stage('processed') is not None:
+                return state
+            page = _require_stage(checkpoint, 'page')
+            html = page.get('html', '')
+            fingerprint = checkpoint.load_stage('fingerprint') or {}
+            # Crawled start pages arrive already extracted.
+            extracted = page if 'content' in page else WebScraper(job.url, job.options).extract(html)
+            checkpoint.save_stage('processed', {
+                'content': extracted.get('content', ''),
+                'structured': extracted.get('structured', {}),
+                'metadata': extracted.get('metadata', {}),
+                'links': extracted.get('links', {}),
+                'assets': extracted.get('assets', []),
+                'technologies': TechnologyDetector(job.url, html).detect(),
+                'content_hash': fingerprint.get('content_hash') or PageFingerprint.from_html(html).content_hash,
+            })
+            return state
+    except Exception as e:
+        _retry_stage(self, job_id, e)
+
+
+@shared_task(bind=True, max_retries=3)
+def download_assets(self, state):
+    job_id = state['job_id']
+    if state.get('done'):
+        return state
+    try:
+        if _finished(job_id)[0]:
+            return {'job_id': job_id, 'done': True}
+        with _stage(job_id, 'download') as (job, checkpoint):
+            if checkpoint.load_stage('downloaded') is not None:
+                return state
+            assets = _require_stage(checkpoint, 'processed')['assets']
+            known, validators = _stored_assets(assets)
+            asset_downloader = AssetDownloader(
+                job.url,
+                assets,
+                known=known,
+                validators=validators,
+                checkpoint=checkpoint,
+                max_asset_bytes=int(job.options.get('max_asset_bytes', ASSET_MAX_BYTES)),
+                byte_budget=int(job.options.get('asset_byte_budget', ASSET_JOB_BYTE_BUDGET)),
+            )
+            downloaded_assets = run_sync(asset_downloader.download())
+            asset_stats = asset_downloader.stats()
+            job.metrics['assets'] = asset_stats
+            job.metrics.setdefault('revalidation', {})['assets'] = _asset_revalidation(asset_stats, len(assets))
+            checkpoint.save_stage('downloaded', downloaded_assets)
+            return state
+    except Exception as e:
+        _retry_stage(self, job_id, e)
+
+
+@shared_task(bind=True, max_retries=3)
+def store_result(self, state):
+    job_id = state['job_id']
+    if state.get('done'):
+        return None
+    try:
+        finished, result_id = _finished(job_id)
+        if finished:
+            return result_id
+        with _stage(job_id, 'store') as (job, checkpoint):
+            page = _require_stage(checkpoint, 'page')
+            processed = _require_stage(checkpoint, 'processed')
+            downloaded_assets = _require_stage(checkpoint, 'downloaded')
+            result = _persist_result(job, checkpoint, page, processed, downloaded_assets)
+            return result.id
+    except Exception as e:
+        _retry_stage(self, job_id, e)
+
+
+def _persist_result(job, checkpoint, page, processed, downloaded_assets):
+    # Result, assets and the job's completion commit together; a failure leaves no partial result.
+    technologies = processed['technologies']
+    frameworks = technologies.get('frameworks', [])
+    css_frameworks = technologies.get('css_frameworks', [])
+
+    with transaction.atomic():
         result = HarvestResult.objects.create(
             job=job,
-            content=scraped_data.get('content', ''),
-            html=html,
-            structured_data=scraped_data.get('structured', {}),
+            content=processed['content'],
+            html=page.get('html', ''),
+            structured_data=processed['structured'],
             assets=downloaded_assets,
             technologies=technologies,
             frontend_framework=frameworks[0] if frameworks else '',
             css_framework=css_frameworks[0] if css_frameworks else '',
-            metadata=scraped_data.get('metadata', {}),
-            links=scraped_data.get('links', {}),
-            content_hash=content_hash,
+            metadata=processed['metadata'],
+            links=processed['links'],
+            content_hash=processed['content_hash'],
+            validators=page.get('fetch', {}).get('validators', {}),
             total_assets=len(downloaded_assets),
             total_size=sum(asset.get('size', 0) for asset in downloaded_assets),
         )
 
-        for asset_data in downloaded_assets:
-            if asset_data.get('status') != 'success':
-                continue
-            file_name = asset_data.get('file_path', '')
-            if file_name.startswith('media/'):
-                file_name = file_name.split('media/', 1)[1]
-            Asset.objects.create(
-                result=result,
-                url=asset_data['url'],
-                asset_type=asset_data['type'],
-                file_size=asset_data.get('size', 0),
-                file_path=file_name,
-                is_critical=asset_data.get('is_critical', False),
-            )
+        _store_assets(result, downloaded_assets)
+        pipeline_metrics = job.metrics.setdefault('pipeline', {})
+        pipeline_metrics['bytes_harvested'] = len(result.html.encode('utf-8')) + result.total_size
+        _complete_job(job, checkpoint)
+    return result
 
-        analyze_performance.delay(result.id)
-        perform_ai_analysis.delay(result.id)
-        create_zip_export.delay(result.id)
 
-        job.status = 'completed'
-        job.completed_at = timezone.now()
-        job.save(update_fields=['status', 'completed_at'])
+@shared_task
+def finish_pipeline(job_id):
+    job = HarvestJob.objects.filter(id=job_id).first()
+    if job is not None:
+        job.metrics.setdefault('pipeline', {})['analyses_completed_at'] = timezone.now().isoformat()
+        job.save(update_fields=['metrics'])
 
-        return {'job_id': str(job_id), 'status': 'completed'}
 
-    except HarvestJob.DoesNotExist:
-        logger.error(f"Harvest task failed: job {job_id} not found")
-        return {'status': 'failed', 'detail': 'job not found'}
-    except Exception as e:
-        logger.error(f"Harvest task failed for job {job_id}: {e}")
-        job = HarvestJob.objects.filter(id=job_id).first()
-        if job:
-            job.status = 'failed'
-            job.error_message = str(e)
-            job.save(update_fields=['status', 'error_message'])
-            if job.retry_count < job.max_retries:
-                job.retry_count += 1
-                job.save(update_fields=['retry_count'])
-                raise self.retry(exc=e, countdown=60 * (2 ** job.retry_count))
-        raise
+@contextmanager
+def _stage(job_id, name):
+    job = HarvestJob.objects.get(id=job_id)
+    if job.status != 'running':
+        # A stage retried after a failure marks the job running again.
+        job.status = 'running'
+        job.save(update_fields=['status'])
+    checkpoint = HarvestCheckpoint(get_redis_connection('default'), f'goharvest:harvest:{job.id}')
+    started = time.perf_counter()
+    yield job, checkpoint
+    job.metrics.setdefault('pipeline', {})[f'{name}_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    job.save(update_fields=['metrics'])
+
+
+def _require_stage(checkpoint, stage):
+    data = checkpoint.load_stage(stage)
+    if data is None:
+        raise RuntimeError(f"Harvest checkpoint has no '{stage}' stage output")
+    return data
+
+
+def _complete_job(job, checkpoint):
+    job.status = 'completed'
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'completed_at', 'metrics'])
+    # A rolled-back store must be able to retry from the checkpoint.
+    transaction.on_commit(checkpoint.clear)
+
+
+def _finished(job_id):
+    # A stage retried after its result was committed finds the checkpoint cleared; it returns
+    # the stored result instead of failing the completed job. Returns (finished, result_id).
+    result_id = HarvestResult.objects.filter(job_id=job_id).values_list('id', flat=True).first()
+    return result_id is not None or HarvestJob.objects.filter(id=job_id, status='completed').exists(), result_id
+
+
+def _retry_stage(task, job_id, exc, **retry_kwargs):
+    logger.error(f"Harvest task failed for job {job_id}: {exc}")
+    job = HarvestJob.objects.filter(id=job_id).first()
+    if job and _finished(job_id)[0]:
+        # Failed after the result was stored (e.g. saving stage metrics): keep the job completed.
+        raise task.retry(exc=exc, countdown=60, **retry_kwargs)
+    if job:
+        job.status = 'failed'
+        job.error_message = str(exc)
+        job.save(update_fields=['status', 'error_message'])
+        if job.retry_count < job.max_retries:
+            job.retry_count += 1
+            job.save(update_fields=['retry_count'])
+            raise task.retry(exc=exc, countdown=60 * (2 ** job.retry_count), **retry_kwargs)
+    raise exc
+
+
+def _crawl_site(job):
+    async def save_page(page):
+        await sync_to_async(_save_page)(job, page)
+
+    scheduler = PolitenessScheduler(get_redis_connection('default'), burst=settings.HARVEST_POLITENESS_BURST)
+    crawl_delay = _crawl_delay(job.url)
+
+    async def throttle(host):
+        loop = asyncio.get_running_loop()
+        wait = await loop.run_in_executor(None, scheduler.reserve, host, crawl_delay)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    checkpoint = CrawlCheckpoint(get_redis_connection('default'), f'goharvest:crawl:{job.id}')
+    crawler = Crawler(
+        job.url,
+        job.options,
+        browser_pool=get_browser_pool(),
+        on_page=save_page,
+        checkpoint=checkpoint,
+        throttle=throttle,
+    )
+    run_sync(crawler.crawl())
+    job.metrics['crawl'] = crawler.stats()
+
+    start_page = job.pages.filter(depth=0).first()
+    if start_page is None or start_page.status != 'success':
+        error = start_page.error_message if start_page else 'start page was not crawled'
+        raise ValueError(f'Failed to harvest start page: {error}')
+    return {
+        'html': start_page.html,
+        'content': start_page.content,
+        'structured': start_page.structured_data,
+        'metadata': start_page.metadata,
+        'links': start_page.links,
+        'assets': start_page.assets,
+        'fetch': start_page.fetch,
+    }
+
+
+def _crawl_delay(url):
+    # Loading through RobotsParser populates RobotsCompliance for hosts seen the first time.
+    delay = RobotsParser().get_crawl_delay(url)
+    if delay:
+        return delay
+    return settings.HARVEST_DEFAULT_CRAWL_DELAY
+
+
+def _reserve_fetch_slot(url):
+    scheduler = PolitenessScheduler(get_redis_connection('default'), burst=settings.HARVEST_POLITENESS_BURST)
+    return scheduler.reserve(urlparse(url).netloc, _crawl_delay(url))
+
+
+def _previous_result(job):
+    # Recurring runs are children of one parent job; the latest sibling result is the stored copy.
+    if not job.parent_job_id:
+        return None
+    return (
+        HarvestResult.objects
+        .filter(Q(job_id=job.parent_job_id) | Q(job__parent_job_id=job.parent_job_id), job__url=job.url)
+        .exclude(job=job)
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def _reuse_duplicate(job, page, content_hash):
+    # An earlier result of the same URL whose normalized content matches is cloned with its
+    # assets, metrics and analyses, and the rest of the pipeline is skipped.
+    previous = None
+    if job.options.get('dedup', True) and int(job.options.get('depth', 1)) <= 1:
+        previous = _duplicate_result(job, content_hash)
+    job.metrics['dedup'] = {
+        'content_hash': content_hash,
+        'duplicate_of': previous.id if previous else None,
+        'skipped': previous is not None,
+        'skipped_stages': list(DEDUP_SKIPPED_STAGES) if previous else [],
+    }
+    _record_reuse(job, skipped=previous is not None)
+    if previous is None:
+        return None
+    return _clone_result(
+        previous,
+        job,
+        html=page.get('html', ''),
+        validators=page.get('fetch', {}).get('validators', {}),
+    )
+
+
+def _duplicate_result(job, content_hash):
+    # Same URL, owner and options only: other options may have produced different assets.
+    candidates = (
+        HarvestResult.objects
+        .filter(content_hash=content_hash, job__url=job.url, job__user_id=job.user_id)
+        .exclude(job=job)
+        .select_related('job')
+        .order_by('-created_at')[:DEDUP_CANDIDATES]
+    )
+    return next((result for result in candidates if result.job.options == job.options), None)
+
+
+def _record_reuse(job, skipped):
+    # Recurring runs roll up into their parent job, so it shows how often re-harvests were skipped.
+    # Each run is counted once: a stage retried after counting finds the marker on its job.
+    if not job.parent_job_id:
+        return
+    with transaction.atomic():
+        own_metrics = HarvestJob.objects.select_for_update().values_list('metrics', flat=True).get(id=job.id)
+        if own_metrics.get('reuse_counted'):
+            return
+        job.metrics['reuse_counted'] = own_metrics['reuse_counted'] = True
+        HarvestJob.objects.filter(id=job.id).update(metrics=own_metrics)
+        metrics = HarvestJob.objects.select_for_update().values_list('metrics', flat=True).get(id=job.parent_job_id)
+        reuse = metrics.setdefault('reuse', {'runs': 0, 'skipped': 0})
+        reuse['runs'] += 1
+        reuse['skipped'] += int(skipped)
+        reuse['skip_rate'] = round(reuse['skipped'] / reuse['runs'], 4)
+        # A queryset update, so the parent's status signals do not fire.
+        HarvestJob.objects.filter(id=job.parent_job_id).update(metrics=metrics)
+
+
+def _clone_result(previous, job, **changes):
+    result = HarvestResult.objects.get(pk=previous.pk)
+    result.pk = None
+    result.job = job
+    # The exports belong to the previous job and hold its HTML; the clone gets its own archive.
+    result.zip_file = None
+    result.json_export = None
+    for field, value in changes.items():
+        setattr(result, field, value)
+    result.save()
+    transaction.on_commit(
+        lambda: create_zip_export.apply_async((result.id,), priority=harvest_priority(job))
+    )
+
+    assets = list(previous.asset_details.all())
+    for asset in assets:
+        asset.pk = None
+        asset.result = result
+    Asset.objects.bulk_create(assets, batch_size=ASSET_BULK_BATCH_SIZE)
+    _add_blob_references(Counter(asset.blob_id for asset in assets if asset.blob_id))
+
+    for related in (PerformanceMetrics, AIAnalysis):
+        derived = related.objects.filter(result=previous).first()
+        if derived is not None:
+            derived.pk = None
+            derived.result = result
+            derived.save()
+    return result
+
+
+def _stored_assets(assets):
+    # Stored copies are either reused without a request (immutable or still fresh)
+    # or revalidated with a conditional GET.
+    url_hashes = {_url_hash(asset['url']) for asset in assets}
+    known = {}
+    validators = {}
+    entries = AssetURL.objects.filter(url_hash__in=url_hashes).select_related('blob')
+    for entry in entries:
+        blob = entry.blob
+        if not blob.file_path.storage.exists(blob.file_path.name):
+            continue
+        stored = {
+            'file_path': f'media/{blob.file_path.name}',
+            'size': blob.size,
+            'sha256': blob.sha256,
+            'content_type': blob.content_type,
+            'immutable': entry.is_immutable,
+            'etag': entry.etag,
+            'last_modified': entry.last_modified,
+            'cache_control': entry.cache_control,
+        }
+        if entry.is_immutable or is_fresh(entry.cache_control, entry.last_seen):
+            known[entry.url] = stored
+        elif entry.etag or entry.last_modified:
+            validators[entry.url] = stored
+    return known, validators
+
+
+def _asset_revalidation(stats, total):
+    hits = stats['reused'] + stats['not_modified']
+    return {
+        'reused_without_request': stats['reused'],
+        'conditional_requests': stats['conditional_requests'],
+        'not_modified': stats['not_modified'],
+        'bytes_saved': stats['bytes_saved'],
+        'hit_rate': round(hits / total, 3) if total else None,
+    }
+
+
+def _store_assets(result, downloaded_assets):
+    # A fixed number of statements however many assets the page has: blobs, URL entries and
+    # Asset rows are each written with one bulk statement (split only by ASSET_BULK_BATCH_SIZE).
+    stored = []
+    for asset_data in downloaded_assets:
+        if asset_data.get('status') != 'success':
+            continue
+        file_name = asset_data.get('file_path', '')
+        if file_name.startswith('media/'):
+            file_name = file_name.split('media/', 1)[1]
+        stored.append((asset_data, file_name))
+    if not stored:
+        return
+
+    new_blobs = {}
+    for asset_data, file_name in stored:
+        new_blobs.setdefault(asset_data['sha256'], AssetBlob(
+            sha256=asset_data['sha256'],
+            file_path=file_name,
+            size=asset_data.get('size', 0),
+            content_type=asset_data.get('content_type') or '',
+        ))
+    # Locked until the references are counted, so purge_unreferenced_asset_blobs skips them; a
+    # blob it deleted in between is created again.
+    blobs = {}
+    while len(blobs) < len(new_blobs):
+        AssetBlob.objects.bulk_create(
+            [blob for sha256, blob in new_blobs.items() if sha256 not in blobs],
+            batch_size=ASSET_BULK_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        blobs.update(AssetBlob.objects.select_for_update().in_bulk(new_blobs.keys(), field_name='sha256'))
+    for sha256, file_name in {asset_data['sha256']: file_name for asset_data, file_name in stored}.items():
+        blob = blobs[sha256]
+        storage = blob.file_path.storage
+        if blob.file_path.name != file_name and not storage.exists(blob.file_path.name) and storage.exists(file_name):
+            # The blob's file was purged; this download committed the same bytes again.
+            blob.file_path = file_name
+            blob.save(update_fields=['file_path'])
+
+    # Saving refreshes last_seen, which Cache-Control freshness is measured from.
+    url_entries = {}
+    for asset_data, _ in stored:
+        if asset_data.get('reused'):
+            continue
+        url_hash = _url_hash(asset_data['url'])
+        url_entries[url_hash] = AssetURL(
+            url_hash=url_hash,
+            url=asset_data['url'],
+            blob=blobs[asset_data['sha256']],
+            is_immutable=asset_data.get('immutable', False),
+            etag=asset_data.get('etag', '')[:255],
+            last_modified=asset_data.get('last_modified', '')[:64],
+            cache_control=asset_data.get('cache_control', '')[:255],
+        )
+    if url_entries:
+        AssetURL.objects.bulk_create(
+            url_entries.values(),
+            batch_size=ASSET_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['url_hash'],
+            update_fields=['url', 'blob', 'is_immutable', 'etag', 'last_modified', 'cache_control', 'last_seen'],
+        )
+
+    assets = [
+        Asset(
+            result=result,
+            url=asset_data['url'],
+            blob=blobs[asset_data['sha256']],
+            asset_type=asset_data['type'],
+            file_size=asset_data.get('size', 0),
+            file_path=file_name,
+            is_critical=asset_data.get('is_critical', False),
+        )
+        for asset_data, file_name in stored
+    ]
+    Asset.objects.bulk_create(assets, batch_size=ASSET_BULK_BATCH_SIZE)
+    _add_blob_references(Counter(asset.blob_id for asset in assets))
+
+
+def _add_blob_references(references):
+    if not references:
+        return
+    AssetBlob.objects.filter(pk__in=references).update(ref_count=F('ref_count') + Case(
+        *(When(pk=blob_id, then=Value(count)) for blob_id, count in references.items()),
+        default=Value(0),
+    ))
+
+
+def _url_hash(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _save_page(job, page):
+    # Pages crawled again after resuming from a checkpoint replace their earlier row.
+    HarvestPage.objects.update_or_create(
+        job=job,
+        url=page['url'],
+        defaults={
+            'depth': page['depth'],
+            'status': page['status'],
+            'content': page.get('content', ''),
+            'html': page.get('html', ''),
+            'structured_data': page.get('structured', {}),
+            'metadata': page.get('metadata', {}),
+            'links': page.get('links', {}),
+            'assets': page.get('assets', []),
+            'fetch': page.get('fetch', {}),
+            'content_hash': hashlib.sha256(page['html'].encode()).hexdigest() if page.get('html') else '',
+            'error_message': page.get('error', ''),
+        },
+    )
 
 
 @shared_task
 def analyze_performance(result_id):
+    if result_id is None:
+        # The pipeline reused an earlier result and stored nothing new.
+        return None
     result = HarvestResult.objects.get(id=result_id)
     analyzer = PerformanceAnalyzer(result.job.url, result.html)
     metrics = analyzer.run_lighthouse()
@@ -131,6 +846,8 @@ def analyze_performance(result_id):
 
 @shared_task
 def perform_ai_analysis(result_id):
+    if result_id is None:
+        return None
     result = HarvestResult.objects.get(id=result_id)
     analyzer = AIAnalyzer(result)
     analysis = analyzer.analyze()
@@ -153,47 +870,227 @@ def perform_ai_analysis(result_id):
 
 @shared_task
 def create_zip_export(result_id):
-    result = HarvestResult.objects.get(id=result_id)
-    _ = result
-    return None
+    if result_id is None:
+        return None
+    result = HarvestResult.objects.select_related('job').get(id=result_id)
+    # Spooled to a temporary file chunk by chunk, then handed to the storage.
+    with tempfile.TemporaryFile() as handle:
+        for chunk in iter_result_zip(result):
+            handle.write(chunk)
+        handle.seek(0)
+        result.zip_file.save(f'{result.job_id}.zip', File(handle), save=False)
+    result.save(update_fields=['zip_file'])
+    return result.zip_file.name
+
+
+def next_recurring_run(job, after=None):
+    # The jitter is fixed per job, so shifting the search back by it and adding it again
+    # gives the next jittered firing after `after` without storing the nominal time.
+    jitter = timedelta(seconds=schedule_jitter(str(job.id), settings.HARVEST_SCHEDULE_JITTER))
+    return next_fire_time(parse_cron(job.cron_schedule), (after or timezone.now()) - jitter) + jitter
+
+
+def set_recurring_schedule(job, cron_schedule):
+    job.is_recurring = True
+    job.cron_schedule = cron_schedule
+    job.next_run_at = next_recurring_run(job)
+    job.save(update_fields=['is_recurring', 'cron_schedule', 'next_run_at'])
+    return job.next_run_at
 
 
 @shared_task
 def schedule_recurring_harvest(job_id, cron_schedule):
-    _ = job_id
-    _ = cron_schedule
-    return None
+    job = HarvestJob.objects.filter(id=job_id).first()
+    if job is None:
+        return None
+    return set_recurring_schedule(job, cron_schedule).isoformat()
 
 
 @shared_task
-def check_for_changes(result_id):
-    from diff_match_patch import diff_match_patch
-    from .models import HarvestSnapshot
+def run_recurring_harvests():
+    # Several beat or worker instances may run this tick; only the lock holder fires jobs.
+    lock = get_redis_connection('default').lock('goharvest:lock:recurring-harvests', timeout=300)
+    try:
+        if not lock.acquire(blocking=False):
+            return {'spawned': 0, 'skipped': 'locked'}
+    except Exception as e:
+        logger.warning(f"Failed to acquire recurring harvest lock: {e}")
+        return {'spawned': 0, 'skipped': 'lock unavailable'}
+    try:
+        return {'spawned': _spawn_due_recurring_harvests()}
+    finally:
+        try:
+            lock.release()
+        except Exception as e:
+            logger.warning(f"Failed to release recurring harvest lock: {e}")
 
-    result = HarvestResult.objects.get(id=result_id)
-    scraper = WebScraper(result.job.url, result.job.options)
-    new_data = asyncio.run(scraper.scrape())
 
-    new_hash = hashlib.sha256(new_data['html'].encode()).hexdigest()
-    changes_detected = new_hash != result.content_hash
+def _spawn_due_recurring_harvests():
+    now = timezone.now()
+    due = (
+        HarvestJob.objects
+        .filter(is_recurring=True, next_run_at__lte=now)
+        .order_by('next_run_at')[:settings.HARVEST_SCHEDULER_BATCH]
+    )
+    spawned = 0
+    for template in due:
+        try:
+            next_run = next_recurring_run(template, now)
+        except ValueError as e:
+            logger.warning(f"Disabling schedule of job {template.id}: {e}")
+            HarvestJob.objects.filter(pk=template.pk).update(next_run_at=None)
+            continue
+        with transaction.atomic():
+            # Compare-and-set on next_run_at keeps a tick that outlived its lock from firing twice.
+            claimed = HarvestJob.objects.filter(pk=template.pk, next_run_at=template.next_run_at).update(
+                next_run_at=next_run,
+            )
+            if not claimed:
+                continue
+            child = HarvestJob.objects.create(
+                url=template.url,
+                user_id=template.user_id,
+                options=template.options,
+                priority=template.priority,
+                tags=template.tags,
+                notes=template.notes,
+                max_retries=template.max_retries,
+                parent_job=template,
+            )
+            transaction.on_commit(lambda child=child: enqueue_harvest(child))
+        spawned += 1
+    return spawned
+
+
+def record_snapshot(result, html=None, **fields):
+    # Stores the page as a delta against the previous version, or as a full keyframe every
+    # HARVEST_SNAPSHOT_KEYFRAME_INTERVAL versions so reconstruction never replays a long chain.
+    # html=None records an unchanged page (a 304 revalidation).
+    with transaction.atomic():
+        # Serializes concurrent checks of one result, which would otherwise race for a sequence.
+        HarvestResult.objects.select_for_update().only('id').get(id=result.id)
+        last = (
+            HarvestSnapshot.objects.filter(original_result=result)
+            .order_by('-sequence')
+            .only('id', 'sequence', 'chain_length', 'html_data')
+            .first()
+        )
+        sequence = last.sequence + 1 if last else 1
+        base = snapshot_html(last) if last else None
+        if html is None:
+            html = result.html if base is None else base
+
+        keyframe = compress_keyframe(html)
+        data, chain_length = keyframe, 0
+        if base is not None and last.chain_length + 1 < settings.HARVEST_SNAPSHOT_KEYFRAME_INTERVAL:
+            delta = make_delta(base, html)
+            # A rewrite can make the delta larger than the page itself; start a new chain instead.
+            if delta is not None and len(delta) * 2 < len(keyframe):
+                data, chain_length = delta, last.chain_length + 1
 
-    snapshot = HarvestSnapshot.objects.create(
-        original_result=result,
-        content_hash=new_hash,
+        return HarvestSnapshot.objects.create(
+            original_result=result,
+            sequence=sequence,
+            chain_length=chain_length,
+            html_data=data,
+            html_size=len(html.encode('utf-8')),
+            **fields,
+        )
+
+
+def snapshot_html(snapshot):
+    # Rebuilds a version from its keyframe and the deltas after it, in one query.
+    if snapshot.html_data is None:
+        return None
+    first = snapshot.sequence - snapshot.chain_length
+    chain = [
+        bytes(data)
+        for data in HarvestSnapshot.objects.filter(
+            original_result_id=snapshot.original_result_id,
+            sequence__gte=first,
+            sequence__lte=snapshot.sequence,
+        )
+        .order_by('sequence')
+        .values_list('html_data', flat=True)
+    ]
+    return reconstruct(chain[0], chain[1:])
+
+
+@shared_task
+def check_for_changes(result_id):
+    result = HarvestResult.objects.select_related('job').get(id=result_id)
+    scraper = WebScraper(
+        result.job.url,
+        result.job.options,
+        browser_pool=get_browser_pool(),
+        validators=result.validators,
+    )
+    # Only the HTML is needed; extraction would be wasted work on every cycle.
+    page = run_sync(scraper.fetch())
+    if page.get('not_modified'):
+        record_snapshot(
+            result,
+            content_hash=result.content_hash,
+            changes_detected=False,
+            diff_summary={'not_modified': True},
+        )
+        return False
+
+    # Compared on normalized blocks, so nonces, tokens and clocks in the HTML are not changes.
+    report = compare_fingerprints(PageFingerprint.from_html(result.html), PageFingerprint.from_html(page['html']))
+    changes_detected = report['changed']
+    record_snapshot(
+        result,
+        page['html'],
+        content_hash=report['content_hash'],
         changes_detected=changes_detected,
+        diff_summary={
+            key: report[key]
+            for key in ('similarity', 'block_similarity', 'blocks', 'counts', 'exact')
+        },
+        added_elements=report['added_elements'],
+        removed_elements=report['removed_elements'],
+        modified_elements=report['modified_elements'],
     )
 
-    if changes_detected:
-        dmp = diff_match_patch()
-        diffs = dmp.diff_main(result.html, new_data['html'])
-        snapshot.diff_details = str(diffs)
-        snapshot.save(update_fields=['diff_details'])
-        if result.job.user_id:
-            notify_user_of_changes.delay(result.job.user_id, result_id)
+    if changes_detected and result.job.user_id:
+        notify_user_of_changes.delay(result.job.user_id, result_id)
 
     return changes_detected
 
 
+@shared_task
+def browser_pool_stats():
+    return get_browser_pool().stats()
+
+
+@shared_task
+def purge_unreferenced_asset_blobs(grace_seconds=3600):
+    # The grace period covers blobs created by a harvest that has not stored its Asset rows yet,
+    # and files a download has just committed to, so they are never removed from under it.
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    candidates = AssetBlob.objects.filter(ref_count=0, created_at__lt=cutoff, assets__isnull=True)
+    purged = 0
+    for blob_id in candidates.values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            # A harvest storing assets holds its blobs locked: skip them, and re-check the
+            # references of the rest under the lock.
+            blob = AssetBlob.objects.select_for_update(skip_locked=True).filter(pk=blob_id, ref_count=0).first()
+            if blob is None or blob.assets.exists() or _written_since(blob.file_path, cutoff):
+                continue
+            blob.delete()
+            transaction.on_commit(lambda file_path=blob.file_path: file_path.delete(save=False))
+        purged += 1
+    return {'purged': purged}
+
+
+def _written_since(file_path, cutoff):
+    try:
+        return file_path.storage.get_modified_time(file_path.name) >= cutoff
+    except (OSError, NotImplementedError):
+        return False
+
+
 @shared_task
 def notify_user_of_changes(user_id, result_id):
     _ = user_id
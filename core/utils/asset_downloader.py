@@ -1,60 +1,343 @@
 import asyncio
+import hashlib
 import logging
+import os
+import random
+import uuid
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
 
 import aiohttp
 
+from .asset_store import ContentAddressedStore, is_immutable_url
+from .http_client import get_http_session
+from .revalidation import conditional_headers, response_validators
+
 logger = logging.getLogger(__name__)
 
+ASSET_DOWNLOAD_CONCURRENCY = int(os.getenv('ASSET_DOWNLOAD_CONCURRENCY', '16'))
+ASSET_DOWNLOAD_TIMEOUT = float(os.getenv('ASSET_DOWNLOAD_TIMEOUT', '60'))
+ASSET_CONNECT_TIMEOUT = float(os.getenv('ASSET_CONNECT_TIMEOUT', '10'))
+ASSET_READ_TIMEOUT = float(os.getenv('ASSET_READ_TIMEOUT', '30'))
+ASSET_MAX_BYTES = int(os.getenv('ASSET_MAX_BYTES', str(50 * 1024 * 1024)))
+ASSET_JOB_BYTE_BUDGET = int(os.getenv('ASSET_JOB_BYTE_BUDGET', str(500 * 1024 * 1024)))
+ASSET_MAX_RETRIES = int(os.getenv('ASSET_MAX_RETRIES', '3'))
+ASSET_RETRY_BACKOFF = float(os.getenv('ASSET_RETRY_BACKOFF', '0.5'))
+ASSET_RETRY_MAX_DELAY = float(os.getenv('ASSET_RETRY_MAX_DELAY', '10'))
+RETRY_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+CHUNK_SIZE = 64 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class AssetTooLarge(Exception):
+    pass
+
+
+class RetryableDownloadError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+RETRYABLE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, RetryableDownloadError)
+
+
+class _PartialDownload:
+    # Bytes received so far for one asset; kept across retries so a Range request can resume.
+    def __init__(self, temp_path: Path):
+        self.temp_path = temp_path
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.if_range = None
+        self.resumable = False
+        self.started = False
+
+    def reset(self) -> int:
+        # Returns the bytes thrown away, which the job's byte budget gives back.
+        discarded, self.size = self.size, 0
+        self.digest = hashlib.sha256()
+        return discarded
+
+
+class _FileWriter:
+    # Buffers chunks and hands each write to the executor so disk I/O never blocks the loop.
+    def __init__(self, path: Path, mode: str = 'wb'):
+        self.path = path
+        self.mode = mode
+        self._handle = None
+        self._buffer = bytearray()
+        self._loop = asyncio.get_running_loop()
+
+    async def open(self):
+        self._handle = await self._loop.run_in_executor(None, open, self.path, self.mode)
+
+    async def write(self, chunk: bytes):
+        self._buffer += chunk
+        if len(self._buffer) >= WRITE_BUFFER_SIZE:
+            await self._flush()
+
+    async def close(self):
+        if self._handle is None:
+            return
+        try:
+            await self._flush()
+        finally:
+            await self._loop.run_in_executor(None, self._handle.close)
+            self._handle = None
+
+    async def _flush(self):
+        if self._buffer:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            await self._loop.run_in_executor(None, self._handle.write, data)
+
 
 class AssetDownloader:
-    def __init__(self, base_url: str, assets: List[Dict]):
+    def __init__(
+        self,
+        base_url: str,
+        assets: List[Dict],
+        session: Optional[aiohttp.ClientSession] = None,
+        concurrency: int = ASSET_DOWNLOAD_CONCURRENCY,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        max_asset_bytes: int = ASSET_MAX_BYTES,
+        byte_budget: int = ASSET_JOB_BYTE_BUDGET,
+        store: Optional[ContentAddressedStore] = None,
+        known: Optional[Dict[str, Dict]] = None,
+        validators: Optional[Dict[str, Dict]] = None,
+        max_retries: int = ASSET_MAX_RETRIES,
+        checkpoint=None,
+    ):
         self.base_url = base_url
         self.assets = assets
-        self.download_dir = Path('media/harvests/assets')
+        self.session = session
+        self.concurrency = max(int(concurrency), 1)
+        self.timeout = timeout or aiohttp.ClientTimeout(
+            total=ASSET_DOWNLOAD_TIMEOUT,
+            sock_connect=ASSET_CONNECT_TIMEOUT,
+            sock_read=ASSET_READ_TIMEOUT,
+        )
+        self.max_asset_bytes = max_asset_bytes
+        self.byte_budget = byte_budget
+        self.bytes_downloaded = 0
+        self.store = store or ContentAddressedStore()
+        # url -> {'sha256', 'file_path', 'size', ...} for stored copies that are reused without a
+        # request (known: immutable or still fresh) or after a conditional GET (validators).
+        self.known = known or {}
+        self.validators = validators or {}
+        self.reused = 0
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+        self.max_retries = max(int(max_retries), 0)
+        self.retries = 0
+        self.resumed = 0
+        # Records each finished asset so a retried task only downloads what is still missing.
+        self.checkpoint = checkpoint
+        self.completed: Dict[str, Dict] = {}
+        self.from_checkpoint = 0
+        self.download_dir = self.store.root
         self.download_dir.mkdir(parents=True, exist_ok=True)
 
     async def download(self) -> List[Dict]:
-        tasks = [self._download_asset(asset) for asset in self.assets]
+        # The worker's pooled session keeps connections alive across assets and jobs;
+        # its connector caps sockets per host, the semaphore caps the run as a whole.
+        session = self.session or await get_http_session()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        if self.checkpoint is not None:
+            self.completed = await asyncio.get_running_loop().run_in_executor(None, self._load_checkpoint)
+        tasks = [self._download_limited(session, semaphore, asset) for asset in self.assets]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         return [r for r in results if isinstance(r, dict)]
 
-    async def _download_asset(self, asset: Dict) -> Dict:
+    def stats(self) -> Dict:
+        return {
+            'bytes_downloaded': self.bytes_downloaded,
+            'reused': self.reused,
+            'conditional_requests': self.conditional_requests,
+            'not_modified': self.not_modified,
+            'bytes_saved': self.bytes_saved,
+            'retries': self.retries,
+            'resumed': self.resumed,
+            'from_checkpoint': self.from_checkpoint,
+        }
+
+    async def _download_limited(self, session, semaphore: asyncio.Semaphore, asset: Dict) -> Dict:
+        async with semaphore:
+            return await self._download_asset(session, asset)
+
+    async def _download_asset(self, session: aiohttp.ClientSession, asset: Dict) -> Dict:
         url = asset['url']
-        asset_type = asset['type']
 
+        completed = self.completed.get(url)
+        if completed:
+            self.from_checkpoint += 1
+            return completed
+
+        stored = self.known.get(url)
+        if stored:
+            self.reused += 1
+            self.bytes_saved += stored.get('size', 0)
+            return {**asset, **stored, 'status': 'success', 'reused': True}
+
+        stored = self.validators.get(url)
+        if stored:
+            self.conditional_requests += 1
+
+        if self.bytes_downloaded >= self.byte_budget:
+            return {**asset, 'status': 'skipped', 'error': 'Job asset byte budget exhausted'}
+
+        partial = _PartialDownload(self.download_dir / f'.{uuid.uuid4().hex}.part')
+        attempt = 0
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        filename = self._generate_filename(url, asset_type)
-                        filepath = self.download_dir / filename
-                        filepath.parent.mkdir(parents=True, exist_ok=True)
-                        with open(filepath, 'wb') as handle:
-                            handle.write(content)
-                        return {
-                            **asset,
-                            'file_path': str(filepath),
-                            'size': len(content),
-                            'status': 'success',
-                        }
+            while True:
+                try:
+                    result = await self._attempt(session, asset, stored, partial)
+                    break
+                except RETRYABLE_ERRORS as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    delay = self._backoff(attempt, getattr(e, 'retry_after', None))
+                    logger.info(f"Retrying {url} in {delay:.2f}s (attempt {attempt}/{self.max_retries}): {e}")
+                    await asyncio.sleep(delay)
+        except AssetTooLarge as e:
+            return {
+                **asset,
+                'status': 'skipped',
+                'error': str(e),
+            }
         except Exception as e:
             logger.error(f"Failed to download {url}: {e}")
             return {
                 **asset,
                 'status': 'failed',
-                'error': str(e),
+                'error': str(e) or type(e).__name__,
+                'attempts': attempt + 1,
+            }
+        finally:
+            # Committed downloads were renamed away; this only removes abandoned partial bytes.
+            await asyncio.get_running_loop().run_in_executor(None, self._remove, partial.temp_path)
+
+        if result['status'] == 'success' and self.checkpoint is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.checkpoint.save_asset, result)
+        return result
+
+    async def _attempt(self, session: aiohttp.ClientSession, asset: Dict, stored: Optional[Dict],
+                       partial: _PartialDownload) -> Dict:
+        url = asset['url']
+        # Conditional headers only make sense before any bytes of a new version arrived.
+        headers = {} if partial.started else conditional_headers(stored)
+        if partial.size and partial.resumable:
+            headers['Range'] = f'bytes={partial.size}-'
+            if partial.if_range:
+                headers['If-Range'] = partial.if_range
+
+        async with session.get(url, headers=headers, timeout=self.timeout) as response:
+            if response.status == 304 and stored and not partial.started:
+                self.not_modified += 1
+                self.bytes_saved += stored.get('size', 0)
+                return {
+                    **asset,
+                    **stored,
+                    **response_validators(response.headers),
+                    'status': 'success',
+                    'revalidated': True,
+                }
+            if response.status in RETRY_STATUSES:
+                raise RetryableDownloadError(f'HTTP {response.status}', self._retry_after(response))
+            if response.status == 206 and partial.size and self._resumes_at(response, partial.size):
+                self.resumed += 1
+            elif response.status == 200:
+                self.bytes_downloaded -= partial.reset()
+            elif response.status == 206:
+                # Not the range we asked for; start over with a plain request.
+                self.bytes_downloaded -= partial.reset()
+                partial.resumable = False
+                raise RetryableDownloadError('Unexpected Content-Range on resume')
+            else:
+                return {
+                    **asset,
+                    'status': 'failed',
+                    'error': f'HTTP {response.status}',
+                }
+
+            if response.content_length and partial.size + response.content_length > self.max_asset_bytes:
+                raise AssetTooLarge(f'Asset exceeds {self.max_asset_bytes} bytes')
+            partial.started = True
+            partial.resumable = response.status == 206 or response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            etag = response.headers.get('ETag', '')
+            # If-Range needs a strong validator, otherwise the date is the best we have.
+            partial.if_range = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+
+            filepath = await self._stream_to_store(response, self._extension(url, asset['type']), partial)
+            cache_control = response.headers.get('Cache-Control', '').lower()
+            return {
+                **asset,
+                'file_path': str(filepath),
+                'size': partial.size,
+                'sha256': partial.digest.hexdigest(),
+                'content_type': response.content_type,
+                'immutable': 'immutable' in cache_control or is_immutable_url(url),
+                **response_validators(response.headers),
+                'status': 'success',
             }
 
-    def _generate_filename(self, url: str, asset_type: str) -> str:
-        from urllib.parse import urlparse
-        import hashlib
+    async def _stream_to_store(self, response: aiohttp.ClientResponse, extension: str,
+                               partial: _PartialDownload) -> Path:
+        # Stream into a temp file, then rename it to its content hash so a partial
+        # file is never visible in the store and identical bytes are kept once.
+        writer = _FileWriter(partial.temp_path, 'ab' if partial.size else 'wb')
+        try:
+            await writer.open()
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                if partial.size + len(chunk) > self.max_asset_bytes:
+                    raise AssetTooLarge(f'Asset exceeds {self.max_asset_bytes} bytes')
+                if self.bytes_downloaded + len(chunk) > self.byte_budget:
+                    raise AssetTooLarge('Job asset byte budget exhausted')
+                await writer.write(chunk)
+                # Only count bytes once they are in the writer, so a resume starts after them
+                # and a rejected chunk is not charged to the budget.
+                partial.digest.update(chunk)
+                partial.size += len(chunk)
+                self.bytes_downloaded += len(chunk)
+        finally:
+            await writer.close()
+        return await self.store.commit(partial.temp_path, partial.digest.hexdigest(), extension)
+
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        return {
+            url: asset
+            for url, asset in self.checkpoint.load_assets().items()
+            if os.path.exists(asset.get('file_path', ''))
+        }
+
+    @staticmethod
+    def _resumes_at(response: aiohttp.ClientResponse, offset: int) -> bool:
+        content_range = response.headers.get('Content-Range', '')
+        return content_range.startswith(f'bytes {offset}-')
+
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+        value = response.headers.get('Retry-After', '')
+        return float(value) if value.isdigit() else None
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter keeps retries from many workers from hitting a CDN in lockstep.
+        delay = random.uniform(0, min(ASSET_RETRY_MAX_DELAY, ASSET_RETRY_BACKOFF * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, ASSET_RETRY_MAX_DELAY))
+        return delay
+
+    @staticmethod
+    def _remove(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
 
-        parsed = urlparse(url)
-        path = parsed.path
-        hash_obj = hashlib.md5(url.encode())
-        hash_str = hash_obj.hexdigest()[:8]
-        ext = Path(path).suffix or f'.{asset_type}'
-        return f"{asset_type}_{hash_str}{ext}"
+    @staticmethod
+    def _extension(url: str, asset_type: str) -> str:
+        return Path(urlparse(url).path).suffix or f'.{asset_type}'
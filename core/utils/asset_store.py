@@ -0,0 +1,49 @@
+import asyncio
+import os
+import re
+from pathlib import Path
+from urllib.parse import parse_qsl, urlparse
+
+# Fingerprinted build output (app.3f9a2c1b.js, main-5KX2QW7R.css) and versioned CDN paths
+# (/npm/react@18.2.0/, /ajax/libs/jquery/3.7.1/, /v2.4.1/) never change content under one URL.
+# A hash token is lower-case hex with a letter or upper-case base32 with a letter and a digit;
+# dates, counters and sizes (IMG_20230501.jpg, photo-1024x768.jpg) are mutable names that only
+# Cache-Control: immutable can vouch for.
+HASHED_FILENAME = re.compile(
+    r'[.\-_](?:(?=[0-9a-f]*[a-f])[0-9a-f]{8,}|(?=[A-Z2-7]*[2-7])(?=[A-Z2-7]*[A-Z])[A-Z2-7]{8,})\.[a-z0-9]+$'
+)
+VERSIONED_PATH = re.compile(r'(@|/v?)\d+\.\d+(\.\d+)?([\-+][0-9A-Za-z.\-]+)?(/|$)')
+VERSION_PARAMS = ('v', 'ver', 'version', 'hash')
+SAFE_EXTENSION = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def is_immutable_url(url: str) -> bool:
+    parsed = urlparse(url)
+    if HASHED_FILENAME.search(parsed.path) or VERSIONED_PATH.search(parsed.path):
+        return True
+    return any(key.lower() in VERSION_PARAMS and value for key, value in parse_qsl(parsed.query))
+
+
+class ContentAddressedStore:
+    def __init__(self, root='media/harvests/assets'):
+        self.root = Path(root)
+
+    def path_for(self, sha256: str, extension: str = '') -> Path:
+        extension = extension.lower()
+        if not SAFE_EXTENSION.match(extension):
+            extension = ''
+        return self.root / sha256[:2] / f'{sha256}{extension}'
+
+    async def commit(self, temp_path: Path, sha256: str, extension: str = '') -> Path:
+        target = self.path_for(sha256, extension)
+        return await asyncio.get_running_loop().run_in_executor(None, self._commit, temp_path, target)
+
+    @staticmethod
+    def _commit(temp_path: Path, target: Path) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Identical bytes keep the name they were first stored under, whatever extension this URL
+        # has. Renaming over it instead of discarding the download re-creates a file that a purge
+        # removed in the meantime and refreshes its mtime, which the purge's grace period checks.
+        target = next(target.parent.glob(f'{target.stem}*'), target)
+        os.replace(temp_path, target)
+        return target
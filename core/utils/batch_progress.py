@@ -0,0 +1,81 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('pending', 'running', 'completed', 'failed', 'cancelled', 'bytes_harvested')
+STATUS_COUNTERS = {
+    'pending': 'pending',
+    'scheduled': 'pending',
+    'running': 'running',
+    'completed': 'completed',
+    'failed': 'failed',
+    'cancelled': 'cancelled',
+}
+DIRTY_KEY = 'goharvest:batch:dirty'
+
+
+class BatchCounters:
+    # Live job counts of one batch in a Redis hash. Tasks move jobs between counters with
+    # HINCRBY and mark the batch dirty; flush_batch_counters copies dirty hashes to HarvestBatch.
+    def __init__(self, redis_client, batch_id, ttl: int = 7 * 24 * 3600):
+        self.redis = redis_client
+        self.batch_id = str(batch_id)
+        self.key = f'goharvest:batch:{self.batch_id}:counters'
+        self.ttl = ttl
+
+    def add(self, amounts: Dict[str, int]):
+        amounts = {field: amount for field, amount in amounts.items() if amount}
+        if not amounts:
+            return
+        try:
+            pipeline = self.redis.pipeline()
+            for field, amount in amounts.items():
+                pipeline.hincrby(self.key, field, amount)
+            pipeline.expire(self.key, self.ttl)
+            pipeline.sadd(DIRTY_KEY, self.batch_id)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Failed to update batch counters {self.key}: {e}")
+
+    def transition(self, old_status: Optional[str], new_status: str, bytes_harvested: int = 0):
+        old = STATUS_COUNTERS.get(old_status)
+        new = STATUS_COUNTERS.get(new_status)
+        amounts = {'bytes_harvested': bytes_harvested}
+        if old != new:
+            if old:
+                amounts[old] = -1
+            if new:
+                amounts[new] = 1
+        self.add(amounts)
+
+    def load(self) -> Optional[Dict[str, int]]:
+        try:
+            state = self.redis.hgetall(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to load batch counters {self.key}: {e}")
+            return None
+        if not state:
+            return None
+        counters = {field: 0 for field in COUNTER_FIELDS}
+        counters.update({field.decode('utf-8'): int(value) for field, value in state.items()})
+        return counters
+
+
+def pop_dirty_batches(redis_client, count: int = 500) -> List[str]:
+    # SPOP rather than SMEMBERS + DEL: a batch updated during a flush is marked dirty again.
+    try:
+        return [batch_id.decode('utf-8') for batch_id in redis_client.spop(DIRTY_KEY, count) or []]
+    except Exception as e:
+        logger.warning(f"Failed to read dirty batches: {e}")
+        return []
+
+
+def mark_dirty(redis_client, batch_ids: Iterable[str]):
+    batch_ids = list(batch_ids)
+    if not batch_ids:
+        return
+    try:
+        redis_client.sadd(DIRTY_KEY, *batch_ids)
+    except Exception as e:
+        logger.warning(f"Failed to mark batches dirty: {e}")
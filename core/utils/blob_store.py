@@ -0,0 +1,128 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import zstandard
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+COMPRESSION_LEVEL = 9
+BLOB_SUFFIX = '.zst'
+
+
+class LocalBlobBackend:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def exists(self, name: str) -> bool:
+        return (self.root / name).exists()
+
+    def read(self, name: str) -> bytes:
+        return (self.root / name).read_bytes()
+
+    def write(self, name: str, data: bytes):
+        # Written under a temporary name and renamed, so readers never see a partial blob.
+        target = self.root / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp_path, target)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+    def delete(self, name: str):
+        (self.root / name).unlink(missing_ok=True)
+
+
+class S3BlobBackend:
+    # Any S3-compatible service; endpoint_url points at MinIO, Ceph or LocalStack instead of AWS.
+    # Credentials come from the usual AWS_* environment variables.
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, prefix: str = ''):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or None)
+
+    def exists(self, name: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + name)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def read(self, name: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + name)['Body'].read()
+
+    def write(self, name: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + name, Body=data)
+
+    def delete(self, name: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + name)
+
+
+class BlobStore:
+    # zstd-compressed text keyed by the sha256 of its UTF-8 bytes, so identical pages are stored once.
+    def __init__(self, backend, level: int = COMPRESSION_LEVEL):
+        self.backend = backend
+        self.level = level
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def name_for(key: str) -> str:
+        return f'{key[:2]}/{key}{BLOB_SUFFIX}'
+
+    def put(self, text: str) -> str:
+        data = text.encode('utf-8')
+        key = self.key_for(data)
+        name = self.name_for(key)
+        if not self.backend.exists(name):
+            self.backend.write(name, zstandard.ZstdCompressor(level=self.level).compress(data))
+        return key
+
+    def get(self, key: str) -> str:
+        # Frames carry their content size, so decompression allocates the output once.
+        return zstandard.ZstdDecompressor().decompress(self.backend.read(self.name_for(key))).decode('utf-8')
+
+    def delete(self, key: str):
+        self.backend.delete(self.name_for(key))
+
+
+_store = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        if settings.HARVEST_BLOB_BACKEND == 's3':
+            backend = S3BlobBackend(
+                settings.HARVEST_BLOB_S3_BUCKET,
+                endpoint_url=settings.HARVEST_BLOB_S3_ENDPOINT_URL,
+                prefix=settings.HARVEST_BLOB_S3_PREFIX,
+            )
+        elif settings.HARVEST_BLOB_BACKEND == 'local':
+            backend = LocalBlobBackend(settings.HARVEST_BLOB_ROOT)
+        else:
+            raise ValueError(f'Unknown HARVEST_BLOB_BACKEND: {settings.HARVEST_BLOB_BACKEND}')
+        _store = BlobStore(backend)
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_blob_store(setting, **kwargs):
+    global _store
+    if setting.startswith('HARVEST_BLOB_'):
+        _store = None
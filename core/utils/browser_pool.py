@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from .event_loop import run_sync
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledBrowser:
+    def __init__(self, index: int):
+        self.index = index
+        self.browser = None
+        self.jobs = 0
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_jobs_per_browser: Optional[int] = None,
+        headless: bool = True,
+        launch_args: Optional[List[str]] = None,
+    ):
+        self.size = size or int(os.getenv('BROWSER_POOL_SIZE', '2'))
+        self.max_jobs_per_browser = max_jobs_per_browser or int(
+            os.getenv('BROWSER_POOL_MAX_JOBS_PER_BROWSER', '200')
+        )
+        self.headless = headless
+        self.launch_args = launch_args or ['--disable-dev-shm-usage']
+        self._playwright = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: List[_PooledBrowser] = []
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._in_use = 0
+        self._launches = 0
+        self._restarts = 0
+        self._jobs_served = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            self._idle = asyncio.Queue()
+            self._slots = [_PooledBrowser(index) for index in range(self.size)]
+            for slot in self._slots:
+                try:
+                    await self._launch(slot)
+                except Exception as e:
+                    logger.warning(f"Browser pool failed to warm slot {slot.index}: {e}")
+                self._idle.put_nowait(slot)
+            logger.info(f"Browser pool started with {self.size} browsers")
+
+    async def close(self):
+        if not self.started:
+            return
+        for slot in self._slots:
+            await self._close_browser(slot)
+        await self._playwright.stop()
+        self._playwright = None
+        self._idle = None
+        self._slots = []
+        self._in_use = 0
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        await self.start()
+        slot = await self._idle.get()
+        self._in_use += 1
+        try:
+            context = await self._new_context(slot, context_options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Failed to close browser context: {e}")
+                slot.jobs += 1
+                self._jobs_served += 1
+        finally:
+            self._in_use -= 1
+            if slot.jobs >= self.max_jobs_per_browser:
+                await self._close_browser(slot)
+            self._idle.put_nowait(slot)
+
+    def stats(self) -> Dict:
+        idle = self._idle.qsize() if self._idle is not None else 0
+        healthy = sum(1 for slot in self._slots if slot.is_healthy)
+        return {
+            'pid': os.getpid(),
+            'size': self.size,
+            'started': self.started,
+            'in_use': self._in_use,
+            'idle': idle,
+            'healthy': healthy,
+            'utilization': self._in_use / self.size if self.size else 0,
+            'launches': self._launches,
+            'restarts': self._restarts,
+            'jobs_served': self._jobs_served,
+        }
+
+    async def _new_context(self, slot: _PooledBrowser, context_options: Dict):
+        if not slot.is_healthy:
+            await self._restart(slot)
+        try:
+            return await slot.browser.new_context(**context_options)
+        except Exception as e:
+            logger.warning(f"Browser {slot.index} failed to open a context, restarting: {e}")
+            await self._restart(slot)
+            return await slot.browser.new_context(**context_options)
+
+    async def _launch(self, slot: _PooledBrowser):
+        slot.browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=self.launch_args,
+        )
+        slot.jobs = 0
+        self._launches += 1
+
+    async def _restart(self, slot: _PooledBrowser):
+        if slot.browser is not None:
+            self._restarts += 1
+        await self._close_browser(slot)
+        await self._launch(slot)
+
+    async def _close_browser(self, slot: _PooledBrowser):
+        if slot.browser is None:
+            return
+        try:
+            await slot.browser.close()
+        except Exception as e:
+            logger.debug(f"Failed to close browser {slot.index}: {e}")
+        slot.browser = None
+        slot.jobs = 0
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def _reset_after_fork():
+    global _pool
+    _pool = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+
+def shutdown_browser_pool(timeout: float = 30):
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    if pool.started:
+        try:
+            run_sync(pool.close(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Failed to shut down browser pool: {e}")
@@ -0,0 +1,213 @@
+import hashlib
+import re
+from difflib import SequenceMatcher
+from hashlib import blake2b
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import lxml.html
+from lxml import etree
+
+# Elements that start a block of their own; inline text belongs to the innermost one.
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'blockquote', 'body', 'caption', 'dd', 'details', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'legend', 'li', 'main', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'td', 'th', 'tr', 'ul',
+))
+# Never content, or boilerplate repeated across a site that would only add noise.
+SKIP_TAGS = frozenset((
+    'aside', 'canvas', 'footer', 'head', 'iframe', 'nav', 'noscript', 'script', 'style', 'svg',
+    'template',
+))
+# Text that changes on every request without the page changing: clock times, ISO dates,
+# relative ages and long random tokens (nonces, session and CSRF values).
+VOLATILE_TEXT = re.compile(
+    r'\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+    r'|\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?'
+    r'|\b\d+\s+(?:second|minute|hour|day|week)s?\s+ago\b'
+    r'|\b(?=[A-Za-z0-9_-]*\d)(?=[A-Za-z0-9_-]*[A-Za-z])[A-Za-z0-9_-]{24,}\b',
+    re.IGNORECASE,
+)
+WORDS = re.compile(r'\w+')
+WHITESPACE = re.compile(r'\s+')
+
+SHINGLE_SIZE = 3
+MAX_SIMHASH_TOKENS = 20000
+# Blocks left after trimming the common prefix and suffix; larger rewrites are compared as sets.
+MAX_DIFF_BLOCKS = 2000
+MAX_REPORTED_ELEMENTS = 50
+MAX_REPORTED_TEXT = 200
+
+
+class Block(NamedTuple):
+    path: str
+    text: str
+    digest: int
+
+
+class PageFingerprint:
+    def __init__(self, blocks: List[Block]):
+        self.blocks = blocks
+        self.content_hash = hashlib.sha256(
+            b''.join(block.digest.to_bytes(8, 'little') for block in blocks)
+        ).hexdigest()
+        self.simhash = _simhash(' '.join(block.text for block in blocks))
+
+    @classmethod
+    def from_html(cls, html: str) -> 'PageFingerprint':
+        return cls(normalize_blocks(html))
+
+
+def normalize_blocks(html: str) -> List[Block]:
+    if not html or not html.strip():
+        return []
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return []
+
+    blocks = []
+    title = root.findtext('.//title')
+    if title and title.strip():
+        blocks.append(_block('title', title))
+
+    path = []
+    buffers = []
+    skip_depth = 0
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+        if event == 'start':
+            if skip_depth or tag in SKIP_TAGS:
+                skip_depth += 1
+                continue
+            if tag in BLOCK_TAGS:
+                path.append(tag)
+                buffers.append([])
+            if tag == 'img':
+                blocks.append(_block('>'.join(path + ['img']), _image_signature(element)))
+            if buffers and element.text:
+                buffers[-1].append(element.text)
+            continue
+
+        if skip_depth:
+            skip_depth -= 1
+            if not skip_depth and buffers and element.tail:
+                buffers[-1].append(element.tail)
+            continue
+        if tag in BLOCK_TAGS:
+            text = ''.join(buffers.pop())
+            if text.strip():
+                blocks.append(_block('>'.join(path), text))
+            path.pop()
+            if buffers:
+                # A nested block ends a line of its parent's text.
+                buffers[-1].append(' ')
+        if buffers and element.tail:
+            buffers[-1].append(element.tail)
+    return blocks
+
+
+def compare_fingerprints(old: PageFingerprint, new: PageFingerprint) -> Dict:
+    old_digests = [block.digest for block in old.blocks]
+    new_digests = [block.digest for block in new.blocks]
+    added, removed, modified = [], [], []
+    exact = True
+
+    start = 0
+    while start < min(len(old_digests), len(new_digests)) and old_digests[start] == new_digests[start]:
+        start += 1
+    old_end, new_end = len(old_digests), len(new_digests)
+    while old_end > start and new_end > start and old_digests[old_end - 1] == new_digests[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    if old_end - start > MAX_DIFF_BLOCKS or new_end - start > MAX_DIFF_BLOCKS:
+        # Bounded fallback for wholesale rewrites: report set differences, not positions.
+        exact = False
+        old_set, new_set = set(old_digests[start:old_end]), set(new_digests[start:new_end])
+        removed = [block for block in old.blocks[start:old_end] if block.digest not in new_set]
+        added = [block for block in new.blocks[start:new_end] if block.digest not in old_set]
+    else:
+        matcher = SequenceMatcher(None, old_digests[start:old_end], new_digests[start:new_end], autojunk=False)
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            before = old.blocks[start + i1:start + i2]
+            after = new.blocks[start + j1:start + j2]
+            if op == 'delete':
+                removed.extend(before)
+            elif op == 'insert':
+                added.extend(after)
+            elif op == 'replace':
+                _pair_replacements(before, after, added, removed, modified)
+
+    old_set, new_set = set(old_digests), set(new_digests)
+    union = old_set | new_set
+    return {
+        'changed': old.content_hash != new.content_hash,
+        'content_hash': new.content_hash,
+        'similarity': round(1 - bin(old.simhash ^ new.simhash).count('1') / 64, 4),
+        'block_similarity': round(len(old_set & new_set) / len(union), 4) if union else 1.0,
+        'blocks': {'before': len(old.blocks), 'after': len(new.blocks)},
+        'counts': {'added': len(added), 'removed': len(removed), 'modified': len(modified)},
+        'exact': exact,
+        'added_elements': [_element(block) for block in added[:MAX_REPORTED_ELEMENTS]],
+        'removed_elements': [_element(block) for block in removed[:MAX_REPORTED_ELEMENTS]],
+        'modified_elements': [
+            {
+                'path': before.path,
+                'before': before.text[:MAX_REPORTED_TEXT],
+                'after': after.text[:MAX_REPORTED_TEXT],
+            }
+            for before, after in modified[:MAX_REPORTED_ELEMENTS]
+        ],
+    }
+
+
+def _pair_replacements(before, after, added, removed, modified):
+    # Replaced blocks at the same position and path are edits; the rest were added or removed.
+    for index in range(max(len(before), len(after))):
+        old_block: Optional[Block] = before[index] if index < len(before) else None
+        new_block: Optional[Block] = after[index] if index < len(after) else None
+        if old_block and new_block and old_block.path == new_block.path:
+            modified.append((old_block, new_block))
+            continue
+        if old_block:
+            removed.append(old_block)
+        if new_block:
+            added.append(new_block)
+
+
+def _block(path: str, text: str) -> Block:
+    text = WHITESPACE.sub(' ', VOLATILE_TEXT.sub('#', text)).strip()
+    digest = int.from_bytes(blake2b(f'{path}\0{text}'.encode('utf-8'), digest_size=8).digest(), 'little')
+    return Block(path, text, digest)
+
+
+def _image_signature(element) -> str:
+    # Query strings and fragments are mostly cache busters and signed-URL tokens.
+    src = element.get('src') or element.get('data-src') or ''
+    parts = urlsplit(src.strip())
+    return f"{urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))} {element.get('alt') or ''}"
+
+
+def _element(block: Block) -> Dict:
+    return {'path': block.path, 'text': block.text[:MAX_REPORTED_TEXT]}
+
+
+def _simhash(text: str) -> int:
+    tokens = WORDS.findall(text.lower())[:MAX_SIMHASH_TOKENS]
+    if len(tokens) >= SHINGLE_SIZE:
+        shingles = [' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = tokens
+    # Column-wise bit majority over the shingle hashes; zip/count keep the loop in C.
+    rows = [
+        format(int.from_bytes(blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little'), '064b')
+        for shingle in set(shingles)
+    ]
+    value = 0
+    for bit, column in enumerate(zip(*rows)):
+        if column.count('1') * 2 > len(rows):
+            value |= 1 << (63 - bit)
+    return value
@@ -0,0 +1,54 @@
+import json
+import logging
+import zlib
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HarvestCheckpoint:
+    # Output of each harvest stage and every finished asset, so stages hand data to each other
+    # through Redis instead of the broker and a retried stage skips work that already finished.
+    def __init__(self, redis_client, key: str, ttl: int = 24 * 3600):
+        self.redis = redis_client
+        self.key = key
+        self.assets_key = f'{key}:assets'
+        self.ttl = ttl
+
+    def load_stage(self, stage: str) -> Optional[Dict]:
+        try:
+            data = self.redis.hget(self.key, stage)
+        except Exception as e:
+            logger.warning(f"Failed to load harvest checkpoint {self.key}: {e}")
+            return None
+        return json.loads(zlib.decompress(data)) if data else None
+
+    def save_stage(self, stage: str, data):
+        # Unlike asset progress, the next stage depends on this, so failures propagate.
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self.key, stage, zlib.compress(json.dumps(data).encode('utf-8')))
+        pipeline.expire(self.key, self.ttl)
+        pipeline.execute()
+
+    def load_assets(self) -> Dict[str, Dict]:
+        try:
+            state = self.redis.hgetall(self.assets_key)
+        except Exception as e:
+            logger.warning(f"Failed to load harvest checkpoint {self.assets_key}: {e}")
+            return {}
+        return {field.decode('utf-8'): json.loads(value) for field, value in state.items()}
+
+    def save_asset(self, asset: Dict):
+        try:
+            pipeline = self.redis.pipeline()
+            pipeline.hset(self.assets_key, asset['url'], json.dumps(asset))
+            pipeline.expire(self.assets_key, self.ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Failed to save harvest checkpoint {self.assets_key}: {e}")
+
+    def clear(self):
+        try:
+            self.redis.delete(self.key, self.assets_key)
+        except Exception as e:
+            logger.warning(f"Failed to clear harvest checkpoint {self.key}: {e}")
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from playwright.async_api import async_playwright
+
+from .resource_policy import ResourcePolicy
+from .robots_parser import RobotsParser
+from .scraper import WebScraper
+from .url_seen import DEFAULT_ERROR_RATE, create_seen_set, load_seen_set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PER_HOST_CONCURRENCY = 2
+DEFAULT_CHECKPOINT_EVERY = 25
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+
+    host = parsed.hostname.lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS[scheme]:
+        host = f'{host}:{parsed.port}'
+    query = urlencode(sorted(
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((scheme, host, parsed.path or '/', parsed.params, query, ''))
+
+
+class CrawlCheckpoint:
+    def __init__(self, redis_client, key: str, ttl: int = 7 * 24 * 3600):
+        self.redis = redis_client
+        self.key = key
+        self.ttl = ttl
+
+    def load(self) -> Optional[Dict]:
+        try:
+            state = self.redis.hgetall(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to load crawl checkpoint {self.key}: {e}")
+            return None
+        if not state:
+            return None
+        return {
+            'seen': load_seen_set(state[b'seen']),
+            'frontier': json.loads(state[b'frontier']),
+            'completed': int(state[b'completed']),
+            'bytes': int(state[b'bytes']),
+            'host': state.get(b'host', b'').decode() or None,
+        }
+
+    def save(self, seen, frontier: List, completed: int, total_bytes: int, host: str = ''):
+        try:
+            pipeline = self.redis.pipeline()
+            pipeline.hset(self.key, mapping={
+                'seen': seen.to_bytes(),
+                'frontier': json.dumps(frontier),
+                'completed': completed,
+                'bytes': total_bytes,
+                'host': host,
+            })
+            pipeline.expire(self.key, self.ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Failed to save crawl checkpoint {self.key}: {e}")
+
+    def clear(self):
+        try:
+            self.redis.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Failed to clear crawl checkpoint {self.key}: {e}")
+
+
+class Crawler:
+    def __init__(
+        self,
+        start_url: str,
+        options: Dict,
+        browser_pool=None,
+        seen=None,
+        on_page=None,
+        checkpoint=None,
+        throttle=None,
+    ):
+        self.options = options or {}
+        self.start_url = normalize_url(start_url) or start_url
+        self.host = urlparse(self.start_url).netloc
+        self.max_depth = max(int(self.options.get('depth', 1)), 1)
+        self.max_pages = int(self.options.get('max_pages', DEFAULT_MAX_PAGES))
+        self.max_bytes = int(self.options.get('max_bytes', DEFAULT_MAX_BYTES))
+        self.concurrency = int(self.options.get('concurrency', DEFAULT_CONCURRENCY))
+        self.per_host_concurrency = int(self.options.get('per_host_concurrency', DEFAULT_PER_HOST_CONCURRENCY))
+        self.browser_pool = browser_pool
+        self.robots_parser = RobotsParser()
+        self.resource_policy = ResourcePolicy.from_options(self.options)
+        self.seen = seen if seen is not None else create_seen_set(
+            self.options.get('seen_set', 'exact'),
+            error_rate=float(self.options.get('seen_error_rate', DEFAULT_ERROR_RATE)),
+        )
+        self.on_page = on_page
+        self.throttle = throttle
+        self.checkpoint = checkpoint
+        self.checkpoint_every = int(self.options.get('checkpoint_every', DEFAULT_CHECKPOINT_EVERY))
+        # Without an on_page callback, pages are kept in memory and returned by crawl().
+        self.pages: List[Dict] = []
+        self.start_page: Optional[Dict] = None
+        self.resumed = False
+        self._pending: Dict[str, int] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._scheduled = 0
+        self._completed = 0
+        self._failed = 0
+        self._bytes = 0
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._context = None
+        self._context_lock: Optional[asyncio.Lock] = None
+
+    async def crawl(self) -> List[Dict]:
+        started = time.perf_counter()
+        self._context_lock = asyncio.Lock()
+        queue: asyncio.Queue = asyncio.Queue()
+        for url, depth in await self._initial_frontier():
+            self._pending[url] = depth
+            queue.put_nowait((url, depth))
+
+        async with AsyncExitStack() as exit_stack:
+            self._exit_stack = exit_stack
+            workers = [
+                asyncio.create_task(self._worker(queue))
+                for _ in range(max(self.concurrency, 1))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            self._context = None
+
+        if self.checkpoint is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.checkpoint.clear)
+        self.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.pages.sort(key=lambda page: (page['depth'], page['order']))
+        return self.pages
+
+    def stats(self) -> Dict:
+        return {
+            'pages': self._completed,
+            'failed': self._failed,
+            'bytes': self._bytes,
+            'max_depth': self.max_depth,
+            'max_pages': self.max_pages,
+            'max_bytes': self.max_bytes,
+            'discovered': len(self.seen),
+            'seen_set': type(self.seen).__name__,
+            'seen_set_bytes': getattr(self.seen, 'nbytes', None),
+            'resumed': self.resumed,
+            'elapsed_ms': getattr(self, 'elapsed_ms', None),
+            'resources': self.resource_policy.stats() if self.resource_policy.is_active else None,
+        }
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            url, depth = await queue.get()
+            try:
+                if self._budget_exhausted():
+                    continue
+                order = self._scheduled
+                self._scheduled += 1
+                page = await self._crawl_page(url, depth, order)
+                if page['status'] == 'success' and depth + 1 < self.max_depth:
+                    for link in self._next_links(page, queue.qsize()):
+                        self._pending[link] = depth + 1
+                        queue.put_nowait((link, depth + 1))
+                await self._record_page(page)
+            except Exception as e:
+                logger.error(f"Crawler worker failed on {url}: {e}")
+            finally:
+                self._pending.pop(url, None)
+                queue.task_done()
+
+    async def _initial_frontier(self) -> List:
+        if self.checkpoint is not None:
+            loop = asyncio.get_running_loop()
+            state = await loop.run_in_executor(None, self.checkpoint.load)
+            if state and state['frontier']:
+                self.seen = state['seen']
+                self._completed = self._scheduled = state['completed']
+                self._bytes = state['bytes']
+                self.host = state['host'] or self.host
+                self.resumed = True
+                logger.info(f"Resuming crawl of {self.start_url} with {len(state['frontier'])} pending URLs")
+                return [tuple(entry) for entry in state['frontier']]
+        self.seen.add(self.start_url)
+        return [(self.start_url, 0)]
+
+    async def _record_page(self, page: Dict):
+        self._completed += 1
+        if page['status'] == 'failed':
+            self._failed += 1
+        if page['depth'] == 0:
+            self.start_page = page
+        if self.on_page is not None:
+            await self.on_page(page)
+        else:
+            self.pages.append(page)
+        if self.checkpoint is not None and self._completed % self.checkpoint_every == 0:
+            frontier = [[url, depth] for url, depth in self._pending.items()]
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.checkpoint.save, self.seen, frontier, self._completed, self._bytes, self.host,
+            )
+
+    async def _crawl_page(self, url: str, depth: int, order: int) -> Dict:
+        host = urlparse(url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(max(self.per_host_concurrency, 1)))
+        async with limit:
+            if self.throttle is not None:
+                await self.throttle(host)
+            scraper = WebScraper(url, self.options, browser_pool=self.browser_pool, robots_parser=self.robots_parser)
+            try:
+                data = await scraper.scrape(context_factory=self._get_context)
+            except Exception as e:
+                logger.warning(f"Failed to crawl {url}: {e}")
+                return {'url': url, 'depth': depth, 'order': order, 'status': 'failed', 'error': str(e)}
+
+        self._bytes += len(data.get('html', '').encode('utf-8'))
+        if depth == 0:
+            # Same-host filtering follows the start URL's redirects (example.com -> www.example.com).
+            final_url = normalize_url(data.get('fetch', {}).get('final_url') or url)
+            if final_url:
+                self.host = urlparse(final_url).netloc
+                self.seen.add(final_url)
+        return {'url': url, 'depth': depth, 'order': order, 'status': 'success', **data}
+
+    def _next_links(self, page: Dict, queued: int) -> List[str]:
+        links = []
+        for href in page.get('links', {}).get('internal', []):
+            normalized = normalize_url(href, base=page['url'])
+            if not normalized or urlparse(normalized).netloc != self.host:
+                continue
+            # Keep the frontier bounded by the remaining page budget.
+            if self._scheduled + queued + len(links) >= self.max_pages:
+                break
+            if normalized in self.seen:
+                continue
+            self.seen.add(normalized)
+            links.append(normalized)
+        return links
+
+    def _budget_exhausted(self) -> bool:
+        return self._scheduled >= self.max_pages or self._bytes >= self.max_bytes
+
+    async def _get_context(self):
+        async with self._context_lock:
+            if self._context is None:
+                if self.browser_pool is not None:
+                    self._context = await self._exit_stack.enter_async_context(
+                        self.browser_pool.context(user_agent=WebScraper._get_random_user_agent())
+                    )
+                else:
+                    playwright = await self._exit_stack.enter_async_context(async_playwright())
+                    browser = await playwright.chromium.launch(headless=True)
+                    self._exit_stack.push_async_callback(browser.close)
+                    self._context = await browser.new_context()
+                await self.resource_policy.install(self._context)
+            return self._context
@@ -0,0 +1,77 @@
+from datetime import datetime, time, timedelta
+from hashlib import blake2b
+from typing import NamedTuple, Set
+
+from celery.schedules import crontab
+
+# Longest gap between two matching days ('0 0 29 2 *' with leap years skipped around 2100).
+MAX_SEARCH_DAYS = 366 * 8
+
+
+class CronSchedule(NamedTuple):
+    minute: Set[int]
+    hour: Set[int]
+    day_of_month: Set[int]
+    month_of_year: Set[int]
+    day_of_week: Set[int]
+    # Raw day fields as written, needed for cron's either-day rule.
+    day_of_month_field: str
+    day_of_week_field: str
+
+
+def parse_cron(expression: str) -> CronSchedule:
+    # Raises ValueError for anything that is not a valid five-field cron expression.
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError('expected five fields: minute hour day-of-month month day-of-week')
+    parsed = crontab.from_string(' '.join(fields))
+    if not parsed.minute or not parsed.hour:
+        raise ValueError(f'Cron expression never fires: {expression}')
+    return CronSchedule(
+        minute=parsed.minute,
+        hour=parsed.hour,
+        day_of_month=parsed.day_of_month,
+        month_of_year=parsed.month_of_year,
+        day_of_week=parsed.day_of_week,
+        day_of_month_field=fields[2],
+        day_of_week_field=fields[4],
+    )
+
+
+def next_fire_time(schedule: CronSchedule, after: datetime) -> datetime:
+    # First minute strictly after `after` that matches the schedule, in after's timezone.
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    minutes = sorted(schedule.minute)
+    hours = sorted(schedule.hour)
+    day = start.date()
+    for _ in range(MAX_SEARCH_DAYS):
+        if _matches_day(schedule, day):
+            for hour in hours:
+                if day == start.date() and hour < start.hour:
+                    continue
+                for minute in minutes:
+                    if day == start.date() and hour == start.hour and minute < start.minute:
+                        continue
+                    return datetime.combine(day, time(hour, minute), tzinfo=after.tzinfo)
+        day += timedelta(days=1)
+    raise ValueError(f'Cron schedule has no fire time after {after.isoformat()}')
+
+
+def _matches_day(schedule: CronSchedule, day) -> bool:
+    if day.month not in schedule.month_of_year:
+        return False
+    in_month = day.day in schedule.day_of_month
+    # Cron numbers weekdays from Sunday = 0; date.weekday() starts at Monday = 0.
+    in_week = (day.weekday() + 1) % 7 in schedule.day_of_week
+    if schedule.day_of_month_field != '*' and schedule.day_of_week_field != '*':
+        # Like cron, a schedule restricting both fields fires on days matching either.
+        return in_month or in_week
+    return in_month and in_week
+
+
+def schedule_jitter(key: str, window: int) -> int:
+    # Stable per-key offset in [0, window), so one job always fires at the same point of the
+    # window while thousands of identical schedules spread out across it.
+    if window <= 0:
+        return 0
+    return int.from_bytes(blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') % window
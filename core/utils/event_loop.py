@@ -0,0 +1,42 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    global _loop, _lock
+    # The loop thread does not survive fork; children start their own.
+    _loop = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever,
+                name='goharvest-event-loop',
+                daemon=True,
+            )
+            thread.start()
+        return _loop
+
+
+def run_sync(coro, timeout: Optional[float] = None):
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
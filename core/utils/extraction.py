@@ -0,0 +1,168 @@
+from typing import Dict, List
+from urllib.parse import urljoin, urlparse
+
+import lxml.html
+from lxml import etree
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+LIST_TAGS = ('ul', 'ol')
+# Text under these elements is not page content (mirrors BeautifulSoup's get_text).
+NON_CONTENT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+PRESERVE_WHITESPACE_TAGS = frozenset(('pre', 'textarea'))
+ASCII_WHITESPACE = ' \n\t\x0c\r'
+WALK_EVENTS = ('start', 'end', 'comment', 'pi')
+
+
+def _normalize_whitespace(text: str, preserve: bool) -> str:
+    # BeautifulSoup collapses whitespace-only strings outside <pre>/<textarea>.
+    if preserve or text.strip(ASCII_WHITESPACE):
+        return text
+    return '\n' if '\n' in text else ' '
+
+
+class LxmlExtractor:
+    def __init__(self, base_url: str, extract_media: bool = True):
+        self.base_url = base_url
+        self.base_domain = urlparse(base_url).netloc
+        self.extract_media = extract_media
+
+    def extract(self, html: str) -> Dict:
+        root = self._parse(html)
+
+        text_parts: List[str] = []
+        headings = {tag: [] for tag in HEADING_TAGS}
+        lists: List[str] = []
+        tables: List[List[List[str]]] = []
+        metadata: Dict[str, str] = {}
+        title = None
+        internal = set()
+        external = set()
+        images: List[Dict] = []
+        stylesheets: List[Dict] = []
+        scripts: List[Dict] = []
+        skip_depth = 0
+        preserve_depth = 0
+
+        for event, element in etree.iterwalk(root, events=WALK_EVENTS):
+            tag = element.tag
+            if not isinstance(tag, str):
+                # Comments and processing instructions: only their tail is content.
+                if not skip_depth and element.tail:
+                    text_parts.append(_normalize_whitespace(element.tail, preserve_depth > 0))
+                continue
+
+            if event == 'end':
+                skip_depth -= tag in NON_CONTENT_TAGS
+                preserve_depth -= tag in PRESERVE_WHITESPACE_TAGS
+                if not skip_depth and element.tail:
+                    text_parts.append(_normalize_whitespace(element.tail, preserve_depth > 0))
+                continue
+
+            if tag in HEADING_TAGS:
+                headings[tag].append(self._text(element, skip_depth, preserve_depth).strip())
+            elif tag in LIST_TAGS:
+                lists.append(self._text(element, skip_depth, preserve_depth).strip())
+            elif tag == 'table':
+                tables.append(self._table_rows(element, skip_depth, preserve_depth))
+            elif tag == 'meta':
+                name = element.get('name') or element.get('property')
+                content = element.get('content')
+                if name and content:
+                    metadata[name] = content
+            elif tag == 'title':
+                if title is None:
+                    title = self._text(element, skip_depth, preserve_depth).strip()
+            elif tag == 'a':
+                href = element.get('href')
+                if href is not None:
+                    netloc = urlparse(href).netloc
+                    if netloc == self.base_domain or not netloc:
+                        internal.add(href)
+                    else:
+                        external.add(href)
+            elif self.extract_media:
+                self._collect_asset(element, tag, images, stylesheets, scripts)
+
+            skip_depth += tag in NON_CONTENT_TAGS
+            preserve_depth += tag in PRESERVE_WHITESPACE_TAGS
+            if not skip_depth and element.text:
+                text_parts.append(_normalize_whitespace(element.text, preserve_depth > 0))
+
+        if title is not None:
+            metadata['title'] = title
+
+        lines = (line.strip() for line in ''.join(text_parts).splitlines())
+        return {
+            'content': '\n'.join(line for line in lines if line),
+            'structured': {
+                'headings': headings,
+                'lists': lists,
+                'tables': tables,
+            },
+            'metadata': metadata,
+            'links': {
+                'internal': list(internal),
+                'external': list(external),
+            },
+            'assets': images + stylesheets + scripts if self.extract_media else [],
+        }
+
+    def _parse(self, html: str):
+        parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=False)
+        try:
+            return lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=parser)
+        except etree.ParserError:
+            return lxml.html.document_fromstring('<html></html>')
+
+    def _collect_asset(self, element, tag: str, images: List, stylesheets: List, scripts: List):
+        if tag == 'img':
+            src = element.get('src') or element.get('data-src')
+            if src:
+                images.append({
+                    'type': 'image',
+                    'url': self._resolve_url(src),
+                    'alt': element.get('alt', ''),
+                })
+        elif tag == 'link':
+            href = element.get('href')
+            if href and 'stylesheet' in (element.get('rel') or '').split():
+                stylesheets.append({
+                    'type': 'css',
+                    'url': self._resolve_url(href),
+                })
+        elif tag == 'script':
+            src = element.get('src')
+            if src is not None:
+                scripts.append({
+                    'type': 'js',
+                    'url': self._resolve_url(src),
+                })
+
+    def _table_rows(self, table, skip_depth: int = 0, preserve_depth: int = 0) -> List[List[str]]:
+        return [
+            [self._text(cell, skip_depth, preserve_depth).strip() for cell in row.iter('th', 'td')]
+            for row in table.iter('tr')
+        ]
+
+    def _text(self, element, skip_depth: int = 0, preserve_depth: int = 0) -> str:
+        if skip_depth:
+            return ''
+        parts = []
+        for event, node in etree.iterwalk(element, events=WALK_EVENTS):
+            tag = node.tag
+            is_element = isinstance(tag, str)
+            if event == 'start':
+                skip_depth += tag in NON_CONTENT_TAGS
+                preserve_depth += tag in PRESERVE_WHITESPACE_TAGS
+                if not skip_depth and node.text:
+                    parts.append(_normalize_whitespace(node.text, preserve_depth > 0))
+                continue
+            if is_element:
+                skip_depth -= tag in NON_CONTENT_TAGS
+                preserve_depth -= tag in PRESERVE_WHITESPACE_TAGS
+            if node is not element and not skip_depth and node.tail:
+                parts.append(_normalize_whitespace(node.tail, preserve_depth > 0))
+        return ''.join(parts)
+
+    def _resolve_url(self, url: str) -> str:
+        return urljoin(self.base_url, url)
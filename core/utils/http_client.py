@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _reset_after_fork():
+    global _session, _session_loop
+    _session = None
+    _session_loop = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=int(os.getenv('HTTP_POOL_LIMIT', '100')),
+            limit_per_host=int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '8')),
+            ttl_dns_cache=int(os.getenv('HTTP_DNS_CACHE_TTL', '300')),
+            keepalive_timeout=float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '30')),
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=float(os.getenv('HTTP_TIMEOUT', '30'))),
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_http_session():
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
@@ -0,0 +1,41 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Token bucket refilled at one token per interval. Tokens may go negative:
+# each call reserves the next free slot and returns how long to wait for it.
+RESERVE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) / interval) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+local wait = 0
+if tokens < 0 then
+  wait = -tokens * interval
+end
+redis.call('PEXPIRE', KEYS[1], math.ceil((wait + interval * capacity) * 1000) + 60000)
+return tostring(wait)
+"""
+
+
+class PolitenessScheduler:
+    def __init__(self, redis_client, burst: int = 1, key_prefix: str = 'goharvest:politeness'):
+        self.redis = redis_client
+        self.burst = max(int(burst), 1)
+        self.key_prefix = key_prefix
+        self._script = redis_client.register_script(RESERVE_SCRIPT)
+
+    def reserve(self, host: str, delay: float) -> float:
+        if delay <= 0:
+            return 0.0
+        try:
+            wait = self._script(keys=[f'{self.key_prefix}:{host.lower()}'], args=[self.burst, delay])
+        except Exception as e:
+            logger.warning(f"Politeness scheduler unavailable for {host}, not throttling: {e}")
+            return 0.0
+        return float(wait)
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Union
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRATEGY = 'quiescence'
+DEFAULT_TIMEOUT_MS = 10000
+DEFAULT_QUIET_MS = 500
+
+DOM_QUIESCENCE_SCRIPT = """
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+  const started = performance.now();
+  let mutations = 0;
+  let quietTimer = null;
+  let deadline = null;
+  const finish = (timedOut) => {
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(deadline);
+    resolve({mutations, timedOut, elapsed: performance.now() - started});
+  };
+  const observer = new MutationObserver((records) => {
+    mutations += records.length;
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(false), quietMs);
+  });
+  observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+  quietTimer = setTimeout(() => finish(false), quietMs);
+  deadline = setTimeout(() => finish(true), timeoutMs);
+})
+"""
+
+
+class ReadinessStrategy:
+    name = ''
+
+    def __init__(self, timeout_ms: int = DEFAULT_TIMEOUT_MS, **kwargs):
+        self.timeout_ms = int(timeout_ms)
+
+    async def wait(self, page) -> Dict:
+        started = time.perf_counter()
+        details = {}
+        timed_out = False
+        try:
+            details = await self._wait(page) or {}
+            timed_out = details.pop('timed_out', False)
+        except PlaywrightTimeoutError:
+            timed_out = True
+        except PlaywrightError as e:
+            logger.debug(f"Readiness strategy '{self.name}' aborted: {e}")
+            details = {'error': str(e)}
+        return {
+            'strategy': self.name,
+            'ready_ms': round((time.perf_counter() - started) * 1000, 1),
+            'timeout_ms': self.timeout_ms,
+            'timed_out': timed_out,
+            **details,
+        }
+
+    async def _wait(self, page) -> Optional[Dict]:
+        raise NotImplementedError
+
+
+class NetworkIdleStrategy(ReadinessStrategy):
+    name = 'networkidle'
+
+    async def _wait(self, page) -> Optional[Dict]:
+        await page.wait_for_load_state('networkidle', timeout=self.timeout_ms)
+        return None
+
+
+class DomQuiescenceStrategy(ReadinessStrategy):
+    name = 'quiescence'
+
+    def __init__(self, timeout_ms: int = DEFAULT_TIMEOUT_MS, quiet_ms: int = DEFAULT_QUIET_MS, **kwargs):
+        super().__init__(timeout_ms)
+        self.quiet_ms = int(quiet_ms)
+
+    async def _wait(self, page) -> Optional[Dict]:
+        outcome = await page.evaluate(DOM_QUIESCENCE_SCRIPT, [self.quiet_ms, self.timeout_ms])
+        return {
+            'quiet_ms': self.quiet_ms,
+            'mutations': outcome.get('mutations', 0),
+            'timed_out': outcome.get('timedOut', False),
+        }
+
+
+class SelectorStrategy(ReadinessStrategy):
+    name = 'selector'
+
+    def __init__(self, timeout_ms: int = DEFAULT_TIMEOUT_MS, selector: str = '', state: str = 'visible', **kwargs):
+        super().__init__(timeout_ms)
+        if not selector:
+            raise ValueError("The 'selector' readiness strategy requires a selector")
+        self.selector = selector
+        self.state = state
+
+    async def _wait(self, page) -> Optional[Dict]:
+        await page.wait_for_selector(self.selector, state=self.state, timeout=self.timeout_ms)
+        return {'selector': self.selector}
+
+
+class BudgetStrategy(ReadinessStrategy):
+    name = 'budget'
+
+    def __init__(self, timeout_ms: int = DEFAULT_TIMEOUT_MS, quiet_ms: int = DEFAULT_QUIET_MS,
+                 selector: str = '', state: str = 'visible', **kwargs):
+        super().__init__(timeout_ms)
+        self.quiet_ms = int(quiet_ms)
+        self.selector = selector
+        self.state = state
+
+    async def _wait(self, page) -> Optional[Dict]:
+        # Races DOM quiescence, network idle and the selector (if given) against the budget and
+        # stops at the first to settle. Long-polling or beacon pages never go network-idle, but
+        # their DOM does settle, so the whole budget is only spent when no signal arrives.
+        signals = {
+            asyncio.ensure_future(self._quiescence(page)): 'quiescence',
+            asyncio.ensure_future(page.wait_for_load_state('networkidle', timeout=self.timeout_ms)): 'networkidle',
+        }
+        if self.selector:
+            waiter = page.wait_for_selector(self.selector, state=self.state, timeout=self.timeout_ms)
+            signals[asyncio.ensure_future(waiter)] = 'selector'
+        pending = set(signals)
+        deadline = time.perf_counter() + self.timeout_ms / 1000
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(deadline - time.perf_counter(), 0), return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break
+                for task in done:
+                    # A signal that timed out or failed does not end the wait; the others still can.
+                    if task.exception() is None:
+                        return {'signal': signals[task], 'early_exit': True}
+            return {'signal': None, 'timed_out': True}
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _quiescence(self, page):
+        outcome = await page.evaluate(DOM_QUIESCENCE_SCRIPT, [self.quiet_ms, self.timeout_ms])
+        if outcome.get('timedOut'):
+            raise PlaywrightTimeoutError('DOM did not go quiet within the budget')
+        return outcome
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (NetworkIdleStrategy, DomQuiescenceStrategy, SelectorStrategy, BudgetStrategy)
+}
+
+
+def get_readiness_strategy(config: Union[str, Dict, None]) -> ReadinessStrategy:
+    if isinstance(config, str):
+        config = {'strategy': config}
+    config = dict(config or {})
+    name = config.pop('strategy', DEFAULT_STRATEGY)
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown readiness strategy '{name}'")
+    return STRATEGIES[name](**config)
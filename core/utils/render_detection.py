@@ -0,0 +1,42 @@
+import re
+from typing import Optional
+
+import lxml.html
+from lxml import etree
+
+MOUNT_POINT_IDS = ('root', 'app', '__next', '__nuxt', '___gatsby', 'svelte')
+NOSCRIPT_WARNING = re.compile(
+    r'enable javascript|javascript (is )?(required|disabled)|requires? javascript|turn on javascript',
+    re.IGNORECASE,
+)
+MIN_BODY_TEXT_LENGTH = 200
+
+
+def detect_render_requirement(html: str, min_text_length: int = MIN_BODY_TEXT_LENGTH) -> Optional[str]:
+    if not html or not html.strip():
+        return 'empty_document'
+
+    try:
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        document = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=parser)
+    except (etree.ParserError, ValueError):
+        return 'unparseable_document'
+
+    for element_id in MOUNT_POINT_IDS:
+        for node in document.xpath('//*[@id=$element_id]', element_id=element_id):
+            if not len(node) and not (node.text or '').strip():
+                return f'empty_mount_point:#{element_id}'
+
+    for noscript in document.iter('noscript'):
+        if NOSCRIPT_WARNING.search(noscript.text_content()):
+            return 'noscript_warning'
+
+    body = document.find('body')
+    if body is None:
+        return 'missing_body'
+    etree.strip_elements(body, 'script', 'style', 'noscript', 'template', with_tail=False)
+    body_text = ' '.join(' '.join(body.itertext()).split())
+    if len(body_text) < min_text_length:
+        return 'thin_body_text'
+
+    return None
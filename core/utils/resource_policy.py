@@ -0,0 +1,102 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+MEDIA_RESOURCE_TYPES = ('image', 'media', 'font')
+
+TRACKER_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'facebook.net',
+    'connect.facebook.net',
+    'hotjar.com',
+    'segment.com',
+    'segment.io',
+    'mixpanel.com',
+    'clarity.ms',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'hubspot.com',
+    'intercomcdn.com',
+)
+
+
+class ResourcePolicy:
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = (),
+        block_trackers: bool = False,
+        blocked_hosts: Iterable[str] = (),
+    ):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts) + (TRACKER_HOSTS if block_trackers else ())
+        self.blocked = Counter()
+        self.allowed = 0
+
+    @classmethod
+    def from_options(cls, options: Optional[Dict]) -> 'ResourcePolicy':
+        options = options or {}
+        content_only = not options.get('extract_media', True) or options.get('mode') == 'content'
+
+        blocked_types = options.get('block_resources')
+        if blocked_types is None:
+            blocked_types = MEDIA_RESOURCE_TYPES if content_only else ()
+        elif blocked_types is False:
+            blocked_types = ()
+
+        return cls(
+            blocked_types=blocked_types,
+            block_trackers=options.get('block_trackers', content_only),
+            blocked_hosts=options.get('blocked_hosts', ()),
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.blocked_types or self.blocked_hosts)
+
+    def should_block(self, resource_type: str, url: str) -> Optional[str]:
+        if resource_type in self.blocked_types:
+            return resource_type
+        host = (urlparse(url).hostname or '').lower()
+        for blocked_host in self.blocked_hosts:
+            if host == blocked_host or host.endswith(f'.{blocked_host}'):
+                return 'tracker'
+        return None
+
+    async def install(self, target):
+        if self.is_active:
+            await target.route('**/*', self._handle_route)
+
+    async def _handle_route(self, route):
+        request = route.request
+        reason = self.should_block(request.resource_type, request.url)
+        try:
+            if reason:
+                self.blocked[reason] += 1
+                await route.abort('blockedbyclient')
+            else:
+                self.allowed += 1
+                await route.continue_()
+        except Exception as e:
+            logger.debug(f"Route handling failed for {request.url}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            'blocked_types': sorted(self.blocked_types),
+            'blocked': sum(self.blocked.values()),
+            'blocked_by_reason': dict(self.blocked),
+            'allowed': self.allowed,
+        }
@@ -0,0 +1,41 @@
+import re
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+# s-maxage is for shared caches; the harvester keeps a private copy and only honours max-age.
+MAX_AGE = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+NO_REUSE_DIRECTIVES = ('no-cache', 'no-store')
+
+
+def response_validators(headers: Mapping[str, str]) -> Dict[str, str]:
+    validators = {
+        'etag': headers.get('ETag') or headers.get('etag') or '',
+        'last_modified': headers.get('Last-Modified') or headers.get('last-modified') or '',
+        'cache_control': headers.get('Cache-Control') or headers.get('cache-control') or '',
+    }
+    return {key: value for key, value in validators.items() if value}
+
+
+def conditional_headers(validators: Optional[Mapping[str, str]]) -> Dict[str, str]:
+    headers = {}
+    if not validators:
+        return headers
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def is_fresh(cache_control: str, validated_at: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    # Still within max-age since it was last downloaded or revalidated, so no request is needed.
+    if not cache_control or validated_at is None:
+        return False
+    lowered = cache_control.lower()
+    if any(directive in lowered for directive in NO_REUSE_DIRECTIVES):
+        return False
+    match = MAX_AGE.search(lowered)
+    if not match:
+        return False
+    now = now or datetime.now(timezone.utc)
+    return (now - validated_at).total_seconds() < int(match.group(1))
@@ -1,31 +1,310 @@
-import requests
+import asyncio
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from urllib.parse import urlparse, urljoin
 from urllib.robotparser import RobotFileParser
-import logging
+
+import aiohttp
+import requests
+
+from .http_client import get_http_session
 
 logger = logging.getLogger(__name__)
 
+ROBOTS_CACHE_TTL = int(os.getenv('ROBOTS_CACHE_TTL', 24 * 3600))
+ROBOTS_NEGATIVE_CACHE_TTL = int(os.getenv('ROBOTS_NEGATIVE_CACHE_TTL', 300))
+ROBOTS_MEMORY_CACHE_SIZE = int(os.getenv('ROBOTS_MEMORY_CACHE_SIZE', 1024))
+ROBOTS_FETCH_TIMEOUT = 10
+ROBOTS_MAX_BYTES = 512 * 1024
+CACHE_KEY_PREFIX = 'goharvest:robots'
+
+# Fetch outcomes, following RobotFileParser.read(): 401/403 disallow everything,
+# other 4xx allow everything, and 5xx or network errors leave the domain unreadable.
+STATUS_OK = 'ok'
+STATUS_ALLOW_ALL = 'allow_all'
+STATUS_DISALLOW_ALL = 'disallow_all'
+STATUS_UNAVAILABLE = 'unavailable'
+CRAWL_DELAY_LINE = re.compile(r'^(\s*crawl-delay\s*:\s*)(\d+\.?\d*|\.\d+)', re.IGNORECASE)
+
+
+class _MemoryCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _django_ready() -> bool:
+    # The CLI runs without Django, in which case only the in-process cache is used.
+    from django.apps import apps
+    from django.conf import settings
+
+    return settings.configured and apps.ready
+
 
 class RobotsParser:
-    def __init__(self, user_agent='GOharvest/1.0'):
+    # Shared by every parser in the process so short-lived instances still hit the cache.
+    memory_cache = _MemoryCache(ROBOTS_MEMORY_CACHE_SIZE)
+    _inflight: Dict = {}
+
+    def __init__(self, user_agent='GOharvest/1.0', ttl: int = ROBOTS_CACHE_TTL,
+                 negative_ttl: int = ROBOTS_NEGATIVE_CACHE_TTL):
         self.user_agent = user_agent
-        self.parsers = {}  # Cache parsers by domain
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
 
     def can_fetch(self, url):
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        if domain not in self.parsers:
-            self.parsers[domain] = self._load_robots(parsed)
-        return self.parsers[domain].can_fetch(self.user_agent, url)
-
-    def _load_robots(self, parsed_url):
-        rp = RobotFileParser()
-        scheme = parsed_url.scheme or 'http'
-        robots_url = urljoin(f'{scheme}://{parsed_url.netloc}', '/robots.txt')
+        return self._can_fetch(self._get_entry(urlparse(url)), url)
+
+    async def can_fetch_async(self, url):
+        return self._can_fetch(await self._get_entry_async(urlparse(url)), url)
+
+    def get_crawl_delay(self, url) -> Optional[float]:
+        delay = self._get_entry(urlparse(url))['parser'].crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    def _can_fetch(self, entry: Dict, url: str) -> bool:
+        return entry['parser'].can_fetch(self.user_agent, url)
+
+    def _get_entry(self, parsed_url) -> Dict:
+        domain = parsed_url.netloc
+        entry = self.memory_cache.get(domain)
+        if entry is not None:
+            return entry
+        record = self._load_shared(domain)
+        if record is None:
+            record = self._fetch(parsed_url)
+            self._store_shared(domain, record)
+        return self._remember(domain, record)
+
+    async def _get_entry_async(self, parsed_url) -> Dict:
+        domain = parsed_url.netloc
+        entry = self.memory_cache.get(domain)
+        if entry is not None:
+            return entry
+
+        # Concurrent lookups for one domain on this loop share a single load.
+        loop = asyncio.get_running_loop()
+        key = (id(loop), domain)
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = loop.create_task(self._load_async(parsed_url))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _load_async(self, parsed_url) -> Dict:
+        domain = parsed_url.netloc
+        loop = asyncio.get_running_loop()
+        # The Django cache and ORM are synchronous, so they run off the event loop.
+        record = await loop.run_in_executor(None, self._load_shared, domain)
+        if record is None:
+            record = await self._fetch_async(parsed_url)
+            await loop.run_in_executor(None, self._store_shared, domain, record)
+        return self._remember(domain, record)
+
+    def _remember(self, domain: str, record: Dict) -> Dict:
+        ttl = self.negative_ttl if record['status'] == STATUS_UNAVAILABLE else self.ttl
+        entry = {
+            'parser': self._build_parser(record),
+            'status': record['status'],
+            'expires_at': time.monotonic() + max(min(ttl, record.get('ttl', ttl)), 0),
+        }
+        self.memory_cache.set(domain, entry)
+        return entry
+
+    def _load_shared(self, domain: str) -> Optional[Dict]:
+        if not _django_ready():
+            return None
+        from django.core.cache import cache
+
+        key = self._cache_key(domain)
         try:
-            rp.set_url(robots_url)
-            rp.read()
-            logger.info(f"Loaded robots.txt for {parsed_url.netloc}")
+            record = cache.get(key)
         except Exception as e:
+            logger.warning(f"Robots cache unavailable for {domain}: {e}")
+            record = None
+        if record is not None:
+            return record
+
+        record = self._load_compliance(domain)
+        if record is not None:
+            try:
+                cache.set(key, record, timeout=record['ttl'])
+            except Exception as e:
+                logger.warning(f"Failed to cache robots.txt for {domain}: {e}")
+        return record
+
+    def _load_compliance(self, domain: str) -> Optional[Dict]:
+        from django.utils import timezone
+
+        from core.models import RobotsCompliance
+
+        try:
+            compliance = RobotsCompliance.objects.filter(domain=domain).first()
+        except Exception as e:
+            logger.warning(f"Failed to read robots compliance for {domain}: {e}")
+            return None
+        if compliance is None:
+            return None
+        age = (timezone.now() - compliance.last_checked).total_seconds()
+        if age >= self.ttl:
+            return None
+
+        if not compliance.is_scrapable:
+            status = STATUS_DISALLOW_ALL
+        elif compliance.robots_txt:
+            status = STATUS_OK
+        else:
+            status = STATUS_ALLOW_ALL
+        return {'status': status, 'robots_txt': compliance.robots_txt, 'ttl': int(self.ttl - age)}
+
+    def _store_shared(self, domain: str, record: Dict):
+        if not _django_ready():
+            return
+        from django.core.cache import cache
+
+        try:
+            cache.set(self._cache_key(domain), record, timeout=record['ttl'])
+        except Exception as e:
+            logger.warning(f"Failed to cache robots.txt for {domain}: {e}")
+
+        # Unreachable robots.txt is only cached briefly and never persisted.
+        if record['status'] == STATUS_UNAVAILABLE:
+            return
+        from core.models import RobotsCompliance
+
+        parser = self._build_parser(record)
+        delay = parser.crawl_delay(self.user_agent)
+        try:
+            RobotsCompliance.objects.update_or_create(
+                domain=domain,
+                defaults={
+                    'robots_txt': record['robots_txt'],
+                    'is_scrapable': record['status'] != STATUS_DISALLOW_ALL,
+                    'crawl_delay': float(delay or 0),
+                    'disallowed_paths': self._disallowed_paths(parser),
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Failed to store robots compliance for {domain}: {e}")
+
+    def _fetch(self, parsed_url) -> Dict:
+        robots_url = self._robots_url(parsed_url)
+        try:
+            response = requests.get(
+                robots_url,
+                headers={'User-Agent': self.user_agent},
+                timeout=ROBOTS_FETCH_TIMEOUT,
+            )
+        except requests.RequestException as e:
             logger.warning(f"Failed to load robots.txt for {parsed_url.netloc}: {e}")
+            return self._record(STATUS_UNAVAILABLE)
+        return self._record_for_response(parsed_url.netloc, response.status_code, response.text)
+
+    async def _fetch_async(self, parsed_url) -> Dict:
+        robots_url = self._robots_url(parsed_url)
+        session = await get_http_session()
+        try:
+            async with session.get(
+                robots_url,
+                headers={'User-Agent': self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=ROBOTS_FETCH_TIMEOUT),
+            ) as response:
+                body = await response.content.read(ROBOTS_MAX_BYTES)
+                text = body.decode(response.get_encoding() if response.charset else 'utf-8', 'replace')
+                status_code = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Failed to load robots.txt for {parsed_url.netloc}: {e}")
+            return self._record(STATUS_UNAVAILABLE)
+        return self._record_for_response(parsed_url.netloc, status_code, text)
+
+    def _record_for_response(self, domain: str, status_code: int, text: str) -> Dict:
+        if status_code in (401, 403):
+            status = STATUS_DISALLOW_ALL
+        elif 400 <= status_code < 500:
+            status = STATUS_ALLOW_ALL
+        elif status_code >= 500:
+            logger.warning(f"Failed to load robots.txt for {domain}: HTTP {status_code}")
+            return self._record(STATUS_UNAVAILABLE)
+        else:
+            logger.info(f"Loaded robots.txt for {domain}")
+            return self._record(STATUS_OK, text[:ROBOTS_MAX_BYTES])
+        return self._record(status)
+
+    def _record(self, status: str, robots_txt: str = '') -> Dict:
+        ttl = self.negative_ttl if status == STATUS_UNAVAILABLE else self.ttl
+        return {'status': status, 'robots_txt': robots_txt, 'ttl': ttl}
+
+    @staticmethod
+    def _build_parser(record: Dict) -> RobotFileParser:
+        rp = _FractionalDelayParser()
+        status = record['status']
+        if status == STATUS_OK:
+            rp.parse(record['robots_txt'].splitlines())
+        elif status == STATUS_ALLOW_ALL:
+            rp.allow_all = True
+        elif status == STATUS_DISALLOW_ALL:
+            rp.disallow_all = True
+        # STATUS_UNAVAILABLE leaves the parser unread, so can_fetch() is False.
         return rp
+
+    def _disallowed_paths(self, parser: RobotFileParser) -> List[str]:
+        entry = next(
+            (entry for entry in parser.entries if entry.applies_to(self.user_agent)),
+            parser.default_entry,
+        )
+        if entry is None:
+            return []
+        return [line.path for line in entry.rulelines if not line.allowance and line.path]
+
+    @staticmethod
+    def _robots_url(parsed_url) -> str:
+        scheme = parsed_url.scheme or 'http'
+        return urljoin(f'{scheme}://{parsed_url.netloc}', '/robots.txt')
+
+    @staticmethod
+    def _cache_key(domain: str) -> str:
+        return f'{CACHE_KEY_PREFIX}:{domain.lower()}'
+
+
+class _FractionalDelayParser(RobotFileParser):
+    # RobotFileParser drops Crawl-delay values that are not integers (0.5, 1.5). They are parsed
+    # in milliseconds, rounded up, and scaled back to seconds.
+    def parse(self, lines):
+        super().parse([CRAWL_DELAY_LINE.sub(_delay_in_milliseconds, line) for line in lines])
+        for entry in (*self.entries, self.default_entry):
+            if entry is not None and entry.delay is not None:
+                entry.delay /= 1000
+
+
+def _delay_in_milliseconds(match) -> str:
+    return f'{match.group(1)}{math.ceil(float(match.group(2)) * 1000)}'
@@ -1,52 +1,87 @@
-import asyncio
 import logging
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 
+from .extraction import LxmlExtractor
+from .http_client import get_http_session
+from .readiness import get_readiness_strategy
+from .render_detection import detect_render_requirement
+from .resource_policy import ResourcePolicy
+from .revalidation import conditional_headers, response_validators
 from .robots_parser import RobotsParser
 
 logger = logging.getLogger(__name__)
 
+FETCH_MODES = ('auto', 'http', 'browser')
+DEFAULT_FETCH_MODE = os.getenv('HARVEST_FETCH_MODE', 'auto')
+EXTRACTION_ENGINES = ('lxml', 'bs4')
+DEFAULT_EXTRACTION_ENGINE = os.getenv('HARVEST_EXTRACTION_ENGINE', 'lxml')
+
 
 class WebScraper:
-    def __init__(self, url: str, options: Dict):
+    def __init__(self, url: str, options: Dict, browser_pool=None, robots_parser=None, validators=None):
         self.url = url
         self.options = options or {}
         self.mode = self.options.get('mode', 'full')
         self.depth = self.options.get('depth', 1)
         self.extract_media = self.options.get('extract_media', True)
+        self.fetch_mode = self.options.get('fetch', DEFAULT_FETCH_MODE)
+        if self.fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{self.fetch_mode}'")
+        self.engine = self.options.get('engine', DEFAULT_EXTRACTION_ENGINE)
+        if self.engine not in EXTRACTION_ENGINES:
+            raise ValueError(f"Unknown extraction engine '{self.engine}'")
+        self.readiness = get_readiness_strategy(self.options.get('wait'))
+        self.resource_policy = ResourcePolicy.from_options(self.options)
         self.logger = logging.getLogger(__name__)
-        self.robots_parser = RobotsParser()
+        self.robots_parser = robots_parser or RobotsParser()
+        self.browser_pool = browser_pool
+        # ETag/Last-Modified of a stored copy; a 304 on the HTTP path means it can be reused.
+        self.validators = validators or {}
+        self.response_validators: Dict[str, str] = {}
+        # Where redirects ended; links and assets on the page are relative to it.
+        self.final_url = url
+
+    async def scrape(self, context_factory=None) -> Dict:
+        page = await self.fetch(context_factory)
+        if page.get('not_modified'):
+            return page
+
+        return {
+            'html': page['html'],
+            **self.extract(page['html']),
+            'fetch': page['fetch'],
+        }
 
-    async def scrape(self) -> Dict:
-        if not self.robots_parser.can_fetch(self.url):
+    async def fetch(self, context_factory=None) -> Dict:
+        # Fetch without extraction, for callers that parse the HTML elsewhere.
+        if not await self.robots_parser.can_fetch_async(self.url):
             raise ValueError('Robots.txt disallows scraping this URL')
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(user_agent=self._get_random_user_agent())
-            page = await context.new_page()
+        html, fetch_info = await self._fetch(context_factory)
+        if html is None:
+            return {'not_modified': True, 'fetch': fetch_info}
+        self.url = self.final_url
+        return {'html': html, 'fetch': fetch_info}
 
-            try:
-                await page.goto(self.url, wait_until='networkidle')
-                await page.wait_for_load_state('domcontentloaded')
-                await asyncio.sleep(2)
-                html = await page.content()
-            finally:
-                await browser.close()
+    def extract(self, html: str) -> Dict:
+        if self.engine == 'lxml':
+            return LxmlExtractor(self.url, self.extract_media).extract(html)
 
         soup = BeautifulSoup(html, 'html.parser')
-        content = self._extract_text(soup)
         structured_data = self._extract_structured(soup)
         metadata = self._extract_metadata(soup)
         links = self._extract_links(soup)
         assets = self._extract_assets(soup) if self.extract_media else []
+        # _extract_text decomposes script/meta/link tags, so it has to run last.
+        content = self._extract_text(soup)
 
         return {
-            'html': html,
             'content': content,
             'structured': structured_data,
             'metadata': metadata,
@@ -54,6 +89,93 @@ class WebScraper:
             'assets': assets,
         }
 
+    async def _fetch(self, context_factory=None) -> Tuple[str, Dict]:
+        started = time.perf_counter()
+        reason = None
+
+        if self.fetch_mode in ('auto', 'http'):
+            html, reason = await self._fetch_http()
+            if reason == 'not_modified':
+                return None, self._fetch_info('http', reason, started)
+            if reason is None or self.fetch_mode == 'http':
+                if html is None:
+                    raise ValueError(f'HTTP fetch failed: {reason}')
+                return html, self._fetch_info('http', reason, started)
+
+        html, timings = await self._render(context_factory)
+        fetch_info = self._fetch_info('browser', reason, started)
+        fetch_info['render'] = timings
+        if context_factory is None and self.resource_policy.is_active:
+            fetch_info['resources'] = self.resource_policy.stats()
+        return html, fetch_info
+
+    async def _fetch_http(self) -> Tuple[Optional[str], Optional[str]]:
+        headers = {
+            'User-Agent': self._get_random_user_agent(),
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            **conditional_headers(self.validators),
+        }
+        try:
+            session = await get_http_session()
+            async with session.get(self.url, headers=headers) as response:
+                if response.status == 304 and self.validators:
+                    self.response_validators = {**self.validators, **response_validators(response.headers)}
+                    return None, 'not_modified'
+                if response.status != 200:
+                    return None, f'http_status_{response.status}'
+                if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                    return None, 'non_html_content'
+                html = await response.text(errors='replace')
+                self.response_validators = response_validators(response.headers)
+                self.final_url = str(response.url)
+        except Exception as e:
+            self.logger.info(f"HTTP fetch failed for {self.url}, falling back to browser: {e}")
+            return None, 'http_error'
+        return html, detect_render_requirement(html)
+
+    def _fetch_info(self, path: str, reason: Optional[str], started: float) -> Dict:
+        return {
+            'path': path,
+            'mode': self.fetch_mode,
+            'reason': reason,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'validators': self.response_validators,
+            'final_url': self.final_url,
+        }
+
+    async def _render(self, context_factory=None) -> Tuple[str, Dict]:
+        if context_factory is not None:
+            # Shared context owned by the caller (e.g. a crawl), which also installs the resource policy.
+            return await self._load_page(await context_factory())
+
+        if self.browser_pool is not None:
+            async with self.browser_pool.context(user_agent=self._get_random_user_agent()) as context:
+                await self.resource_policy.install(context)
+                return await self._load_page(context)
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                context = await browser.new_context(user_agent=self._get_random_user_agent())
+                await self.resource_policy.install(context)
+                return await self._load_page(context)
+            finally:
+                await browser.close()
+
+    async def _load_page(self, context) -> Tuple[str, Dict]:
+        page = await context.new_page()
+        try:
+            started = time.perf_counter()
+            response = await page.goto(self.url, wait_until='domcontentloaded')
+            self.response_validators = response_validators(response.headers) if response else {}
+            goto_ms = round((time.perf_counter() - started) * 1000, 1)
+            timings = await self.readiness.wait(page)
+            timings['goto_ms'] = goto_ms
+            self.final_url = page.url
+            return await page.content(), timings
+        finally:
+            await page.close()
+
     def _extract_text(self, soup: BeautifulSoup) -> str:
         for element in soup(['script', 'style', 'meta', 'link']):
             element.decompose()
@@ -146,7 +268,8 @@ class WebScraper:
     def _resolve_url(self, url: str) -> str:
         return urljoin(self.url, url)
 
-    def _get_random_user_agent(self) -> str:
+    @staticmethod
+    def _get_random_user_agent() -> str:
         from fake_useragent import UserAgent
 
         ua = UserAgent()
@@ -0,0 +1,104 @@
+import json
+import zlib
+from typing import List, Optional, Sequence
+
+# Consecutive chunks that anchor a copy; single chunks such as '</td>' repeat too often to locate.
+ANCHOR_CHUNKS = 4
+# Beyond this many chunks on either side the delta is not computed and a keyframe is stored.
+MAX_DELTA_CHUNKS = 200000
+COPY, INSERT = 0, 1
+COMPRESSION_LEVEL = 6
+
+
+def split_chunks(html: str) -> List[str]:
+    # Chunks end after each tag, so minified single-line HTML still diffs at element granularity.
+    parts = html.split('>')
+    chunks = [part + '>' for part in parts[:-1]]
+    if parts[-1]:
+        chunks.append(parts[-1])
+    return chunks
+
+
+def compress_keyframe(html: str) -> bytes:
+    return zlib.compress(html.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_keyframe(data: bytes) -> str:
+    return zlib.decompress(data).decode('utf-8')
+
+
+def make_delta(base: str, target: str) -> Optional[bytes]:
+    # A compressed list of [COPY, start, end] ranges of base chunks and [INSERT, text] literals.
+    # Linear in the page size: target positions are matched against an index of base anchors
+    # (preferring the base position right after the previous copy) and extended chunk by chunk.
+    # Returns None when the pages are too large to diff.
+    base_chunks = split_chunks(base)
+    target_chunks = split_chunks(target)
+    if len(base_chunks) > MAX_DELTA_CHUNKS or len(target_chunks) > MAX_DELTA_CHUNKS:
+        return None
+    if base_chunks == target_chunks:
+        return b''
+
+    anchors = {}
+    for i in range(len(base_chunks) - ANCHOR_CHUNKS + 1):
+        anchors.setdefault(tuple(base_chunks[i:i + ANCHOR_CHUNKS]), i)
+
+    ops = []
+    literal = []
+    expected = 0
+    j = 0
+    while j < len(target_chunks):
+        window = target_chunks[j:j + ANCHOR_CHUNKS]
+        if base_chunks[expected:expected + ANCHOR_CHUNKS] == window:
+            start = expected
+        else:
+            start = anchors.get(tuple(window))
+        if start is None:
+            literal.append(target_chunks[j])
+            j += 1
+            # Most edits replace chunks in place, so stay aligned with the base.
+            expected += 1
+            continue
+
+        end = start
+        while end < len(base_chunks) and j < len(target_chunks) and base_chunks[end] == target_chunks[j]:
+            end += 1
+            j += 1
+        if literal:
+            ops.append([INSERT, ''.join(literal)])
+            literal = []
+        if ops and ops[-1][0] == COPY and ops[-1][2] == start:
+            ops[-1][2] = end
+        else:
+            ops.append([COPY, start, end])
+        expected = end
+    if literal:
+        ops.append([INSERT, ''.join(literal)])
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    # An empty delta records a version identical to its base (e.g. a 304 revalidation).
+    if not delta:
+        return base
+    return ''.join(_apply_chunks(split_chunks(base), delta))
+
+
+def reconstruct(keyframe: bytes, deltas: Sequence[bytes]) -> str:
+    # Deltas are applied to chunk lists, so the page is split once rather than once per version.
+    chunks = split_chunks(decompress_keyframe(keyframe))
+    for delta in deltas:
+        if delta:
+            chunks = _apply_chunks(chunks, delta)
+    return ''.join(chunks)
+
+
+def _apply_chunks(base_chunks: List[str], delta: bytes) -> List[str]:
+    # Literals are whole target chunks, so the result is exactly split_chunks() of the target.
+    chunks = []
+    for op in json.loads(zlib.decompress(delta)):
+        if op[0] == COPY:
+            chunks.extend(base_chunks[op[1]:op[2]])
+        else:
+            chunks.extend(split_chunks(op[1]))
+    return chunks
@@ -0,0 +1,92 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .crawler import normalize_url
+from .url_seen import FingerprintSet
+
+DEFAULT_MAX_URL_LENGTH = 200
+INVALID_SAMPLE_SIZE = 20
+
+
+class URLBatch:
+    # Normalizes and de-duplicates submitted URLs one line at a time, so an uploaded list of
+    # any size is never held in memory. Lines may be bare URLs or CSV rows with the URL first.
+    def __init__(self, max_length: int = DEFAULT_MAX_URL_LENGTH):
+        self.max_length = max_length
+        self.seen = FingerprintSet()
+        self.accepted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.invalid_samples = []
+
+    def add(self, line: Union[str, bytes]) -> Optional[str]:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        elif not isinstance(line, str):
+            line = str(line)
+        raw = line.strip().lstrip('﻿')
+        if not raw or raw.startswith('#'):
+            return None
+        raw = raw.split(',', 1)[0].strip().strip('"\'')
+
+        url = normalize_url(raw)
+        if url is None or len(url) > self.max_length:
+            self.invalid += 1
+            if len(self.invalid_samples) < INVALID_SAMPLE_SIZE:
+                self.invalid_samples.append(raw[:self.max_length])
+            return None
+        if not self.seen.add(url):
+            self.duplicates += 1
+            return None
+        self.accepted += 1
+        return url
+
+    def iter_urls(self, lines: Iterable[Union[str, bytes]]) -> Iterator[str]:
+        for line in lines:
+            url = self.add(line)
+            if url is not None:
+                yield url
+
+    def summary(self) -> Dict:
+        return {
+            'accepted': self.accepted,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'invalid_samples': self.invalid_samples,
+        }
+
+
+class StagedURLs:
+    # Accepted URLs of a submitted batch, held in a Redis list until a worker creates the jobs,
+    # so the request only pays for validation.
+    def __init__(self, redis_client, key: str, ttl: int = 24 * 3600):
+        self.redis = redis_client
+        self.key = key
+        self.ttl = ttl
+
+    def extend(self, urls: Iterable[str], chunk_size: int = 1000) -> int:
+        staged = 0
+        chunk = []
+        for url in urls:
+            chunk.append(url)
+            if len(chunk) >= chunk_size:
+                staged += self._push(chunk)
+                chunk = []
+        if chunk:
+            staged += self._push(chunk)
+        return staged
+
+    def peek(self, count: int) -> List[str]:
+        return [url.decode('utf-8') for url in self.redis.lrange(self.key, 0, count - 1)]
+
+    def discard(self, count: int):
+        self.redis.ltrim(self.key, count, -1)
+
+    def clear(self):
+        self.redis.delete(self.key)
+
+    def _push(self, chunk: List[str]) -> int:
+        pipeline = self.redis.pipeline()
+        pipeline.rpush(self.key, *chunk)
+        pipeline.expire(self.key, self.ttl)
+        pipeline.execute()
+        return len(chunk)
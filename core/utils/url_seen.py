@@ -0,0 +1,188 @@
+import math
+import struct
+from array import array
+from hashlib import blake2b
+from typing import Optional
+
+SEEN_SET_KINDS = ('exact', 'bloom')
+DEFAULT_ERROR_RATE = 0.001
+DEFAULT_BLOOM_CAPACITY = 100000
+
+_EXACT_TAG = b'F'
+_BLOOM_TAG = b'B'
+
+
+def url_fingerprint(url: str) -> int:
+    # 0 marks an empty slot in FingerprintSet, so it is never a valid fingerprint.
+    return int.from_bytes(blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class FingerprintSet:
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size * self.MAX_LOAD < capacity:
+            size <<= 1
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def add(self, url: str) -> bool:
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def add_fingerprint(self, fingerprint: int) -> bool:
+        if (self._count + 1) > len(self._slots) * self.MAX_LOAD:
+            self._grow()
+        index = self._probe(fingerprint)
+        if self._slots[index] == fingerprint:
+            return False
+        self._slots[index] = fingerprint
+        self._count += 1
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        fingerprint = url_fingerprint(url)
+        return self._slots[self._probe(fingerprint)] == fingerprint
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return self._slots.itemsize * len(self._slots)
+
+    def to_bytes(self) -> bytes:
+        return _EXACT_TAG + struct.pack('<Q', self._count) + self._slots.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'FingerprintSet':
+        seen = cls.__new__(cls)
+        (seen._count,) = struct.unpack_from('<Q', data, 1)
+        seen._slots = array('Q')
+        seen._slots.frombytes(data[9:])
+        seen._mask = len(seen._slots) - 1
+        return seen
+
+    def _probe(self, fingerprint: int) -> int:
+        slots = self._slots
+        index = fingerprint & self._mask
+        while True:
+            current = slots[index]
+            if current == 0 or current == fingerprint:
+                return index
+            index = (index + 1) & self._mask
+
+    def _grow(self):
+        old_slots = self._slots
+        self._slots = array('Q', bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+        for fingerprint in old_slots:
+            if fingerprint:
+                self._slots[self._probe(fingerprint)] = fingerprint
+
+
+class _BloomStage:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, first: int, second: int):
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.bit_count
+
+    def add(self, first: int, second: int):
+        for position in self._positions(first, second):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains(self, first: int, second: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(first, second))
+
+
+class ScalableBloomFilter:
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int = DEFAULT_BLOOM_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self._stages = []
+        self._count = 0
+
+    def add(self, url: str) -> bool:
+        hashes = self._hashes(url)
+        if any(stage.contains(*hashes) for stage in self._stages):
+            return False
+        if not self._stages or self._stages[-1].count >= self._stages[-1].capacity:
+            self._add_stage()
+        self._stages[-1].add(*hashes)
+        self._count += 1
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        hashes = self._hashes(url)
+        return any(stage.contains(*hashes) for stage in self._stages)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(stage.bits) for stage in self._stages)
+
+    def to_bytes(self) -> bytes:
+        parts = [
+            _BLOOM_TAG,
+            struct.pack('<QdQI', self.initial_capacity, self.error_rate, self._count, len(self._stages)),
+        ]
+        for stage in self._stages:
+            parts.append(struct.pack('<QQ', stage.capacity, stage.count))
+            parts.append(bytes(stage.bits))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ScalableBloomFilter':
+        initial_capacity, error_rate, count, stage_count = struct.unpack_from('<QdQI', data, 1)
+        bloom = cls(initial_capacity, error_rate)
+        bloom._count = count
+        offset = 1 + struct.calcsize('<QdQI')
+        for _ in range(stage_count):
+            bloom._add_stage()
+            stage = bloom._stages[-1]
+            _, stage.count = struct.unpack_from('<QQ', data, offset)
+            offset += 16
+            stage.bits = bytearray(data[offset:offset + len(stage.bits)])
+            offset += len(stage.bits)
+        return bloom
+
+    def _add_stage(self):
+        index = len(self._stages)
+        capacity = self.initial_capacity * (self.GROWTH ** index)
+        # Each stage gets a tighter error rate so the compound rate stays below error_rate.
+        error_rate = self.error_rate * (1 - self.TIGHTENING) * (self.TIGHTENING ** index)
+        self._stages.append(_BloomStage(capacity, error_rate))
+
+    @staticmethod
+    def _hashes(url: str):
+        digest = blake2b(url.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+def create_seen_set(kind: str = 'exact', error_rate: float = DEFAULT_ERROR_RATE, capacity: Optional[int] = None):
+    if kind == 'exact':
+        return FingerprintSet(capacity or 1024)
+    if kind == 'bloom':
+        return ScalableBloomFilter(capacity or DEFAULT_BLOOM_CAPACITY, error_rate)
+    raise ValueError(f"Unknown seen-set kind '{kind}'")
+
+
+def load_seen_set(data: bytes):
+    if data[:1] == _EXACT_TAG:
+        return FingerprintSet.from_bytes(data)
+    if data[:1] == _BLOOM_TAG:
+        return ScalableBloomFilter.from_bytes(data)
+    raise ValueError('Unrecognized seen-set encoding')
@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import zipfile
+from pathlib import PurePosixPath
+from typing import Iterator
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+
+CHUNK_SIZE = 64 * 1024
+# Formats that are compressed already; deflating them again costs CPU and saves nothing.
+STORED_EXTENSIONS = frozenset((
+    '.7z', '.avif', '.br', '.gif', '.gz', '.heic', '.jpeg', '.jpg', '.m4a', '.mp3', '.mp4', '.ogg',
+    '.png', '.webm', '.webp', '.woff', '.woff2', '.zip', '.zst',
+))
+
+
+class _StreamBuffer(io.RawIOBase):
+    # Write-only and unseekable, so zipfile emits data descriptors instead of seeking back to
+    # patch local headers; the generator drains what was written after every chunk.
+    def __init__(self):
+        self.chunks = []
+        self.pending = 0
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.pending += len(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.pending = 0
+        return data
+
+
+def iter_result_zip(result, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    # The archive is produced while it is read: memory holds one chunk per entry, never the
+    # archive or an asset, so it can feed a StreamingHttpResponse or be written to a file.
+    buffer = _StreamBuffer()
+    date_time = result.created_at.timetuple()[:6]
+    manifest = []
+    missing = []
+    seen = set()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, text in (('index.html', result.html), ('content.txt', result.content)):
+            yield from _write_entry(archive, buffer, _entry(name, date_time), io.BytesIO(text.encode('utf-8')), chunk_size)
+
+        for asset in result.asset_details.order_by('id').iterator():
+            source_name = asset.file_path.name if asset.file_path else ''
+            archive_name = f'assets/{asset.asset_type}/{PurePosixPath(source_name).name}'
+            entry = {'url': asset.url, 'type': asset.asset_type, 'size': asset.file_size}
+            try:
+                source = _open_asset(source_name)
+            except (OSError, SuspiciousFileOperation, ValueError):
+                missing.append(entry)
+                continue
+            entry['path'] = archive_name
+            manifest.append(entry)
+            if archive_name in seen:
+                # One stored file referenced under several URLs is archived once.
+                source.close()
+                continue
+            seen.add(archive_name)
+            info = _entry(archive_name, date_time, stored=_is_compressed(archive_name), size=asset.file_size)
+            with source:
+                yield from _write_entry(archive, buffer, info, source, chunk_size)
+
+        metadata = {
+            'url': result.job.url,
+            'harvested_at': result.created_at.isoformat(),
+            'content_hash': result.content_hash,
+            'technologies': result.technologies,
+            'frontend_framework': result.frontend_framework,
+            'css_framework': result.css_framework,
+            'metadata': result.metadata,
+            'structured_data': result.structured_data,
+            'links': result.links,
+            'assets': manifest,
+            'missing_assets': missing,
+        }
+        body = json.dumps(metadata, indent=2, default=str).encode('utf-8')
+        yield from _write_entry(archive, buffer, _entry('metadata.json', date_time), io.BytesIO(body), chunk_size)
+    # Closing the archive writes the central directory.
+    yield buffer.drain()
+
+
+def _entry(name, date_time, stored=False, size=0) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=date_time)
+    info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    # zipfile decides on ZIP64 headers from the expected size before any data is written.
+    info.file_size = size
+    return info
+
+
+def _write_entry(archive, buffer, info, source, chunk_size) -> Iterator[bytes]:
+    with archive.open(info, 'w') as target:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            target.write(chunk)
+            if buffer.pending >= chunk_size:
+                yield buffer.drain()
+    if buffer.pending:
+        yield buffer.drain()
+
+
+def _open_asset(name):
+    # Downloaded assets are recorded by their path on disk; other names belong to the storage.
+    if not name:
+        raise ValueError('asset has no stored file')
+    if os.path.exists(name):
+        return open(name, 'rb')
+    return default_storage.open(name, 'rb')
+
+
+def _is_compressed(name: str) -> bool:
+    return PurePosixPath(name).suffix.lower() in STORED_EXTENSIONS
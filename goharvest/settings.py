@@ -192,7 +192,78 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Redis emulates priorities with one list per step; 0 is served first. Jobs map onto steps
+# from HarvestJob.priority (see core.tasks.harvest_priority). A prefetch of one keeps a
+# worker from reserving low-priority messages ahead of urgent ones.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    'visibility_timeout': 3600,
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Harvest stages run on separate queues so each worker pool can be sized to its bottleneck:
+# browser (Playwright), io (network and database) and cpu (parsing and packaging).
+CELERY_TASK_ROUTES = {
+    'core.tasks.fetch_page': {'queue': 'browser'},
+    'core.tasks.analyze_performance': {'queue': 'browser'},
+    'core.tasks.check_for_changes': {'queue': 'browser'},
+    'core.tasks.dedup_page': {'queue': 'cpu'},
+    'core.tasks.process_page': {'queue': 'cpu'},
+    'core.tasks.create_zip_export': {'queue': 'cpu'},
+    'core.tasks.download_assets': {'queue': 'io'},
+    'core.tasks.store_result': {'queue': 'io'},
+    'core.tasks.perform_ai_analysis': {'queue': 'io'},
+    'core.tasks.finish_pipeline': {'queue': 'io'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'purge-unreferenced-asset-blobs': {
+        'task': 'core.tasks.purge_unreferenced_asset_blobs',
+        'schedule': 3600.0,
+    },
+    'enqueue-scheduled-harvests': {
+        'task': 'core.tasks.enqueue_scheduled_harvests',
+        'schedule': 60.0,
+    },
+    'flush-batch-counters': {
+        'task': 'core.tasks.flush_batch_counters',
+        'schedule': 10.0,
+    },
+    'run-recurring-harvests': {
+        'task': 'core.tasks.run_recurring_harvests',
+        'schedule': 60.0,
+    },
+}
+
 
+# Harvesting
+# Seconds between fetches to one host when robots.txt sets no Crawl-delay.
+HARVEST_DEFAULT_CRAWL_DELAY = float(os.getenv('HARVEST_DEFAULT_CRAWL_DELAY', '1'))
+HARVEST_POLITENESS_BURST = int(os.getenv('HARVEST_POLITENESS_BURST', '1'))
+# Every HARVEST_FAIR_SHARE jobs a user already has queued push their next job one priority
+# step down, so a large batch cannot hold back other users' jobs of the same priority.
+HARVEST_FAIR_SHARE = int(os.getenv('HARVEST_FAIR_SHARE', '100'))
+# Jobs scheduled further ahead than this wait in the database instead of as broker ETAs,
+# which must stay below the broker visibility timeout.
+HARVEST_ETA_HORIZON = int(os.getenv('HARVEST_ETA_HORIZON', '3000'))
+# URLs per Redis push, bulk_create and publishing round when a batch is submitted.
+HARVEST_BATCH_CHUNK_SIZE = int(os.getenv('HARVEST_BATCH_CHUNK_SIZE', '1000'))
+# Recurring jobs fire at a stable per-job offset within this many seconds after their cron
+# time, so identical schedules do not all start at once.
+HARVEST_SCHEDULE_JITTER = int(os.getenv('HARVEST_SCHEDULE_JITTER', '900'))
+# Recurring jobs one scheduler tick fires at most; the rest wait for the next tick.
+HARVEST_SCHEDULER_BATCH = int(os.getenv('HARVEST_SCHEDULER_BATCH', '500'))
+# Snapshot versions stored as deltas before the next full keyframe; bounds reconstruction work.
+HARVEST_SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv('HARVEST_SNAPSHOT_KEYFRAME_INTERVAL', '24'))
+# Result HTML/content of at least HARVEST_BLOB_MIN_SIZE bytes is stored zstd-compressed outside the
+# database, on the local filesystem or in an S3-compatible bucket (credentials from AWS_* variables).
+HARVEST_BLOB_BACKEND = os.getenv('HARVEST_BLOB_BACKEND', 'local')  # 'local' or 's3'
+HARVEST_BLOB_ROOT = os.getenv('HARVEST_BLOB_ROOT', str(BASE_DIR / 'media' / 'harvests' / 'blobs'))
+HARVEST_BLOB_S3_BUCKET = os.getenv('HARVEST_BLOB_S3_BUCKET', '')
+HARVEST_BLOB_S3_ENDPOINT_URL = os.getenv('HARVEST_BLOB_S3_ENDPOINT_URL', '')
+HARVEST_BLOB_S3_PREFIX = os.getenv('HARVEST_BLOB_S3_PREFIX', 'harvests/blobs')
+HARVEST_BLOB_MIN_SIZE = int(os.getenv('HARVEST_BLOB_MIN_SIZE', '8192'))
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def blob_root(settings, tmp_path):
+    # Offloaded result HTML/content never lands in the project's media directory.
+    settings.HARVEST_BLOB_ROOT = str(tmp_path / 'blobs')
+    return tmp_path / 'blobs'
+
+
+class RecordingRedis:
+    def __init__(self):
+        self.hashes = defaultdict(dict)
+        self.sets = defaultdict(set)
+        self.lists = defaultdict(list)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def hincrby(self, key, field, amount):
+        self.hashes[key][field.encode()] = self.hashes[key].get(field.encode(), 0) + amount
+
+    def expire(self, key, ttl):
+        pass
+
+    def sadd(self, key, *members):
+        self.sets[key].update(member.encode() for member in members)
+
+    def spop(self, key, count):
+        return [self.sets[key].pop() for _ in range(min(count, len(self.sets[key])))]
+
+    def hgetall(self, key):
+        return {field: str(value).encode() for field, value in self.hashes[key].items()}
+
+    def rpush(self, key, *values):
+        self.lists[key].extend(value.encode() for value in values)
+
+    def lrange(self, key, start, end):
+        return self.lists[key][start:end + 1]
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists[key][start:]
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+        self.hashes.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    # Stands in for the django-redis connection used by tasks and the batch status signal.
+    from core import signals, tasks
+
+    redis = RecordingRedis()
+    monkeypatch.setattr(tasks, 'get_redis_connection', lambda alias: redis)
+    monkeypatch.setattr(signals, 'get_redis_connection', lambda alias: redis)
+    return redis
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import os
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.utils import asset_downloader
+from core.utils.asset_downloader import AssetDownloader
+from core.utils.asset_store import ContentAddressedStore
+
+BODY = os.urandom(300 * 1024)
+HALF = len(BODY) // 2
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(asset_downloader, 'ASSET_RETRY_BACKOFF', 0)
+
+
+def _download(tmp_path, responses, assets=('/asset.bin',), **options):
+    # Serves the handlers in `responses` in turn and records the headers of every request.
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.headers))
+        return await responses[len(requests) - 1](request)
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/{name}', handler)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                downloader = AssetDownloader(
+                    str(server.make_url('/')),
+                    [{'url': str(server.make_url(path)), 'type': 'other'} for path in assets],
+                    session=session,
+                    store=ContentAddressedStore(tmp_path),
+                    **options,
+                )
+                return await downloader.download(), downloader
+        finally:
+            await server.close()
+
+    results, downloader = asyncio.run(run())
+    return results, downloader, requests
+
+
+def _full(request, body=BODY, headers=None):
+    return web.Response(body=body, headers={'Accept-Ranges': 'bytes', 'ETag': '"v1"', **(headers or {})})
+
+
+async def _dropped(request, headers=None):
+    # Sends the headers and half of the body, then drops the connection.
+    response = web.StreamResponse(headers={'Content-Length': str(len(BODY)), 'ETag': '"v1"', **(headers or {})})
+    await response.prepare(request)
+    await response.write(BODY[:HALF])
+    # Let the client read the half before the close; aiohttp drops buffered data on a payload error.
+    await asyncio.sleep(0.2)
+    request.transport.close()
+    return response
+
+
+def _range(offset):
+    async def handler(request):
+        return web.Response(
+            status=206,
+            body=BODY[offset:],
+            headers={'Content-Range': f'bytes {offset}-{len(BODY) - 1}/{len(BODY)}', 'ETag': '"v1"'},
+        )
+    return handler
+
+
+def _stored(tmp_path):
+    return sorted(path.name for path in tmp_path.rglob('*') if path.is_file())
+
+
+def test_retryable_status_is_retried(tmp_path):
+    async def unavailable(request):
+        return web.Response(status=503, headers={'Retry-After': '0'})
+
+    async def ok(request):
+        return _full(request)
+
+    (result,), downloader, requests = _download(tmp_path, [unavailable, ok])
+
+    assert result['status'] == 'success'
+    assert result['sha256'] == hashlib.sha256(BODY).hexdigest()
+    assert downloader.stats()['retries'] == 1
+    assert len(requests) == 2
+
+
+def test_retry_after_sets_a_floor_under_the_backoff():
+    assert AssetDownloader._backoff(1, retry_after=3) >= 3
+    assert AssetDownloader._backoff(1, retry_after=3600) == asset_downloader.ASSET_RETRY_MAX_DELAY
+
+
+def test_dropped_body_resumes_with_a_range_request(tmp_path):
+    async def dropped(request):
+        return await _dropped(request, {'Accept-Ranges': 'bytes'})
+
+    (result,), downloader, requests = _download(tmp_path, [dropped, _range(HALF)])
+
+    assert result['status'] == 'success'
+    assert result['sha256'] == hashlib.sha256(BODY).hexdigest()
+    assert open(result['file_path'], 'rb').read() == BODY
+    assert requests[1]['Range'] == f'bytes={HALF}-'
+    assert requests[1]['If-Range'] == '"v1"'
+    assert downloader.stats()['resumed'] == 1
+    assert downloader.stats()['bytes_downloaded'] == len(BODY)
+
+
+def test_range_response_at_the_wrong_offset_restarts_the_download(tmp_path):
+    async def dropped(request):
+        return await _dropped(request, {'Accept-Ranges': 'bytes'})
+
+    async def ok(request):
+        return _full(request)
+
+    (result,), downloader, requests = _download(tmp_path, [dropped, _range(0), ok])
+
+    assert result['status'] == 'success'
+    assert open(result['file_path'], 'rb').read() == BODY
+    assert 'Range' not in requests[2]
+    assert downloader.stats()['resumed'] == 0
+    assert _stored(tmp_path) == [f'{result["sha256"]}.bin']
+
+
+def test_restarted_download_is_charged_to_the_budget_once(tmp_path):
+    # Without Accept-Ranges the retry is a plain GET; the dropped half is given back to the budget.
+    async def ok(request):
+        return _full(request, headers={'Accept-Ranges': 'none'})
+
+    (result,), downloader, requests = _download(
+        tmp_path, [_dropped, ok], byte_budget=len(BODY) + HALF // 2,
+    )
+
+    assert result['status'] == 'success'
+    assert 'Range' not in requests[1]
+    assert downloader.stats()['bytes_downloaded'] == len(BODY)
+
+
+def test_asset_over_the_size_cap_is_skipped_with_or_without_content_length(tmp_path):
+    async def declared(request):
+        return _full(request)
+
+    async def chunked(request):
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for start in range(0, len(BODY), 64 * 1024):
+            await response.write(BODY[start:start + 64 * 1024])
+        await response.write_eof()
+        return response
+
+    for handler in (declared, chunked):
+        (result,), downloader, _ = _download(tmp_path, [handler], max_asset_bytes=100 * 1024)
+        assert result['status'] == 'skipped'
+        assert result['error'] == f'Asset exceeds {100 * 1024} bytes'
+        assert _stored(tmp_path) == []
+    # Nothing was written for the declared size; the chunked body stopped at the cap.
+    assert downloader.stats()['bytes_downloaded'] <= 100 * 1024
+
+
+def test_assets_beyond_the_job_budget_are_skipped(tmp_path):
+    async def ok(request):
+        return _full(request, body=BODY + request.path.encode())
+
+    results, downloader, requests = _download(
+        tmp_path, [ok, ok], assets=('/a.bin', '/b.bin'), concurrency=1, byte_budget=len(BODY) + 1000,
+    )
+    assert [result['status'] for result in results] == ['success', 'skipped']
+    assert results[1]['error'] == 'Job asset byte budget exhausted'
+    assert downloader.stats()['bytes_downloaded'] == len(BODY) + len('/a.bin')
+    assert _stored(tmp_path) == [f'{results[0]["sha256"]}.bin']
+
+    # Once the budget is spent, later assets are skipped without a request.
+    results, _, requests = _download(
+        tmp_path / 'spent', [ok], assets=('/a.bin', '/b.bin'), concurrency=1, byte_budget=len(BODY) + len('/a.bin'),
+    )
+    assert [result['status'] for result in results] == ['success', 'skipped']
+    assert len(requests) == 1
+
+
+def test_failed_downloads_leave_no_partial_files(tmp_path):
+    async def missing(request):
+        return web.Response(status=404)
+
+    (result,), _, _ = _download(tmp_path, [missing])
+    assert (result['status'], result['error']) == ('failed', 'HTTP 404')
+
+    (result,), _, requests = _download(tmp_path, [_dropped, _dropped], max_retries=1)
+    assert result['status'] == 'failed'
+    assert result['attempts'] == 2
+    assert len(requests) == 2
+    assert _stored(tmp_path) == []
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from core.models import AssetBlob
+from core.tasks import purge_unreferenced_asset_blobs
+from core.utils.asset_store import ContentAddressedStore, is_immutable_url
+
+
+def test_is_immutable_url_recognizes_fingerprinted_and_versioned_urls():
+    assert is_immutable_url('https://cdn.example.com/static/app.3f9a2c1b.js')
+    assert is_immutable_url('https://cdn.example.com/assets/main-5KX2QW7R.css')
+    assert is_immutable_url('https://cdn.jsdelivr.net/npm/react@18.2.0/umd/react.production.min.js')
+    assert is_immutable_url('https://cdnjs.cloudflare.com/ajax/libs/jquery/3.7.1/jquery.min.js')
+    assert is_immutable_url('https://example.com/style.css?ver=6.4.2')
+    assert not is_immutable_url('https://example.com/images/hero-background.jpg')
+    assert not is_immutable_url('https://example.com/wp-content/uploads/2023/05/photo.jpg')
+
+
+def test_is_immutable_url_ignores_dates_counters_and_sizes_in_names():
+    assert not is_immutable_url('https://example.com/uploads/photo-1024x768.jpg')
+    assert not is_immutable_url('https://example.com/uploads/IMG_20230501.jpg')
+    assert not is_immutable_url('https://example.com/img/banner_12345678.png')
+    assert not is_immutable_url('https://example.com/docs/guide-FEATURES.pdf')
+
+
+def test_store_keeps_one_copy_of_identical_content(tmp_path):
+    store = ContentAddressedStore(tmp_path)
+    digest = 'ab' * 32
+    paths = []
+    for name in ('first.part', 'second.part'):
+        temp_path = tmp_path / name
+        temp_path.write_bytes(b'same bytes')
+        paths.append(asyncio.run(store.commit(temp_path, digest, '.js')))
+
+    assert paths[0] == paths[1] == tmp_path / 'ab' / f'{digest}.js'
+    assert paths[0].read_bytes() == b'same bytes'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['ab']
+
+
+def test_store_reuses_the_stored_file_for_another_extension_and_restores_missing_files(tmp_path):
+    store = ContentAddressedStore(tmp_path)
+    digest = 'cd' * 32
+    paths = []
+    for name, extension in (('first.part', '.jpg'), ('second.part', '.jpeg')):
+        temp_path = tmp_path / name
+        temp_path.write_bytes(b'same image')
+        paths.append(asyncio.run(store.commit(temp_path, digest, extension)))
+    assert paths == [tmp_path / 'cd' / f'{digest}.jpg'] * 2
+    assert [p.name for p in (tmp_path / 'cd').iterdir()] == [f'{digest}.jpg']
+
+    # A purge removed the file after an earlier harvest found it; committing writes it again.
+    paths[0].unlink()
+    temp_path = tmp_path / 'third.part'
+    temp_path.write_bytes(b'same image')
+    assert asyncio.run(store.commit(temp_path, digest, '.jpg')).read_bytes() == b'same image'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_purge_keeps_blobs_whose_file_was_just_committed(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    hour_ago = time.time() - 7200
+    blobs = []
+    for digest in ('ab' * 32, 'cd' * 32):
+        path = tmp_path / 'harvests' / 'assets' / digest[:2] / f'{digest}.png'
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b'image')
+        blobs.append(AssetBlob.objects.create(sha256=digest, file_path=f'harvests/assets/{digest[:2]}/{digest}.png', size=5))
+    AssetBlob.objects.update(created_at=timezone.now() - timedelta(hours=2))
+    os.utime(tmp_path / 'harvests' / 'assets' / 'ab' / f'{"ab" * 32}.png', (hour_ago, hour_ago))
+
+    assert purge_unreferenced_asset_blobs() == {'purged': 1}
+    assert list(AssetBlob.objects.values_list('sha256', flat=True)) == ['cd' * 32]
+    assert not (tmp_path / blobs[0].file_path.name).exists()
+    assert (tmp_path / blobs[1].file_path.name).exists()
@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from api import viewsets
+from core.models import HarvestBatch
+
+BATCH_URL = '/api/jobs/batch/'
+
+
+@pytest.fixture
+def client(db, fake_redis, monkeypatch):
+    queued = []
+    monkeypatch.setattr(viewsets.create_batch_jobs, 'delay', queued.append)
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.create_user('batcher', password='secret'))
+    client.queued = queued
+    return client
+
+
+def _staged(redis):
+    return {key: [url.decode() for url in urls] for key, urls in redis.lists.items() if urls}
+
+
+def test_json_list_is_staged_and_summarised(client, fake_redis):
+    response = client.post(BATCH_URL, {
+        'urls': ['https://example.com/a', 'HTTPS://Example.com/b', 'https://example.com/a', 'not a url'],
+        'options': {'mode': 'content'},
+        'priority': 10,
+    }, format='json')
+
+    assert response.status_code == 202
+    body = response.json()
+    assert (body['accepted'], body['duplicates'], body['invalid']) == (2, 1, 1)
+    batch = HarvestBatch.objects.get(id=body['batch_id'])
+    assert (batch.total, batch.priority, batch.options) == (2, 10, {'mode': 'content'})
+    assert client.queued == [body['batch_id']]
+    assert _staged(fake_redis) == {
+        f'goharvest:batch:{body["batch_id"]}:urls': ['https://example.com/a', 'https://example.com/b'],
+    }
+
+
+def test_multipart_upload_reads_one_url_per_line(client, fake_redis):
+    upload = SimpleUploadedFile('urls.csv', b'url,label\nhttps://example.com/x,first\n\nhttps://example.com/y,second\n')
+    response = client.post(BATCH_URL, {'file': upload, 'options': '{"fetch": "http"}'}, format='multipart')
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body['accepted'] == 2
+    assert HarvestBatch.objects.get(id=body['batch_id']).options == {'fetch': 'http'}
+    assert list(_staged(fake_redis).values()) == [['https://example.com/x', 'https://example.com/y']]
+
+
+def test_input_without_valid_urls_is_rejected_and_leaves_nothing_staged(client, fake_redis):
+    assert client.post(BATCH_URL, {'urls': []}, format='json').status_code == 400
+
+    response = client.post(BATCH_URL, {'urls': ['not a url', 'ftp://example.com/']}, format='json')
+    assert response.status_code == 400
+    assert response.json()['invalid'] == 2
+    assert not HarvestBatch.objects.exists()
+    assert _staged(fake_redis) == {}
+    assert client.queued == []
+
+
+def test_unknown_priority_is_rejected(client, fake_redis):
+    response = client.post(BATCH_URL, {'urls': ['https://example.com/'], 'priority': 3}, format='json')
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'priority must be 1, 5 or 10.'}
+    response = client.post(BATCH_URL, {'urls': ['https://example.com/'], 'priority': 'high'}, format='json')
+    assert response.status_code == 400
+    assert _staged(fake_redis) == {}
+
+
+def test_invalid_harvest_options_are_rejected(client, fake_redis):
+    response = client.post(BATCH_URL, {'urls': ['https://example.com/'], 'options': {'engine': 'regex'}}, format='json')
+    assert response.status_code == 400
+    assert 'engine' in response.json()['options']
+    assert _staged(fake_redis) == {}
@@ -0,0 +1,137 @@
+import contextlib
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from core import tasks
+from core.models import HarvestBatch, HarvestJob
+from core.utils.batch_progress import BatchCounters, pop_dirty_batches
+from tests.conftest import RecordingRedis
+
+
+def test_transitions_move_jobs_between_counters():
+    redis = RecordingRedis()
+    counters = BatchCounters(redis, 'batch-1')
+    counters.add({'pending': 3})
+
+    counters.transition('pending', 'running')
+    counters.transition('running', 'running')
+    counters.transition('running', 'completed', bytes_harvested=2048)
+    counters.transition('pending', 'scheduled')
+    counters.transition('pending', 'failed')
+
+    assert counters.load() == {
+        'pending': 1,
+        'running': 0,
+        'completed': 1,
+        'failed': 1,
+        'cancelled': 0,
+        'bytes_harvested': 2048,
+    }
+    assert pop_dirty_batches(redis) == ['batch-1']
+    assert pop_dirty_batches(redis) == []
+
+
+def test_unknown_batch_has_no_counters():
+    assert BatchCounters(RecordingRedis(), 'missing').load() is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retried_batch_chunk_creates_and_publishes_each_job_once(monkeypatch, settings, fake_redis):
+    settings.HARVEST_BATCH_CHUNK_SIZE = 4
+    redis = fake_redis
+    monkeypatch.setattr(tasks.harvest_website.app, 'producer_or_acquire', contextlib.nullcontext)
+    published = []
+
+    def enqueue(job, backlog=None, producer=None):
+        if len(published) == 6 and not getattr(enqueue, 'failed', False):
+            enqueue.failed = True
+            raise ConnectionError('broker went away')
+        published.append(job.url)
+
+    monkeypatch.setattr(tasks, 'enqueue_harvest', enqueue)
+    batch = HarvestBatch.objects.create(total=10)
+    urls = [f'https://example.com/{index}' for index in range(10)]
+    tasks.staged_batch_urls(batch.id).extend(urls)
+
+    with pytest.raises(ConnectionError):
+        tasks.create_batch_jobs.run(batch.id)
+    assert tasks.create_batch_jobs.run(batch.id) == {'batch_id': str(batch.id), 'created': 10}
+
+    assert sorted(HarvestJob.objects.values_list('url', flat=True)) == sorted(urls)
+    assert sorted(published) == sorted(urls)
+    assert not HarvestJob.objects.filter(enqueued_at=None).exists()
+    assert BatchCounters(redis, batch.id).load()['pending'] == 10
+
+    # A retry after a chunk was created but before its URLs left the staging list.
+    tasks.staged_batch_urls(batch.id).extend(urls)
+    assert tasks.create_batch_jobs.run(batch.id)['created'] == 10
+    assert len(published) == 10
+    assert BatchCounters(redis, batch.id).load()['pending'] == 10
+
+
+@pytest.mark.django_db(transaction=True)
+def test_job_status_changes_move_batch_counters_after_commit(fake_redis):
+    batch = HarvestBatch.objects.create(total=2)
+    counters = BatchCounters(fake_redis, batch.id)
+    job = HarvestJob.objects.create(url='https://example.com/a', batch=batch)
+    HarvestJob.objects.create(url='https://example.com/b', batch=batch)
+    assert counters.load()['pending'] == 2
+
+    with transaction.atomic():
+        job.status = 'running'
+        job.save(update_fields=['status'])
+        assert counters.load()['running'] == 0
+    assert (counters.load()['pending'], counters.load()['running']) == (1, 1)
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            job.status = 'failed'
+            job.save()
+            raise RuntimeError('rolled back')
+    assert counters.load()['failed'] == 0
+
+    # A job loaded later starts from its stored status; saves that skip the status count nothing.
+    job = HarvestJob.objects.get(pk=job.pk)
+    job.metrics = {'pipeline': {'bytes_harvested': 4096}}
+    job.save(update_fields=['metrics'])
+    job.status = 'completed'
+    job.save(update_fields=['status', 'metrics'])
+    assert counters.load() == {
+        'pending': 1,
+        'running': 0,
+        'completed': 1,
+        'failed': 0,
+        'cancelled': 0,
+        'bytes_harvested': 4096,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_progress_reads_live_counters_then_the_flushed_row(fake_redis):
+    user = get_user_model().objects.create_user('watcher')
+    client = APIClient()
+    client.force_authenticate(user)
+    batch = HarvestBatch.objects.create(user=user, total=3)
+    counters = BatchCounters(fake_redis, batch.id)
+    counters.add({'pending': 3})
+    counters.transition('pending', 'completed', bytes_harvested=100)
+    url = f'/api/batches/{batch.id}/progress/'
+
+    live = client.get(url).json()
+    assert (live['pending'], live['completed'], live['bytes_harvested']) == (2, 1, 100)
+    # Nothing has been flushed to the row yet.
+    assert HarvestBatch.objects.get(pk=batch.pk).pending == 0
+
+    counters.transition('pending', 'failed')
+    counters.transition('pending', 'cancelled')
+    assert tasks.flush_batch_counters() == {'flushed': 1}
+    # Once the Redis hash has expired the flushed row answers with the same numbers.
+    fake_redis.delete(counters.key)
+    flushed = client.get(url).json()
+    assert {field: flushed[field] for field in ('pending', 'completed', 'failed', 'cancelled', 'bytes_harvested')} == {
+        'pending': 0, 'completed': 1, 'failed': 1, 'cancelled': 1, 'bytes_harvested': 100,
+    }
+    assert flushed['finished_at'] is not None
@@ -0,0 +1,53 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from core.models import HarvestJob, HarvestResult
+from core.utils.blob_store import BlobStore, LocalBlobBackend
+
+PAGE = '<html><body>' + ''.join(f'<p>Paragraph {index}</p>' for index in range(2000)) + '</body></html>'
+
+
+def test_store_compresses_and_deduplicates(tmp_path):
+    store = BlobStore(LocalBlobBackend(tmp_path))
+    key = store.put(PAGE)
+    assert store.put(PAGE) == key
+    assert store.get(key) == PAGE
+
+    stored = list(tmp_path.glob('*/*.zst'))
+    assert [path.name for path in stored] == [f'{key}.zst']
+    assert stored[0].stat().st_size * 10 < len(PAGE)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_large_values_move_out_of_the_row(blob_root):
+    job = HarvestJob.objects.create(url='https://example.com/')
+    result = HarvestResult.objects.create(job=job, html=PAGE, content='Short text')
+
+    row = HarvestResult.objects.values('html_inline', 'html_key', 'content_inline', 'content_key').get(pk=result.pk)
+    assert row['html_inline'] == '' and len(row['html_key']) == 64
+    assert row['content_inline'] == 'Short text' and row['content_key'] == ''
+    assert len(list(blob_root.glob('*/*.zst'))) == 1
+
+    loaded = HarvestResult.objects.get(pk=result.pk)
+    assert loaded.html == PAGE
+    loaded.html = '<p>replaced</p>'
+    loaded.save()
+    assert HarvestResult.objects.get(pk=result.pk).html == '<p>replaced</p>'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_offloads_existing_rows_in_batches():
+    results = []
+    for index in range(5):
+        job = HarvestJob.objects.create(url=f'https://example.com/{index}')
+        results.append(HarvestResult.objects.create(job=job))
+    # Rows written before offloading existed keep their HTML inline.
+    HarvestResult.objects.filter(pk__in=[result.pk for result in results[:3]]).update(html_inline=PAGE)
+
+    call_command('offload_result_blobs', '--batch-size', '2', stdout=io.StringIO())
+
+    assert HarvestResult.objects.exclude(html_key='').count() == 3
+    assert not HarvestResult.objects.filter(html_inline=PAGE).exists()
+    assert all(result.html == PAGE for result in HarvestResult.objects.exclude(html_key=''))
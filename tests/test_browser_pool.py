@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from core.utils import browser_pool
+from core.utils.browser_pool import BrowserPool
+
+
+class FakeContext:
+    def __init__(self, options):
+        self.options = options
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, playwright):
+        self.playwright = playwright
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def new_context(self, **options):
+        if self.playwright.context_failures:
+            self.playwright.context_failures -= 1
+            raise RuntimeError('Target page, context or browser has been closed')
+        context = FakeContext(options)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.context_failures = 0
+        self.stopped = False
+        self.chromium = self
+
+    async def launch(self, headless=True, args=None):
+        browser = FakeBrowser(self)
+        self.browsers.append(browser)
+        return browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr(browser_pool, 'async_playwright', lambda: fake)
+    return fake
+
+
+def _run(pool, body):
+    async def run():
+        try:
+            return await body()
+        finally:
+            await pool.close()
+    return asyncio.run(run())
+
+
+async def _checkout(pool, **options):
+    async with pool.context(**options) as context:
+        return context
+
+
+def test_disconnected_browser_is_relaunched(playwright):
+    pool = BrowserPool(size=1)
+
+    async def body():
+        await _checkout(pool)
+        playwright.browsers[0].connected = False
+        context = await _checkout(pool, user_agent='UA')
+        return context, pool.stats()
+
+    context, stats = _run(pool, body)
+    assert len(playwright.browsers) == 2
+    assert context in playwright.browsers[1].contexts and context.options == {'user_agent': 'UA'}
+    assert (stats['launches'], stats['restarts'], stats['jobs_served']) == (2, 1, 2)
+    assert playwright.stopped
+
+
+def test_browser_is_recycled_after_max_jobs(playwright, monkeypatch):
+    monkeypatch.setenv('BROWSER_POOL_MAX_JOBS_PER_BROWSER', '2')
+    pool = BrowserPool(size=1)
+
+    async def body():
+        for _ in range(3):
+            await _checkout(pool)
+        return pool.stats()
+
+    stats = _run(pool, body)
+    first, second = playwright.browsers
+    assert first.closed and len(first.contexts) == 2
+    assert len(second.contexts) == 1
+    # Recycling is a planned relaunch, not a restart after a failure.
+    assert (stats['launches'], stats['restarts']) == (2, 0)
+
+
+def test_context_is_closed_and_slot_returned_when_the_job_fails(playwright):
+    pool = BrowserPool(size=1)
+
+    async def body():
+        with pytest.raises(ValueError):
+            async with pool.context():
+                raise ValueError('scrape failed')
+        return pool.stats()
+
+    stats = _run(pool, body)
+    (context,) = playwright.browsers[0].contexts
+    assert context.closed
+    assert (stats['in_use'], stats['idle'], stats['jobs_served']) == (0, 1, 1)
+
+
+def test_failed_context_checkout_restarts_the_browser_once(playwright):
+    pool = BrowserPool(size=1)
+
+    async def body():
+        playwright.context_failures = 1
+        await _checkout(pool)
+        playwright.context_failures = 2
+        with pytest.raises(RuntimeError):
+            await _checkout(pool)
+        return pool.stats()
+
+    stats = _run(pool, body)
+    assert (stats['launches'], stats['restarts']) == (3, 2)
+    # The slot is usable again after a checkout that raised.
+    assert (stats['in_use'], stats['idle']) == (0, 1)
+
+
+def test_stats_report_utilization(playwright):
+    pool = BrowserPool(size=2)
+
+    async def body():
+        async with pool.context():
+            during = pool.stats()
+        return during, pool.stats()
+
+    during, after = _run(pool, body)
+    assert (during['in_use'], during['idle'], during['healthy'], during['utilization']) == (1, 1, 2, 0.5)
+    assert (after['in_use'], after['idle'], after['utilization']) == (0, 2, 0)
@@ -0,0 +1,59 @@
+from core.utils.change_detector import PageFingerprint, compare_fingerprints
+
+PAGE = '''<html><head><title>Shop</title><script nonce="{nonce}">track()</script></head><body>
+<nav><a href="/">Home</a></nav>
+<main>
+  <h1>Products</h1>
+  <p>Widget costs <b>{price}</b>.</p>
+  <p>Last updated {clock}</p>
+  <img src="/widget.png?v={version}" alt="Widget">
+  <ul><li>Red</li><li>Blue</li>{extra}</ul>
+  <input type="hidden" name="csrf" value="{csrf}">
+</main>
+<footer>Rendered at {clock}</footer>
+</body></html>'''
+
+
+def _page(price='$10', extra='', nonce='n0nce', clock='12:30 pm', version='1', csrf='a1b2c3d4e5f6a7b8c9d0e1f2a3b4'):
+    return PAGE.format(price=price, extra=extra, nonce=nonce, clock=clock, version=version, csrf=csrf)
+
+
+def test_volatile_markup_is_not_a_change():
+    before = PageFingerprint.from_html(_page())
+    after = PageFingerprint.from_html(_page(
+        nonce='other', clock='09:05 am', version='2', csrf='ffeeddccbbaa99887766554433221100',
+    ))
+
+    report = compare_fingerprints(before, after)
+
+    assert not report['changed']
+    assert report['content_hash'] == before.content_hash
+    assert report['similarity'] == 1.0
+    assert report['counts'] == {'added': 0, 'removed': 0, 'modified': 0}
+
+
+def test_content_changes_fill_element_lists():
+    before = PageFingerprint.from_html(_page())
+    after = PageFingerprint.from_html(_page(price='$12', extra='<li>Green</li>').replace('<li>Red</li>', ''))
+
+    report = compare_fingerprints(before, after)
+
+    assert report['changed']
+    assert report['exact']
+    assert report['modified_elements'] == [
+        {'path': 'body>main>p', 'before': 'Widget costs $10.', 'after': 'Widget costs $12.'},
+    ]
+    assert report['removed_elements'] == [{'path': 'body>main>ul>li', 'text': 'Red'}]
+    assert report['added_elements'] == [{'path': 'body>main>ul>li', 'text': 'Green'}]
+    assert 0 < report['block_similarity'] < 1
+
+
+def test_wholesale_rewrites_fall_back_to_set_differences():
+    before = PageFingerprint.from_html(''.join(f'<p>Old paragraph {i}</p>' for i in range(3000)))
+    after = PageFingerprint.from_html(''.join(f'<p>New paragraph {i}</p>' for i in range(3000)))
+
+    report = compare_fingerprints(before, after)
+
+    assert not report['exact']
+    assert report['counts'] == {'added': 3000, 'removed': 3000, 'modified': 0}
+    assert len(report['added_elements']) == 50
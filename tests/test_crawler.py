@@ -0,0 +1,129 @@
+import asyncio
+
+from core.utils import crawler as crawler_module
+from core.utils.crawler import Crawler, CrawlCheckpoint, normalize_url
+from core.utils.url_seen import create_seen_set
+
+
+class FakeScraper:
+    # Stands in for WebScraper: SITE maps a URL to the URL it redirects to and its internal links.
+    SITE = {}
+    fetched = []
+
+    def __init__(self, url, options, browser_pool=None, robots_parser=None):
+        self.url = url
+
+    async def scrape(self, context_factory=None):
+        final_url, links = self.SITE[self.url]
+        self.fetched.append(self.url)
+        return {'html': f'<html>{self.url}</html>', 'links': {'internal': links}, 'fetch': {'final_url': final_url}}
+
+
+class HashRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def hset(self, key, mapping):
+        self.hashes[key] = {
+            field.encode(): value if isinstance(value, bytes) else str(value).encode()
+            for field, value in mapping.items()
+        }
+
+    def hgetall(self, key):
+        return self.hashes.get(key, {})
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+SITE = {
+    'https://example.com/': ['/a', '/b', 'https://other.com/x', '/a?utm_source=feed'],
+    'https://example.com/a': ['/', '/b', '/a/deep'],
+    'https://example.com/b': ['/b/deep', '/a'],
+    'https://example.com/a/deep': ['/a/deeper'],
+    'https://example.com/b/deep': [],
+    'https://example.com/a/deeper': [],
+}
+
+
+def _fake_site(monkeypatch, site):
+    monkeypatch.setattr(FakeScraper, 'SITE', site)
+    monkeypatch.setattr(FakeScraper, 'fetched', [])
+    monkeypatch.setattr(crawler_module, 'WebScraper', FakeScraper)
+
+
+def test_normalize_url_collapses_equivalent_urls():
+    variants = [
+        'HTTPS://Example.com:443/docs?b=2&a=1#intro',
+        'https://example.com/docs?a=1&b=2&utm_source=newsletter',
+        '/docs?a=1&b=2&fbclid=abc',
+    ]
+    normalized = {normalize_url(url, base='https://example.com/') for url in variants}
+    assert normalized == {'https://example.com/docs?a=1&b=2'}
+
+
+def test_normalize_url_rejects_non_http_links():
+    assert normalize_url('mailto:team@example.com') is None
+    assert normalize_url('javascript:void(0)', base='https://example.com/') is None
+    assert normalize_url('https://example.com') == 'https://example.com/'
+
+
+def test_next_links_accepts_a_plain_set_as_seen():
+    crawler = Crawler('https://example.com/', {'depth': 2}, seen={'https://example.com/'})
+    page = {'url': 'https://example.com/', 'links': {'internal': ['/', '/about', '/about#team', '/pricing']}}
+    assert crawler._next_links(page, queued=0) == ['https://example.com/about', 'https://example.com/pricing']
+    assert crawler.seen == {'https://example.com/', 'https://example.com/about', 'https://example.com/pricing'}
+
+
+def test_same_host_filter_follows_a_redirected_start_url(monkeypatch):
+    _fake_site(monkeypatch, {
+        'https://example.com/': ('https://www.example.com/', ['https://www.example.com/about', '/']),
+        'https://www.example.com/about': ('https://www.example.com/about', []),
+    })
+    pages = asyncio.run(Crawler('https://example.com/', {'depth': 2}, seen=set()).crawl())
+
+    assert [page['url'] for page in pages] == ['https://example.com/', 'https://www.example.com/about']
+
+
+def test_crawl_stays_on_host_within_depth_and_fetches_each_url_once(monkeypatch):
+    _fake_site(monkeypatch, {url: (url, links) for url, links in SITE.items()})
+    crawler = Crawler('https://example.com/', {'depth': 3, 'concurrency': 2})
+    pages = asyncio.run(crawler.crawl())
+
+    assert [(page['url'], page['depth']) for page in pages] == [
+        ('https://example.com/', 0),
+        ('https://example.com/a', 1),
+        ('https://example.com/b', 1),
+        ('https://example.com/a/deep', 2),
+        ('https://example.com/b/deep', 2),
+    ]
+    assert sorted(FakeScraper.fetched) == sorted(page['url'] for page in pages)
+    assert crawler.stats()['discovered'] == 5
+
+
+def test_crawl_resumes_from_checkpoint_frontier(monkeypatch):
+    _fake_site(monkeypatch, {url: (url, links) for url, links in SITE.items()})
+    checkpoint = CrawlCheckpoint(HashRedis(), 'crawl:test')
+    seen = create_seen_set('exact')
+    for url in ('https://example.com/', 'https://example.com/a', 'https://example.com/b'):
+        seen.add(url)
+    # The start page and /a finished before the previous run stopped; /b was still queued.
+    checkpoint.save(seen, [['https://example.com/b', 1]], 2, 100, 'example.com')
+
+    crawler = Crawler('https://example.com/', {'depth': 3}, checkpoint=checkpoint)
+    pages = asyncio.run(crawler.crawl())
+
+    assert crawler.resumed
+    assert FakeScraper.fetched == ['https://example.com/b', 'https://example.com/b/deep']
+    assert [page['url'] for page in pages] == FakeScraper.fetched
+    assert crawler.stats()['pages'] == 4
+    assert checkpoint.load() is None
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone as django_timezone
+
+from core.utils.cron import next_fire_time, parse_cron, schedule_jitter
+
+
+def _at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('expression, after, expected', [
+    ('*/15 9-17 * * mon-fri', _at(2026, 10, 19, 9, 0), _at(2026, 10, 19, 9, 15)),
+    ('*/15 9-17 * * mon-fri', _at(2026, 10, 19, 9, 7, 30), _at(2026, 10, 19, 9, 15)),
+    ('*/15 9-17 * * mon-fri', _at(2026, 10, 16, 17, 50), _at(2026, 10, 19, 9, 0)),
+    ('0 0 * * *', _at(2026, 12, 31, 23, 59), _at(2027, 1, 1, 0, 0)),
+    ('0 0 31 * *', _at(2026, 4, 1, 0, 0), _at(2026, 5, 31, 0, 0)),
+    ('0 0 29 2 *', _at(2026, 3, 1, 0, 0), _at(2028, 2, 29, 0, 0)),
+    ('0 12 1 * 1', _at(2026, 10, 20, 0, 0), _at(2026, 10, 26, 12, 0)),
+])
+def test_next_fire_time(expression, after, expected):
+    assert next_fire_time(parse_cron(expression), after) == expected
+
+
+@pytest.mark.parametrize('expression', ['0 0 * *', '61 * * * *', 'every day'])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        parse_cron(expression)
+
+
+def test_jitter_is_stable_and_spread():
+    offsets = [schedule_jitter(f'job-{index}', 600) for index in range(1000)]
+
+    assert offsets[:10] == [schedule_jitter(f'job-{index}', 600) for index in range(10)]
+    assert all(0 <= offset < 600 for offset in offsets)
+    assert len(set(offsets)) > 400
+    assert schedule_jitter('job-1', 0) == 0
+
+
+def test_either_day_rule_uses_the_fields_as_written():
+    # With both day fields restricted a day matching either fires; with one, only that one counts.
+    schedule = parse_cron('0 12 1 * 1')
+    assert (schedule.day_of_month_field, schedule.day_of_week_field) == ('1', '1')
+    assert next_fire_time(parse_cron('0 12 1 * *'), _at(2026, 10, 20, 0, 0)) == _at(2026, 11, 1, 12, 0)
+    assert next_fire_time(parse_cron('0 12 * * 1'), _at(2026, 10, 20, 0, 0)) == _at(2026, 10, 26, 12, 0)
+
+
+@pytest.fixture
+def recurring(monkeypatch, settings):
+    fakeredis = pytest.importorskip('fakeredis')
+    from core import signals, tasks
+
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(tasks, 'get_redis_connection', lambda alias: redis)
+    monkeypatch.setattr(signals, 'get_redis_connection', lambda alias: redis)
+    enqueued = []
+    monkeypatch.setattr(tasks, 'enqueue_harvest', lambda job: enqueued.append(job.id))
+    settings.HARVEST_SCHEDULE_JITTER = 60
+    return SimpleNamespace(tasks=tasks, redis=redis, enqueued=enqueued)
+
+
+def _schedules(minutes_ago):
+    from core.models import HarvestJob
+
+    now = django_timezone.now()
+    return [
+        HarvestJob.objects.create(
+            url=f'https://example.com/{index}',
+            status='completed',
+            is_recurring=True,
+            cron_schedule='*/5 * * * *',
+            next_run_at=now - timedelta(minutes=minutes) if minutes is not None else now + timedelta(hours=1),
+        )
+        for index, minutes in enumerate(minutes_ago)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_overlapping_recurring_runs_spawn_one_child_per_due_schedule(recurring, monkeypatch):
+    from core.models import HarvestJob
+
+    tasks = recurring.tasks
+    due_a, due_b, later = _schedules([3, 1, None])
+    next_recurring_run = tasks.next_recurring_run
+    overlapping = []
+
+    def next_run(job, after=None):
+        if not overlapping:
+            # A second tick starts while this one is mid-batch: first while the lock is still
+            # held, then after it expired, when only the compare-and-set on next_run_at guards.
+            overlapping.append(tasks.run_recurring_harvests())
+            recurring.redis.delete('goharvest:lock:recurring-harvests')
+            overlapping.append(tasks.run_recurring_harvests())
+        return next_recurring_run(job, after)
+
+    monkeypatch.setattr(tasks, 'next_recurring_run', next_run)
+    outer = tasks.run_recurring_harvests()
+
+    assert overlapping == [{'spawned': 0, 'skipped': 'locked'}, {'spawned': 2}]
+    assert outer == {'spawned': 0}
+    children = HarvestJob.objects.filter(parent_job__isnull=False)
+    assert sorted(child.parent_job_id for child in children) == sorted([due_a.id, due_b.id])
+    assert sorted(recurring.enqueued) == sorted(child.id for child in children)
+
+    for template in (due_a, due_b):
+        template.refresh_from_db()
+        # The next firing is the jittered slot after now, never a catch-up of missed slots.
+        assert template.next_run_at > django_timezone.now()
+        nominal = template.next_run_at - timedelta(seconds=tasks.schedule_jitter(str(template.id), 60))
+        assert (nominal.minute % 5, nominal.second, nominal.microsecond) == (0, 0, 0)
+    assert HarvestJob.objects.get(pk=later.pk).next_run_at == later.next_run_at
@@ -0,0 +1,91 @@
+import pytest
+
+from core import tasks
+from core.models import HarvestJob, HarvestResult, PerformanceMetrics
+from core.tasks import _reuse_duplicate
+from core.utils.change_detector import PageFingerprint
+
+PAGE = '<html><body><script nonce="{nonce}"></script><h1>Pricing</h1><p>{price} per month</p></body></html>'
+OPTIONS = {'fetch': 'http'}
+
+
+@pytest.fixture(autouse=True)
+def exports(monkeypatch):
+    queued = []
+    monkeypatch.setattr(tasks.create_zip_export, 'apply_async', lambda args, **options: queued.append(args[0]))
+    return queued
+
+
+def _page(price='$10', nonce='a'):
+    return {'html': PAGE.format(price=price, nonce=nonce), 'fetch': {'validators': {'etag': f'"{nonce}"'}}}
+
+
+def _harvested(parent=None, options=OPTIONS, price='$10'):
+    job = HarvestJob.objects.create(url='https://example.com/', options=options, parent_job=parent, status='completed')
+    result = HarvestResult.objects.create(
+        job=job,
+        zip_file=f'harvests/zips/{job.id}.zip',
+        html=_page(price)['html'],
+        content=f'Pricing {price} per month',
+        technologies={'frameworks': ['React']},
+        content_hash=PageFingerprint.from_html(_page(price)['html']).content_hash,
+    )
+    PerformanceMetrics.objects.create(result=result, performance_score=91, total_load_time=1.2)
+    return job, result
+
+
+def _rerun(parent, page, options=OPTIONS):
+    job = HarvestJob.objects.create(url='https://example.com/', options=options, parent_job=parent, status='running')
+    content_hash = PageFingerprint.from_html(page['html']).content_hash
+    return job, _reuse_duplicate(job, page, content_hash)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_unchanged_content_clones_previous_result(exports):
+    parent, previous = _harvested()
+    job, result = _rerun(parent, _page(nonce='b'))
+
+    assert result.job == job and result.pk != previous.pk
+    assert result.technologies == {'frameworks': ['React']}
+    assert result.content == previous.content
+    assert result.html == _page(nonce='b')['html']
+    assert result.validators == {'etag': '"b"'}
+    assert result.performance.performance_score == 91
+    assert job.metrics['dedup']['duplicate_of'] == previous.id
+    assert 'ai_analysis' in job.metrics['dedup']['skipped_stages']
+    # The previous archive holds the previous HTML; the clone's export is built afresh.
+    assert not result.zip_file and exports == [result.id]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changed_content_or_options_run_the_pipeline():
+    parent, _ = _harvested()
+    job, result = _rerun(parent, _page(price='$12'))
+    assert result is None
+    assert job.metrics['dedup']['skipped'] is False
+
+    _, result = _rerun(parent, _page(), options={'fetch': 'http', 'extract_media': False})
+    assert result is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parent_records_skip_rate():
+    parent, _ = _harvested()
+    _rerun(parent, _page(nonce='b'))
+    _rerun(parent, _page(price='$12'))
+    _rerun(parent, _page(nonce='c'))
+
+    parent.refresh_from_db()
+    assert parent.metrics['reuse'] == {'runs': 3, 'skipped': 2, 'skip_rate': 0.6667}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retried_dedup_counts_a_run_once():
+    parent, _ = _harvested()
+    job, _ = _rerun(parent, _page(price='$12'))
+    # The stage failed after counting (e.g. saving the checkpoint) and runs again.
+    retried = HarvestJob.objects.get(pk=job.pk)
+    _reuse_duplicate(retried, _page(price='$12'), PageFingerprint.from_html(_page(price='$12')['html']).content_hash)
+
+    parent.refresh_from_db()
+    assert parent.metrics['reuse'] == {'runs': 1, 'skipped': 0, 'skip_rate': 0.0}
@@ -0,0 +1,65 @@
+from core.utils.scraper import WebScraper
+
+PAGE = """
+<!DOCTYPE html>
+<html>
+  <head>
+    <title> Parity page </title>
+    <meta name="description" content="Engine parity">
+    <meta property="og:title" content="Parity">
+    <link rel="preload stylesheet" href="/css/site.css">
+    <link rel="icon" href="/favicon.ico">
+    <script src="/js/app.js"></script>
+    <style>h1 { color: red }</style>
+  </head>
+  <body>
+    <h1>Main <!-- note --><span>heading</span></h1>
+    <!-- hidden comment -->
+    <p>Intro text <a href="/about">About</a> and <a href="https://other.example.org/x">elsewhere</a>.</p>
+    <ul>
+      <li>One<script>var inline = 1;</script></li>
+      <li>Two <ol><li>Nested</li></ol></li>
+    </ul>
+    <template><h2>Template heading</h2></template>
+    <table>
+      <tr><th>Name</th><th>Value</th></tr>
+      <tr><td>a</td><td><table><tr><td>inner</td></tr></table></td></tr>
+    </table>
+    <ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>
+    <img src="/img/logo.png" alt="Logo">
+    <img data-src="/img/lazy.png">
+    <a href="">Empty link</a>
+  </body>
+</html>
+"""
+
+
+def _extract(engine):
+    data = WebScraper('https://example.com/page', {'engine': engine}).extract(PAGE)
+    data['links'] = {kind: sorted(urls) for kind, urls in data['links'].items()}
+    return data
+
+
+def test_lxml_engine_matches_beautifulsoup_output():
+    assert _extract('lxml') == _extract('bs4')
+
+
+def test_lxml_engine_keeps_metadata_and_assets():
+    data = _extract('lxml')
+    assert data['metadata']['title'] == 'Parity page'
+    assert data['metadata']['description'] == 'Engine parity'
+    assert [asset['url'] for asset in data['assets']] == [
+        'https://example.com/img/logo.png',
+        'https://example.com/img/lazy.png',
+        'https://example.com/css/site.css',
+        'https://example.com/js/app.js',
+    ]
+    assert 'var inline' not in data['content']
+
+
+def test_bs4_engine_reads_head_tags_before_stripping_them_from_the_text():
+    # Text extraction decomposes script/meta/link tags, so it runs after metadata and assets.
+    data = _extract('bs4')
+    assert data['metadata']['description'] == 'Engine parity'
+    assert sorted(asset['type'] for asset in data['assets']) == ['css', 'image', 'image', 'js']
+    assert 'var inline' not in data['content'] and 'color: red' not in data['content']
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core import tasks
+from core.models import HarvestJob
+from core.tasks import enqueue_harvest, enqueue_scheduled_harvests, harvest_priority
+
+
+@pytest.fixture
+def published(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks.harvest_website, 'apply_async', lambda args, **options: calls.append((args, options)))
+    return calls
+
+
+@pytest.mark.parametrize('priority, step', [(1, 0), (5, 5), (10, 9), (7, 5)])
+def test_job_priority_maps_to_a_broker_step(priority, step):
+    assert harvest_priority(SimpleNamespace(priority=priority)) == step
+
+
+def test_queued_backlog_steps_the_priority_down(settings):
+    settings.HARVEST_FAIR_SHARE = 100
+    high = SimpleNamespace(priority=1)
+    assert [harvest_priority(high, backlog) for backlog in (0, 99, 100, 250)] == [0, 0, 1, 2]
+    # Never past the lowest step.
+    assert harvest_priority(SimpleNamespace(priority=10), 1000) == 9
+
+
+@pytest.mark.django_db(transaction=True)
+def test_enqueue_uses_the_users_pending_backlog(settings, published, fake_redis):
+    settings.HARVEST_FAIR_SHARE = 2
+    user = User.objects.create_user('busy')
+    HarvestJob.objects.bulk_create(HarvestJob(url=f'https://example.com/{n}', user=user) for n in range(4))
+    job = HarvestJob.objects.create(url='https://example.com/next', user=user, priority=1)
+    other = HarvestJob.objects.create(url='https://example.org/', user=User.objects.create_user('idle'), priority=1)
+
+    enqueue_harvest(job)
+    enqueue_harvest(other)
+
+    assert published == [([str(job.id)], {'priority': 2}), ([str(other.id)], {'priority': 0})]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_near_schedules_get_an_eta_and_far_ones_wait_for_beat(settings, published, fake_redis):
+    settings.HARVEST_ETA_HORIZON = 3000
+    now = timezone.now()
+    soon = HarvestJob.objects.create(url='https://example.com/soon', scheduled_at=now + timedelta(minutes=10))
+    later = HarvestJob.objects.create(url='https://example.com/later', scheduled_at=now + timedelta(days=1))
+
+    enqueue_harvest(soon)
+    assert enqueue_harvest(later) is None
+
+    assert published == [([str(soon.id)], {'priority': 5, 'eta': soon.scheduled_at})]
+    soon.refresh_from_db()
+    later.refresh_from_db()
+    assert (soon.status, later.status) == ('pending', 'scheduled')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_beat_hands_due_scheduled_jobs_to_the_broker_once(settings, published, fake_redis):
+    settings.HARVEST_ETA_HORIZON = 3000
+    now = timezone.now()
+    due = HarvestJob.objects.create(
+        url='https://example.com/due', status='scheduled', priority=10, scheduled_at=now + timedelta(minutes=30),
+    )
+    HarvestJob.objects.create(url='https://example.com/far', status='scheduled', scheduled_at=now + timedelta(days=1))
+
+    assert enqueue_scheduled_harvests() == {'enqueued': 1}
+    # An overlapping beat run finds nothing left to hand off.
+    assert enqueue_scheduled_harvests() == {'enqueued': 0}
+
+    assert published == [([str(due.id)], {'priority': 9, 'eta': due.scheduled_at})]
+    assert dict(HarvestJob.objects.values_list('url', 'status')) == {
+        'https://example.com/due': 'pending',
+        'https://example.com/far': 'scheduled',
+    }
+    assert settings.CELERY_BEAT_SCHEDULE['enqueue-scheduled-harvests']['task'] == 'core.tasks.enqueue_scheduled_harvests'
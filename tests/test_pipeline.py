@@ -0,0 +1,137 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from celery.signals import task_prerun
+
+from core import signals, tasks
+from core.models import Asset, HarvestJob, HarvestResult
+from core.utils.checkpoint import HarvestCheckpoint
+from goharvest.celery import app
+
+fakeredis = pytest.importorskip('fakeredis')
+
+PAGE = b'''<html><head><title>Pricing</title></head>
+<body><h1>Pricing</h1><p>Plans start at $10 per month.</p><img src="/logo.png"></body></html>'''
+LOGO = b'\x89PNG\r\n\x1a\n' + b'\x00' * 512
+PIPELINE_STAGES = [
+    'core.tasks.fetch_page',
+    'core.tasks.dedup_page',
+    'core.tasks.process_page',
+    'core.tasks.download_assets',
+    'core.tasks.store_result',
+    'core.tasks.analyze_performance',
+    'core.tasks.perform_ai_analysis',
+    'core.tasks.create_zip_export',
+    'core.tasks.finish_pipeline',
+]
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.send_header('ETag', '"v1"')
+                self.end_headers()
+                return
+            self._send(PAGE, 'text/html; charset=utf-8')
+        elif self.path == '/logo.png':
+            self._send(LOGO, 'image/png')
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def eager(monkeypatch, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    # The asset store's default root is relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(tasks, 'get_redis_connection', lambda alias: redis)
+    monkeypatch.setattr(signals, 'get_redis_connection', lambda alias: redis)
+    monkeypatch.setattr(app.conf, 'task_always_eager', True)
+    monkeypatch.setattr(app.conf, 'task_eager_propagates', True)
+    started = []
+
+    def record(sender=None, **kwargs):
+        started.append(sender.name)
+
+    task_prerun.connect(record, weak=False)
+    yield started
+    task_prerun.disconnect(record)
+    tasks._close_worker_resources()
+
+
+def _harvest(url, parent=None):
+    job = HarvestJob.objects.create(url=url, options={'fetch': 'http'}, parent_job=parent)
+    tasks.harvest_website.apply(args=[str(job.id)], kwargs={'politeness_reserved': True})
+    job.refresh_from_db()
+    return job
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline_runs_every_stage_then_short_circuits_on_304(site, eager):
+    job = _harvest(site)
+
+    assert job.status == 'completed', job.error_message
+    assert eager == ['core.tasks.harvest_website'] + PIPELINE_STAGES
+    result = HarvestResult.objects.get(job=job)
+    assert 'Plans start at $10 per month.' in result.content
+    assert result.zip_file
+    assert Asset.objects.filter(result=result).count() == 1
+    assert {'fetch_ms', 'dedup_ms', 'process_ms', 'download_ms', 'store_ms'} <= set(job.metrics['pipeline'])
+    assert 'analyses_completed_at' in job.metrics['pipeline']
+
+    # The re-run sends the stored ETag, gets a 304 and is done after the fetch stage.
+    del eager[:]
+    rerun = _harvest(site, parent=job)
+
+    assert rerun.status == 'completed', rerun.error_message
+    assert rerun.metrics['revalidation']['page'] == {'conditional': True, 'not_modified': True}
+    assert not {'dedup_ms', 'process_ms', 'download_ms', 'store_ms'} & set(rerun.metrics['pipeline'])
+    clone = HarvestResult.objects.get(job=rerun)
+    assert clone.pk != result.pk and clone.content == result.content
+    # The clone's export is rebuilt right away; later stages only pass the finished state along.
+    assert eager == ['core.tasks.harvest_website', 'core.tasks.fetch_page', 'core.tasks.create_zip_export'] + PIPELINE_STAGES[1:]
+    checkpoint = HarvestCheckpoint(tasks.get_redis_connection('default'), f'goharvest:harvest:{rerun.id}')
+    assert checkpoint.load_stage('page') is None
+
+
+@pytest.mark.parametrize('task, queue', [
+    ('core.tasks.fetch_page', 'browser'),
+    ('core.tasks.analyze_performance', 'browser'),
+    ('core.tasks.check_for_changes', 'browser'),
+    ('core.tasks.dedup_page', 'cpu'),
+    ('core.tasks.process_page', 'cpu'),
+    ('core.tasks.create_zip_export', 'cpu'),
+    ('core.tasks.download_assets', 'io'),
+    ('core.tasks.store_result', 'io'),
+    ('core.tasks.perform_ai_analysis', 'io'),
+    ('core.tasks.finish_pipeline', 'io'),
+    ('core.tasks.harvest_website', 'celery'),
+])
+def test_stages_are_routed_to_their_documented_queues(task, queue):
+    assert app.amqp.router.route({}, task)['queue'].name == queue
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import tasks
+from core.models import HarvestJob
+from core.utils.politeness import PolitenessScheduler
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis()
+
+
+def test_second_reservation_for_a_host_waits_the_crawl_delay(redis):
+    scheduler = PolitenessScheduler(redis)
+
+    assert scheduler.reserve('example.com', 2.0) == 0
+    assert scheduler.reserve('EXAMPLE.com', 2.0) == pytest.approx(2.0, abs=0.1)
+    assert scheduler.reserve('example.com', 2.0) == pytest.approx(4.0, abs=0.1)
+    # Hosts are throttled independently.
+    assert scheduler.reserve('example.org', 2.0) == 0
+
+
+def test_burst_allows_back_to_back_fetches(redis):
+    scheduler = PolitenessScheduler(redis, burst=3)
+
+    waits = [scheduler.reserve('example.com', 1.0) for _ in range(4)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(1.0, abs=0.1)
+
+
+def test_unavailable_redis_does_not_throttle():
+    def script(keys, args):
+        raise ConnectionError('redis down')
+
+    scheduler = PolitenessScheduler(SimpleNamespace(register_script=lambda source: script))
+    assert scheduler.reserve('example.com', 5.0) == 0.0
+    assert scheduler.reserve('example.com', 0) == 0.0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_harvest_is_requeued_until_its_fetch_slot(monkeypatch, settings, redis):
+    settings.HARVEST_POLITENESS_BURST = 1
+    monkeypatch.setattr(tasks, 'get_redis_connection', lambda alias: redis)
+    monkeypatch.setattr(tasks, '_crawl_delay', lambda url: 3.0)
+    requeued, pipelines = [], []
+    monkeypatch.setattr(tasks.harvest_website, 'apply_async', lambda **options: requeued.append(options))
+    monkeypatch.setattr(
+        tasks, 'harvest_pipeline',
+        lambda job_id, priority: SimpleNamespace(apply_async=lambda: pipelines.append((job_id, priority))),
+    )
+    job = HarvestJob.objects.create(url='https://example.com/page', priority=1)
+    # Another job on the host took the free slot.
+    PolitenessScheduler(redis).reserve('example.com', 3.0)
+
+    result = tasks.harvest_website.run(str(job.id))
+
+    assert result['status'] == 'deferred'
+    assert result['countdown'] == pytest.approx(3.0, abs=0.1)
+    (options,) = requeued
+    assert options['args'] == [str(job.id)]
+    assert options['kwargs'] == {'politeness_reserved': True}
+    assert (options['countdown'], options['priority']) == (result['countdown'], 0)
+    assert pipelines == []
+    job.refresh_from_db()
+    assert job.status == 'pending'
+    assert job.metrics['politeness']['deferred_seconds'] == pytest.approx(3.0, abs=0.1)
+
+    # The re-queued run already holds its slot and starts the pipeline.
+    assert tasks.harvest_website.run(str(job.id), politeness_reserved=True)['status'] == 'running'
+    assert pipelines == [(str(job.id), 0)]
+    assert len(requeued) == 1
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from core.serializers import HarvestJobCreateSerializer
+from core.utils.readiness import get_readiness_strategy
+
+FOREVER = 3600
+
+
+class FakePage:
+    # Each signal is (delay in seconds, outcome); an exception outcome is raised after the delay.
+    def __init__(self, networkidle=(FOREVER, None), quiescence=(FOREVER, None), selector=(FOREVER, None)):
+        self.signals = {'networkidle': networkidle, 'quiescence': quiescence, 'selector': selector}
+        self.cancelled = []
+
+    async def _signal(self, name):
+        delay, outcome = self.signals[name]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def wait_for_load_state(self, state, timeout=None):
+        return await self._signal(state)
+
+    async def evaluate(self, script, args):
+        return await self._signal('quiescence')
+
+    async def wait_for_selector(self, selector, state=None, timeout=None):
+        return await self._signal('selector')
+
+
+def _wait(config, page):
+    return asyncio.run(get_readiness_strategy(config).wait(page))
+
+
+def test_networkidle_reports_timings():
+    outcome = _wait('networkidle', FakePage(networkidle=(0, None)))
+    assert set(outcome) == {'strategy', 'ready_ms', 'timeout_ms', 'timed_out'}
+    assert (outcome['strategy'], outcome['timeout_ms'], outcome['timed_out']) == ('networkidle', 10000, False)
+
+
+def test_timeouts_and_errors_are_reported_not_raised():
+    outcome = _wait('networkidle', FakePage(networkidle=(0, PlaywrightTimeoutError('Timeout 10000ms exceeded'))))
+    assert outcome['timed_out'] is True
+
+    outcome = _wait({'strategy': 'selector', 'selector': '#app'}, FakePage(selector=(0, PlaywrightError('Target closed'))))
+    assert outcome['timed_out'] is False
+    assert outcome['error'] == 'Target closed'
+
+
+def test_quiescence_reports_mutations():
+    page = FakePage(quiescence=(0, {'mutations': 7, 'timedOut': False, 'elapsed': 512}))
+    outcome = _wait({'strategy': 'quiescence', 'quiet_ms': 250}, page)
+    assert (outcome['quiet_ms'], outcome['mutations'], outcome['timed_out']) == (250, 7, False)
+
+    outcome = _wait('quiescence', FakePage(quiescence=(0, {'mutations': 900, 'timedOut': True})))
+    assert outcome['timed_out'] is True
+
+
+def test_budget_ends_at_the_first_signal_on_a_page_that_never_goes_network_idle():
+    # A long-polling page: the network never settles, the DOM does.
+    page = FakePage(quiescence=(0.01, {'mutations': 3, 'timedOut': False}))
+    outcome = _wait({'strategy': 'budget', 'timeout_ms': 5000}, page)
+
+    assert outcome['signal'] == 'quiescence'
+    assert outcome['early_exit'] is True and outcome['timed_out'] is False
+    assert outcome['ready_ms'] < 1000
+    assert page.cancelled == ['networkidle']
+
+
+def test_budget_races_the_selector_and_skips_failed_signals():
+    page = FakePage(
+        networkidle=(0, PlaywrightError('Navigation interrupted')),
+        quiescence=(0.2, {'mutations': 0, 'timedOut': False}),
+        selector=(0.01, None),
+    )
+    outcome = _wait({'strategy': 'budget', 'selector': '#app', 'timeout_ms': 5000}, page)
+    assert outcome['signal'] == 'selector'
+
+
+def test_budget_gives_up_at_its_timeout():
+    page = FakePage(quiescence=(0, {'mutations': 40, 'timedOut': True}))
+    outcome = _wait({'strategy': 'budget', 'timeout_ms': 50}, page)
+
+    assert outcome['signal'] is None and outcome['timed_out'] is True
+    assert 50 <= outcome['ready_ms'] < 1000
+    assert page.cancelled == ['networkidle']
+
+
+def test_unknown_strategies_and_missing_selectors_are_rejected():
+    with pytest.raises(ValueError):
+        get_readiness_strategy('eventually')
+    with pytest.raises(ValueError):
+        get_readiness_strategy({'strategy': 'selector'})
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('options, field', [
+    ({'wait': 'eventually'}, 'wait'),
+    ({'wait': {'strategy': 'selector'}}, 'wait'),
+    ({'wait': {'strategy': 'budget', 'timeout_ms': 'soon'}}, 'wait'),
+    ({'engine': 'regex'}, 'engine'),
+    ({'fetch': 'carrier-pigeon'}, 'fetch'),
+])
+def test_job_options_are_validated_on_submit(options, field):
+    serializer = HarvestJobCreateSerializer(data={'url': 'https://example.com/', 'options': options})
+    assert not serializer.is_valid()
+    assert field in serializer.errors['options']
+
+    valid = {'wait': {'strategy': 'budget', 'selector': '#app'}, 'engine': 'bs4', 'fetch': 'http'}
+    assert HarvestJobCreateSerializer(data={'url': 'https://example.com/', 'options': valid}).is_valid()
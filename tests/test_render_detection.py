@@ -0,0 +1,27 @@
+from core.utils.render_detection import detect_render_requirement
+
+
+def test_server_rendered_page_needs_no_browser():
+    paragraph = '<p>' + 'Server rendered article text. ' * 20 + '</p>'
+    html = f'<html><body><h1>Title</h1>{paragraph}</body></html>'
+    assert detect_render_requirement(html) is None
+
+
+def test_empty_spa_mount_point_needs_browser():
+    html = '<html><body><div id="__next"></div><script src="/app.js"></script></body></html>'
+    assert detect_render_requirement(html) == 'empty_mount_point:#__next'
+
+
+def test_noscript_warning_needs_browser():
+    html = """
+    <html><body>
+      <noscript>You need to enable JavaScript to run this app.</noscript>
+      <div id="main"><span>Loading</span></div>
+    </body></html>
+    """
+    assert detect_render_requirement(html) == 'noscript_warning'
+
+
+def test_thin_body_needs_browser():
+    html = '<html><body><div>Loading...</div><script>var x = "' + 'a' * 500 + '";</script></body></html>'
+    assert detect_render_requirement(html) == 'thin_body_text'
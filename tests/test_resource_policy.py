@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+from core.utils.resource_policy import MEDIA_RESOURCE_TYPES, ResourcePolicy
+
+
+class FakeRoute:
+    def __init__(self, resource_type, url):
+        self.request = SimpleNamespace(resource_type=resource_type, url=url)
+        self.outcome = None
+
+    async def abort(self, error_code):
+        self.outcome = error_code
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+
+def test_blocked_types_follow_the_harvest_mode():
+    full = ResourcePolicy.from_options({'mode': 'full'})
+    assert not full.is_active
+    assert full.should_block('image', 'https://example.com/hero.jpg') is None
+    assert full.should_block('script', 'https://www.google-analytics.com/analytics.js') is None
+
+    content = ResourcePolicy.from_options({'mode': 'content'})
+    assert content.blocked_types == frozenset(MEDIA_RESOURCE_TYPES)
+    assert content.should_block('font', 'https://example.com/site.woff2') == 'font'
+    assert content.should_block('script', 'https://www.google-analytics.com/analytics.js') == 'tracker'
+    assert content.should_block('stylesheet', 'https://example.com/site.css') is None
+
+
+def test_extract_media_false_blocks_media_and_trackers():
+    policy = ResourcePolicy.from_options({'extract_media': False})
+    assert policy.should_block('image', 'https://example.com/logo.png') == 'image'
+    assert policy.should_block('media', 'https://example.com/intro.mp4') == 'media'
+    assert policy.should_block('script', 'https://static.hotjar.com/c/hotjar.js') == 'tracker'
+    # Hosts only match on a label boundary.
+    assert policy.should_block('script', 'https://nothotjar.com/app.js') is None
+
+
+def test_explicit_options_override_the_mode():
+    assert not ResourcePolicy.from_options({'mode': 'content', 'block_resources': False, 'block_trackers': False}).is_active
+    policy = ResourcePolicy.from_options({'block_resources': ['image'], 'blocked_hosts': ['ads.example.net']})
+    assert policy.should_block('image', 'https://example.com/a.png') == 'image'
+    assert policy.should_block('script', 'https://cdn.ads.example.net/x.js') == 'tracker'
+
+
+def test_documents_and_xhr_are_always_allowed():
+    policy = ResourcePolicy.from_options({'extract_media': False})
+    routes = [
+        FakeRoute('document', 'https://example.com/'),
+        FakeRoute('xhr', 'https://example.com/api/items'),
+        FakeRoute('fetch', 'https://example.com/api/more'),
+        FakeRoute('image', 'https://example.com/logo.png'),
+        FakeRoute('script', 'https://www.googletagmanager.com/gtm.js'),
+    ]
+
+    async def handle():
+        for route in routes:
+            await policy._handle_route(route)
+
+    asyncio.run(handle())
+    assert [route.outcome for route in routes] == ['continued'] * 3 + ['blockedbyclient'] * 2
+    assert policy.stats()['blocked_by_reason'] == {'image': 1, 'tracker': 1}
+    assert policy.stats()['allowed'] == 3
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Asset, AssetBlob, AssetURL, HarvestJob
+from core.tasks import _persist_result, dedup_page, store_result
+
+
+class ClearedCheckpoint:
+    cleared = False
+
+    def clear(self):
+        self.cleared = True
+
+
+def _downloaded(count):
+    return [
+        {
+            'url': f'https://example.com/static/{index}.png',
+            'type': 'image',
+            'status': 'success',
+            'file_path': f'media/harvests/assets/{index:02x}/{index:064x}.png',
+            'sha256': f'{index % 7:064x}',
+            'size': 100,
+            'etag': f'"{index}"',
+        }
+        for index in range(count)
+    ]
+
+
+def _processed():
+    return {
+        'content': 'Example',
+        'structured': {},
+        'technologies': {'frameworks': ['React']},
+        'metadata': {},
+        'links': [],
+        'content_hash': 'abc',
+    }
+
+
+def _persist(asset_count):
+    job = HarvestJob.objects.create(url='https://example.com/', status='running')
+    checkpoint = ClearedCheckpoint()
+    with CaptureQueriesContext(connection) as queries:
+        result = _persist_result(job, checkpoint, {'html': '<html></html>'}, _processed(), _downloaded(asset_count))
+    return job, result, len(queries)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_result_persistence_query_count_does_not_grow_with_assets():
+    # 80 Asset rows still fit in one INSERT under SQLite's bound-parameter limit.
+    _, _, few = _persist(3)
+    job, result, many = _persist(80)
+
+    assert few == many
+    job.refresh_from_db()
+    assert job.status == 'completed'
+    assert result.asset_details.count() == 80
+    assert AssetBlob.objects.get(sha256=f'{0:064x}').ref_count == 1 + 12
+    assert AssetURL.objects.count() == 80
+    assert Asset.objects.count() == 83
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_persistence_leaves_no_partial_result():
+    job = HarvestJob.objects.create(url='https://example.com/', status='running')
+    downloaded = _downloaded(2)
+    del downloaded[1]['type']
+
+    with pytest.raises(KeyError):
+        _persist_result(job, ClearedCheckpoint(), {'html': ''}, _processed(), downloaded)
+
+    job.refresh_from_db()
+    assert job.status == 'running'
+    assert not AssetBlob.objects.exists()
+    assert not Asset.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stages_retried_after_commit_return_the_stored_result():
+    # The checkpoint is gone once the result commits; a retry must not fail the completed job.
+    job, result, _ = _persist(1)
+
+    assert store_result.run({'job_id': str(job.id)}) == result.id
+    assert dedup_page.run({'job_id': str(job.id)}) == {'job_id': str(job.id), 'done': True}
+    job.refresh_from_db()
+    assert job.status == 'completed'
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta, timezone
+
+from core.utils.revalidation import conditional_headers, is_fresh, response_validators
+
+
+def test_validators_round_trip_into_conditional_headers():
+    validators = response_validators({
+        'ETag': '"v1"',
+        'Last-Modified': 'Wed, 01 May 2024 10:00:00 GMT',
+        'Content-Type': 'image/png',
+    })
+    assert validators == {'etag': '"v1"', 'last_modified': 'Wed, 01 May 2024 10:00:00 GMT'}
+    assert conditional_headers(validators) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Wed, 01 May 2024 10:00:00 GMT',
+    }
+    assert conditional_headers({}) == {}
+
+
+def test_is_fresh_honours_max_age_and_no_cache():
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    validated_at = now - timedelta(seconds=30)
+    assert is_fresh('public, max-age=60', validated_at, now)
+    assert not is_fresh('public, max-age=10', validated_at, now)
+    assert not is_fresh('no-cache, max-age=60', validated_at, now)
+    assert not is_fresh('', validated_at, now)
+    assert not is_fresh('public, s-maxage=600', validated_at, now)
+    assert not is_fresh('max-age=10, s-maxage=600', validated_at, now)
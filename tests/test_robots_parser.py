@@ -0,0 +1,41 @@
+import pytest
+
+from core.models import RobotsCompliance
+from core.utils.robots_parser import RobotsParser
+
+
+def _cache_response(domain, status_code, text=''):
+    parser = RobotsParser()
+    record = parser._record_for_response(domain, status_code, text)
+    parser._remember(domain, record)
+    return parser
+
+
+def test_cached_rules_are_served_without_fetching():
+    robots_txt = 'User-agent: *\nCrawl-delay: 2\nDisallow: /private\n'
+    parser = _cache_response('rules.example.com', 200, robots_txt)
+
+    assert parser.can_fetch('https://rules.example.com/docs')
+    assert not parser.can_fetch('https://rules.example.com/private/page')
+    assert parser.get_crawl_delay('https://rules.example.com/') == 2.0
+
+
+def test_error_statuses_follow_robotparser_semantics():
+    assert _cache_response('missing.example.com', 404).can_fetch('https://missing.example.com/a')
+    assert not _cache_response('forbidden.example.com', 403).can_fetch('https://forbidden.example.com/a')
+
+    parser = _cache_response('down.example.com', 503)
+    assert not parser.can_fetch('https://down.example.com/a')
+    entry = RobotsParser.memory_cache.get('down.example.com')
+    assert entry['status'] == 'unavailable'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fractional_crawl_delay_is_kept():
+    parser = RobotsParser()
+    record = parser._record_for_response('slow.example.com', 200, 'User-agent: *\nCrawl-delay: 0.5\n')
+    parser._remember('slow.example.com', record)
+    parser._store_shared('slow.example.com', record)
+
+    assert parser.get_crawl_delay('https://slow.example.com/') == 0.5
+    assert RobotsCompliance.objects.get(domain='slow.example.com').crawl_delay == 0.5
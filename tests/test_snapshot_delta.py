@@ -0,0 +1,62 @@
+import pytest
+from django.test import override_settings
+
+from core.models import HarvestJob, HarvestResult
+from core.tasks import record_snapshot, snapshot_html
+from core.utils.snapshot_delta import apply_delta, compress_keyframe, make_delta, reconstruct
+
+
+def _page(version):
+    rows = ''.join(f'<tr><td>Item {index}</td><td>{index * 3}</td></tr>' for index in range(200))
+    return f'<html><body><h1>Prices</h1><p>Revision {version}</p><table>{rows}</table></body></html>'
+
+
+def test_delta_round_trip_is_small():
+    base, target = _page(1), _page(2).replace('<td>Item 50</td>', '<td>Item fifty</td>')
+    delta = make_delta(base, target)
+    assert apply_delta(base, delta) == target
+    assert len(delta) * 10 < len(compress_keyframe(target))
+
+
+def test_delta_handles_inserted_and_removed_rows():
+    base = _page(1)
+    target = base.replace('<tr><td>Item 10</td><td>30</td></tr>', '').replace(
+        '<tr><td>Item 120</td>', '<tr><td>New</td><td>1</td></tr><tr><td>Item 120</td>'
+    ) + 'trailing text'
+    assert apply_delta(base, make_delta(base, target)) == target
+
+
+def test_identical_versions_have_empty_delta():
+    assert make_delta(_page(1), _page(1)) == b''
+    assert apply_delta(_page(1), b'') == _page(1)
+
+
+def test_reconstruct_replays_chain():
+    versions = [_page(version) for version in range(5)]
+    deltas = [make_delta(before, after) for before, after in zip(versions, versions[1:])]
+    assert reconstruct(compress_keyframe(versions[0]), deltas) == versions[-1]
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(HARVEST_SNAPSHOT_KEYFRAME_INTERVAL=3)
+def test_snapshots_store_deltas_between_keyframes():
+    job = HarvestJob.objects.create(url='https://example.com/', status='completed')
+    result = HarvestResult.objects.create(job=job, html=_page(0))
+    snapshots = [record_snapshot(result, _page(version)) for version in range(1, 6)]
+    unchanged = record_snapshot(result)
+
+    assert [snapshot.sequence for snapshot in snapshots] == [1, 2, 3, 4, 5]
+    assert [snapshot.chain_length for snapshot in snapshots] == [0, 1, 2, 0, 1]
+    assert (unchanged.sequence, unchanged.chain_length) == (6, 2)
+    for version, snapshot in enumerate(snapshots, start=1):
+        assert snapshot_html(snapshot) == _page(version)
+    assert snapshot_html(unchanged) == _page(5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_first_unchanged_snapshot_keeps_result_html():
+    job = HarvestJob.objects.create(url='https://example.com/', status='completed')
+    result = HarvestResult.objects.create(job=job, html=_page(0))
+    snapshot = record_snapshot(result, content_hash='abc', changes_detected=False)
+    assert snapshot.chain_length == 0
+    assert snapshot_html(snapshot) == _page(0)
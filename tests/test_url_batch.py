@@ -0,0 +1,33 @@
+import io
+
+from core.utils.url_batch import URLBatch
+
+
+def test_uploaded_lines_are_normalized_and_deduplicated():
+    upload = io.BytesIO(
+        b'url,notes\n'
+        b'https://Example.com/a?utm_source=x&b=2\n'
+        b'https://example.com/a?b=2\n'
+        b'"https://example.com/b",second\n'
+        b'# comment\n'
+        b'\n'
+        b'ftp://example.com/file\n'
+    )
+    batch = URLBatch()
+
+    urls = list(batch.iter_urls(upload))
+
+    assert urls == ['https://example.com/a?b=2', 'https://example.com/b']
+    assert batch.summary() == {
+        'accepted': 2,
+        'duplicates': 1,
+        'invalid': 2,
+        'invalid_samples': ['url', 'ftp://example.com/file'],
+    }
+
+
+def test_urls_longer_than_the_column_are_rejected():
+    batch = URLBatch(max_length=40)
+
+    assert batch.add('https://example.com/' + 'a' * 40) is None
+    assert batch.invalid == 1
@@ -0,0 +1,30 @@
+import pytest
+
+from core.utils.url_seen import create_seen_set, load_seen_set
+
+
+@pytest.mark.parametrize('kind', ['exact', 'bloom'])
+def test_seen_set_tracks_urls_across_growth(kind):
+    seen = create_seen_set(kind, capacity=64)
+    urls = [f'https://example.com/catalog?page={index}' for index in range(5000)]
+    for url in urls:
+        seen.add(url)
+
+    assert all(url in seen for url in urls)
+    assert not seen.add(urls[0])
+    false_positives = sum(1 for index in range(5000) if f'https://example.org/{index}' in seen)
+    assert false_positives <= 25
+
+
+@pytest.mark.parametrize('kind', ['exact', 'bloom'])
+def test_seen_set_round_trips_through_bytes(kind):
+    seen = create_seen_set(kind, capacity=64)
+    urls = [f'https://example.com/item/{index}' for index in range(500)]
+    for url in urls:
+        seen.add(url)
+
+    restored = load_seen_set(seen.to_bytes())
+    assert type(restored) is type(seen)
+    assert len(restored) == len(seen)
+    assert all(url in restored for url in urls)
+    assert restored.add('https://example.com/item/new')
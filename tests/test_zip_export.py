@@ -0,0 +1,64 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from core.models import Asset, HarvestJob, HarvestResult
+from core.utils.zip_export import iter_result_zip
+
+
+def _result(tmp_path, image_bytes):
+    image = tmp_path / f'{"ab" * 32}.png'
+    image.write_bytes(image_bytes)
+    stylesheet = tmp_path / f'{"cd" * 32}.css'
+    stylesheet.write_text('body { color: red; }\n' * 500)
+
+    job = HarvestJob.objects.create(url='https://example.com/', status='completed')
+    result = HarvestResult.objects.create(
+        job=job, html='<html><body>Hello</body></html>', content='Hello', technologies={'frameworks': ['React']}
+    )
+    for url, path, asset_type in (
+        ('https://example.com/logo.png', image, 'image'),
+        ('https://cdn.example.com/logo.png', image, 'image'),
+        ('https://example.com/site.css', stylesheet, 'css'),
+        ('https://example.com/gone.js', tmp_path / 'gone.js', 'js'),
+    ):
+        Asset.objects.create(
+            result=result, url=url, asset_type=asset_type, file_path=str(path),
+            file_size=path.stat().st_size if path.exists() else 0,
+        )
+    return result
+
+
+@pytest.mark.django_db(transaction=True)
+def test_archive_contains_page_assets_and_manifest(tmp_path):
+    result = _result(tmp_path, b'\x89PNG' + os.urandom(1000))
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_result_zip(result))))
+
+    names = archive.namelist()
+    assert names[:2] == ['index.html', 'content.txt']
+    assert names[-1] == 'metadata.json'
+    assert len(names) == 5
+    assert archive.read('index.html') == b'<html><body>Hello</body></html>'
+
+    image_name = f'assets/image/{"ab" * 32}.png'
+    assert archive.getinfo(image_name).compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo(f'assets/css/{"cd" * 32}.css').compress_type == zipfile.ZIP_DEFLATED
+    assert archive.testzip() is None
+
+    metadata = json.loads(archive.read('metadata.json'))
+    assert metadata['technologies'] == {'frameworks': ['React']}
+    assert [asset['path'] for asset in metadata['assets'] if asset['type'] == 'image'] == [image_name] * 2
+    assert [asset['url'] for asset in metadata['missing_assets']] == ['https://example.com/gone.js']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_large_assets_stream_in_bounded_chunks(tmp_path):
+    result = _result(tmp_path, os.urandom(4 * 1024 * 1024))
+    chunks = list(iter_result_zip(result, chunk_size=16 * 1024))
+
+    assert max(len(chunk) for chunk in chunks) < 64 * 1024
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+    assert archive.getinfo(f'assets/image/{"ab" * 32}.png').file_size == 4 * 1024 * 1024